@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+class WorkBroker:
+    """
+    SQLite (WAL) work queue shared by the API and out-of-process workers.
+
+    A task is published as a job holding its parameters plus one unit per
+    tile. Workers lease one unit at a time from the job with the fewest units
+    in flight, so concurrent tasks share the workers evenly. A lease that is
+    not completed or renewed within its lease time goes back to the queue,
+    so units held by a crashed worker are retried. Workers write results,
+    URL claims and counters back here, where the API collects them; nothing
+    is lost while the API restarts. Once a job is finished or cancelled only
+    its `jobs` row is kept, so the tables do not grow with every task.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; writes that must be atomic use explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " task_id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " root_count INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " active INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status);"
+            "CREATE TABLE IF NOT EXISTS units ("
+            " task_id TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " item TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'queued',"
+            " worker TEXT,"
+            " lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " PRIMARY KEY (task_id, idx));"
+            "CREATE INDEX IF NOT EXISTS units_by_status ON units (task_id, status);"
+            "CREATE INDEX IF NOT EXISTS units_by_lease ON units (status, lease_until);"
+            "CREATE TABLE IF NOT EXISTS claims ("
+            " task_id TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " PRIMARY KEY (task_id, url));"
+            "CREATE TABLE IF NOT EXISTS results ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " task_id TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " data TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS results_by_task ON results (task_id, id);"
+            "CREATE TABLE IF NOT EXISTS counters ("
+            " task_id TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " value INTEGER NOT NULL,"
+            " PRIMARY KEY (task_id, name));"
+        )
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _read(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    # ------------------------------------------------------------------
+    # API side
+    # ------------------------------------------------------------------
+
+    def publish(self, task_id, kind, params, items):
+        """
+        Publish a task; republishing after a restart keeps its existing units.
+        A job that already finished stays finished, since its units are gone.
+        """
+        def work(conn):
+            row = conn.execute("SELECT status FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+            if row and row[0] == "done":
+                return
+            conn.execute(
+                "INSERT INTO jobs (task_id, kind, params, root_count, status, created_at)"
+                " VALUES (?, ?, ?, ?, 'running', ?)"
+                " ON CONFLICT (task_id) DO UPDATE SET status = 'running', params = excluded.params",
+                (task_id, kind, json.dumps(params), len(items), time.time()),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO units (task_id, idx, item) VALUES (?, ?, ?)",
+                ((task_id, index, json.dumps(item)) for index, item in enumerate(items)),
+            )
+        self._transaction(work)
+
+    def _close(self, task_id, status):
+        """Set a job's final status and drop everything but its `jobs` row."""
+        def work(conn):
+            conn.execute("UPDATE jobs SET status = ?, active = 0 WHERE task_id = ?", (status, task_id))
+            for table in ("units", "claims", "results", "counters"):
+                conn.execute(f"DELETE FROM {table} WHERE task_id = ?", (task_id,))
+        self._transaction(work)
+
+    def cancel(self, task_id):
+        self._close(task_id, "cancelled")
+
+    def finish(self, task_id):
+        """Close a task whose units are all done; call once its results have been collected."""
+        self._close(task_id, "done")
+
+    def unit_counts(self, task_id):
+        rows = self._read("SELECT status, COUNT(*) FROM units WHERE task_id = ? GROUP BY status", (task_id,))
+        return dict(rows)
+
+    def results_since(self, task_id, after_id):
+        """Results stored after row `after_id`, as (id, url, data) tuples."""
+        rows = self._read(
+            "SELECT id, url, data FROM results WHERE task_id = ? AND id > ? ORDER BY id",
+            (task_id, after_id),
+        )
+        return [(row_id, url, json.loads(data)) for row_id, url, data in rows]
+
+    def counters(self, task_id):
+        return dict(self._read("SELECT name, value FROM counters WHERE task_id = ?", (task_id,)))
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def lease(self, worker_id, lease_seconds):
+        """
+        Lease the next unit, or None if nothing is queued. Returns a dict with
+        task_id, idx, kind, params, item and root_count.
+        """
+        def work(conn):
+            now = time.time()
+            # A unit whose worker keeps dying is given up on like one that keeps failing
+            expired = conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                " worker = NULL, lease_until = NULL,"
+                " error = CASE WHEN attempts >= ? THEN 'lease expired' ELSE error END"
+                " WHERE status = 'leased' AND lease_until < ?",
+                (self.max_attempts, self.max_attempts, now),
+            ).rowcount
+            if expired:
+                conn.execute(
+                    "UPDATE jobs SET active = (SELECT COUNT(*) FROM units"
+                    " WHERE units.task_id = jobs.task_id AND units.status = 'leased')"
+                )
+            job = conn.execute(
+                "SELECT task_id, kind, params, root_count FROM jobs WHERE status = 'running'"
+                " AND EXISTS (SELECT 1 FROM units WHERE units.task_id = jobs.task_id AND units.status = 'queued')"
+                " ORDER BY active, created_at LIMIT 1"
+            ).fetchone()
+            if not job:
+                return None
+            task_id, kind, params, root_count = job
+            idx, item = conn.execute(
+                "SELECT idx, item FROM units WHERE task_id = ? AND status = 'queued' ORDER BY rowid LIMIT 1",
+                (task_id,),
+            ).fetchone()
+            conn.execute(
+                "UPDATE units SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1"
+                " WHERE task_id = ? AND idx = ?",
+                (worker_id, now + lease_seconds, task_id, idx),
+            )
+            conn.execute("UPDATE jobs SET active = active + 1 WHERE task_id = ?", (task_id,))
+            return {
+                "task_id": task_id,
+                "idx": idx,
+                "kind": kind,
+                "params": json.loads(params),
+                "item": json.loads(item),
+                "root_count": root_count,
+            }
+        return self._transaction(work)
+
+    def renew(self, task_id, idx, worker_id, lease_seconds):
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE units SET lease_until = ? WHERE task_id = ? AND idx = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, task_id, idx, worker_id),
+        ))
+
+    def complete(self, task_id, idx, worker_id, counters=None, children=()):
+        """
+        Mark a unit done, add its counters and queue any child units `(idx, item)`.
+        False if `worker_id` no longer holds the lease; nothing is recorded then.
+        """
+        def work(conn):
+            if not conn.execute(
+                "UPDATE units SET status = 'done', lease_until = NULL"
+                " WHERE task_id = ? AND idx = ? AND worker = ? AND status = 'leased'",
+                (task_id, idx, worker_id),
+            ).rowcount:
+                return False
+            conn.execute("UPDATE jobs SET active = MAX(active - 1, 0) WHERE task_id = ?", (task_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO units (task_id, idx, item) VALUES (?, ?, ?)",
+                ((task_id, child_idx, json.dumps(item)) for child_idx, item in children),
+            )
+            conn.executemany(
+                "INSERT INTO counters (task_id, name, value) VALUES (?, ?, ?)"
+                " ON CONFLICT (task_id, name) DO UPDATE SET value = value + excluded.value",
+                ((task_id, name, int(value)) for name, value in (counters or {}).items()),
+            )
+            return True
+        return self._transaction(work)
+
+    def fail(self, task_id, idx, worker_id, error):
+        """Requeue a failed unit, or give up on it after `max_attempts` leases; ignored if the lease was lost."""
+        def work(conn):
+            if conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                " worker = NULL, lease_until = NULL, error = ?"
+                " WHERE task_id = ? AND idx = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, str(error), task_id, idx, worker_id),
+            ).rowcount:
+                conn.execute("UPDATE jobs SET active = MAX(active - 1, 0) WHERE task_id = ?", (task_id,))
+        self._transaction(work)
+
+    def job_status(self, task_id):
+        rows = self._read("SELECT status FROM jobs WHERE task_id = ?", (task_id,))
+        return rows[0][0] if rows else None
+
+    def claim_url(self, task_id, url):
+        """
+        Atomically claim a place URL for a task; False if any worker already
+        has it or the job is no longer running.
+        """
+        if not url:
+            return False
+        return bool(self._transaction(lambda conn: conn.execute(
+            "INSERT OR IGNORE INTO claims (task_id, url) SELECT ?, ?"
+            " WHERE EXISTS (SELECT 1 FROM jobs WHERE task_id = ? AND status = 'running')",
+            (task_id, url, task_id),
+        ).rowcount))
+
+    def add_result(self, task_id, url, business_data):
+        """Store a result; dropped if the job was closed meanwhile, so closed jobs leave no rows behind."""
+        self._transaction(lambda conn: conn.execute(
+            "INSERT INTO results (task_id, url, data) SELECT ?, ?, ?"
+            " WHERE EXISTS (SELECT 1 FROM jobs WHERE task_id = ? AND status = 'running')",
+            (task_id, url or "", json.dumps(business_data), task_id),
+        ))
@@ -0,0 +1,172 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+
+from .utils import log_message
+
+# Cities above this population are offered in the /cities dropdown
+BIG_CITY_POPULATION = 100000
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def source_signature(json_folder):
+    """Hash of the country files' names, sizes and mtimes; changes trigger a rebuild."""
+    digest = hashlib.sha1()
+    for filename in sorted(os.listdir(json_folder)):
+        if not filename.endswith(".json"):
+            continue
+        stat = os.stat(os.path.join(json_folder, filename))
+        digest.update(f"{filename}:{stat.st_size}:{int(stat.st_mtime)}\n".encode())
+    return digest.hexdigest()
+
+
+def build_city_index(json_folder, path):
+    """
+    Compile the per-country JSON files into one SQLite file holding only
+    name, coordinates and population for every city.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(
+        "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);"
+        "CREATE TABLE countries (name TEXT PRIMARY KEY);"
+        "CREATE TABLE cities ("
+        " country TEXT NOT NULL,"
+        " name TEXT NOT NULL,"
+        " name_key TEXT NOT NULL,"
+        " latitude REAL NOT NULL,"
+        " longitude REAL NOT NULL,"
+        " population INTEGER NOT NULL);"
+    )
+    rows = 0
+    for filename in sorted(os.listdir(json_folder)):
+        if not filename.endswith(".json"):
+            continue
+        country = filename[:-5]
+        conn.execute("INSERT INTO countries VALUES (?)", (country,))
+        with open(os.path.join(json_folder, filename), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        batch = []
+        for entry in data:
+            name = entry.get("ASCII Name", "")
+            lat, lon = _to_float(entry.get("latitude")), _to_float(entry.get("longitude"))
+            if not name or lat is None or lon is None:
+                continue
+            batch.append((country, name, name.lower(), lat, lon, _to_int(entry.get("Population", 0))))
+        conn.executemany("INSERT INTO cities VALUES (?, ?, ?, ?, ?, ?)", batch)
+        rows += len(batch)
+    conn.execute("CREATE INDEX cities_lookup ON cities (country, name_key)")
+    conn.execute("INSERT INTO meta VALUES ('signature', ?)", (source_signature(json_folder),))
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+    log_message(f"🗺️ Built city index with {rows} cities at {path}")
+    return rows
+
+
+class CityIndex:
+    """
+    In-memory city lookup loaded from the compact SQLite index.
+
+    Country and city names are matched case-insensitively; the first city of
+    a name in the source file wins, as the JSON scan did before.
+    """
+
+    def __init__(self, json_folder, path):
+        self.json_folder = json_folder
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._countries = {}
+        self._coords = {}
+        self._big_cities = {}
+
+    def _stored_signature(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            conn = sqlite3.connect(self.path)
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+            finally:
+                conn.close()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+
+    def load(self):
+        """Load the index into memory, rebuilding it first if the sources changed."""
+        with self._lock:
+            if self._loaded:
+                return
+            if self._stored_signature() != source_signature(self.json_folder):
+                build_city_index(self.json_folder, self.path)
+
+            countries, coords, big_cities = {}, {}, {}
+            conn = sqlite3.connect(self.path)
+            try:
+                for (country,) in conn.execute("SELECT name FROM countries"):
+                    key = country.lower()
+                    countries[key] = country
+                    coords[key] = {}
+                    big_cities[key] = []
+                cursor = conn.execute(
+                    "SELECT country, name, name_key, latitude, longitude, population FROM cities ORDER BY rowid"
+                )
+                for country, name, name_key, lat, lon, population in cursor:
+                    key = country.lower()
+                    coords[key].setdefault(name_key, (lat, lon))
+                    if population > BIG_CITY_POPULATION:
+                        big_cities[key].append(name)
+            finally:
+                conn.close()
+            self._countries, self._coords, self._big_cities = countries, coords, big_cities
+            self._loaded = True
+            log_message(f"🗺️ Loaded city index: {len(countries)} countries")
+
+    def countries(self):
+        self.load()
+        return sorted(self._countries.values())
+
+    def has_country(self, country):
+        self.load()
+        return country.lower() in self._countries
+
+    def big_cities(self, country):
+        """Cities above BIG_CITY_POPULATION, or None for an unknown country."""
+        self.load()
+        return self._big_cities.get(country.lower())
+
+    def coordinates(self, country, city):
+        """(lat, lon) of a city, or None if the country or city is unknown."""
+        self.load()
+        return self._coords.get(country.lower(), {}).get(city.lower())
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    build_city_index(
+        os.path.join(base_dir, "data", "countries"),
+        os.getenv("CITY_INDEX_PATH", os.path.join(os.getenv("STATE_DIR", os.path.join(base_dir, "state")), "city_index.sqlite")),
+    )
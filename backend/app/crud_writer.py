@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from .utils import log_message
+
+
+class RejectedBatch(Exception):
+    """The CRUD API refused a batch for good (4xx); retrying it cannot succeed."""
+
+
+class CrudWriter:
+    """
+    Write-behind outbox for CRUD documents.
+
+    Documents are queued in SQLite (WAL) keyed by (task_id, key), so a place
+    URL is only ever queued once per task and nothing queued is lost on a
+    restart. A background thread posts pending documents in batches of
+    `batch_size`, or after `flush_seconds` once anything is pending, and backs
+    off exponentially while the CRUD API fails. Enqueueing never blocks on
+    the network.
+
+    `post_batch(path, documents)` must return True once the batch is stored,
+    False on a transient failure, and raise RejectedBatch when the API
+    refuses it for good. A rejected batch is retried one document at a time
+    so only the documents refused on their own are moved to the dead_letter
+    table; documents still failing after `max_attempts` transient failures
+    follow them, so nothing blocks the queue behind them forever.
+    """
+
+    def __init__(self, path, post_batch, batch_size=50, flush_seconds=5.0,
+                 backoff_seconds=2.0, max_backoff_seconds=300.0, retention_hours=72.0,
+                 max_attempts=20):
+        self.post_batch = post_batch
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.retention_seconds = retention_hours * 3600
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(threading.Lock())
+        self._stop = False
+        self._failures = 0
+        self._thread = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " task_id TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " document TEXT NOT NULL,"
+            " queued_at REAL NOT NULL,"
+            " sent_at REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (task_id, key));"
+            "CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (sent_at, queued_at);"
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " task_id TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " document TEXT NOT NULL,"
+            " queued_at REAL NOT NULL,"
+            " failed_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL,"
+            " error TEXT,"
+            " PRIMARY KEY (task_id, key));"
+        )
+        self._conn.commit()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="crud-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        """Stop the writer after one last flush attempt."""
+        with self._wakeup:
+            self._stop = True
+            self._wakeup.notify()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def enqueue(self, task_id, key, path, document):
+        """Queue a document; returns False if this key was already queued for the task."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (task_id, key, path, document, queued_at) VALUES (?, ?, ?, ?, ?)",
+                (task_id, key, path, json.dumps(document), time.time()),
+            )
+            self._conn.commit()
+        # While the API is failing the backoff schedule decides when to retry
+        if cursor.rowcount and not self._failures and self.pending() >= self.batch_size:
+            with self._wakeup:
+                self._wakeup.notify()
+        return bool(cursor.rowcount)
+
+    def pending(self, task_id=None):
+        """Number of queued documents not yet stored, optionally for one task."""
+        with self._lock:
+            if task_id is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL").fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL AND task_id = ?", (task_id,)
+                ).fetchone()
+        return row[0]
+
+    def dead_letters(self, task_id=None):
+        """Number of documents given up on, optionally for one task."""
+        with self._lock:
+            if task_id is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM dead_letter WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0]
+
+    def _next_batch(self):
+        with self._lock:
+            first = self._conn.execute(
+                "SELECT path FROM outbox WHERE sent_at IS NULL ORDER BY queued_at LIMIT 1"
+            ).fetchone()
+            if not first:
+                return None, []
+            rows = self._conn.execute(
+                "SELECT rowid, document FROM outbox WHERE sent_at IS NULL AND path = ?"
+                " ORDER BY queued_at LIMIT ?",
+                (first[0], self.batch_size),
+            ).fetchall()
+        return first[0], rows
+
+    def _mark(self, rowids, sent):
+        marks = ",".join("?" * len(rowids))
+        with self._lock:
+            if sent:
+                self._conn.execute(f"UPDATE outbox SET sent_at = ? WHERE rowid IN ({marks})", (time.time(), *rowids))
+            else:
+                self._conn.execute(f"UPDATE outbox SET attempts = attempts + 1 WHERE rowid IN ({marks})", rowids)
+            self._conn.commit()
+
+    def _bury(self, rowids, error):
+        """Move documents to the dead_letter table."""
+        marks = ",".join("?" * len(rowids))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dead_letter (task_id, key, path, document, queued_at, failed_at, attempts, error)"
+                f" SELECT task_id, key, path, document, queued_at, ?, attempts + 1, ? FROM outbox WHERE rowid IN ({marks})",
+                (time.time(), str(error)[:1000], *rowids),
+            )
+            self._conn.execute(f"DELETE FROM outbox WHERE rowid IN ({marks})", rowids)
+            self._conn.commit()
+        log_message(f"🪦 Moved {len(rowids)} CRUD document(s) to the dead-letter table: {str(error)[:200]}")
+
+    def _post(self, path, rows):
+        """Post rows once; returns "stored", "failed" or "rejected" with the rejection."""
+        try:
+            if self.post_batch(path, [json.loads(document) for _, document in rows]):
+                return "stored", None
+        except RejectedBatch as e:
+            return "rejected", e
+        except Exception as e:
+            log_message(f"⚠️ CRUD batch failed: {e}")
+        return "failed", None
+
+    def _fail(self, rowids):
+        """Count a transient failure and bury documents that ran out of attempts."""
+        self._mark(rowids, False)
+        marks = ",".join("?" * len(rowids))
+        with self._lock:
+            exhausted = [row[0] for row in self._conn.execute(
+                f"SELECT rowid FROM outbox WHERE rowid IN ({marks}) AND attempts >= ?", (*rowids, self.max_attempts)
+            )]
+        if exhausted:
+            self._bury(exhausted, f"gave up after {self.max_attempts} attempts")
+
+    def flush(self):
+        """Post pending documents until the outbox is empty or a batch fails."""
+        while True:
+            path, rows = self._next_batch()
+            if not rows:
+                return True
+            outcome, error = self._post(path, rows)
+            if outcome == "stored":
+                self._mark([rowid for rowid, _ in rows], True)
+                continue
+            if outcome == "failed":
+                self._fail([rowid for rowid, _ in rows])
+                return False
+            if len(rows) == 1:
+                self._bury([rows[0][0]], error)
+                continue
+            # Find the documents the API refuses by sending them one at a time
+            for row in rows:
+                outcome, error = self._post(path, [row])
+                if outcome == "stored":
+                    self._mark([row[0]], True)
+                elif outcome == "rejected":
+                    self._bury([row[0]], error)
+                else:
+                    self._fail([row[0]])
+                    return False
+
+    def _purge(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM outbox WHERE sent_at IS NOT NULL AND sent_at < ?",
+                (time.time() - self.retention_seconds,),
+            )
+            self._conn.commit()
+
+    def _run(self):
+        last_purge = 0.0
+        while True:
+            with self._wakeup:
+                if not self._stop:
+                    delay = self.flush_seconds
+                    if self._failures:
+                        delay = min(self.backoff_seconds * 2 ** (self._failures - 1), self.max_backoff_seconds)
+                    self._wakeup.wait(delay)
+                stopping = self._stop
+            if self.flush():
+                self._failures = 0
+            else:
+                self._failures += 1
+                log_message(f"⚠️ CRUD write-behind retrying; {self.pending()} documents queued")
+            if time.time() - last_purge > 3600:
+                self._purge()
+                last_purge = time.time()
+            if stopping:
+                return
@@ -0,0 +1,349 @@
+import os
+import threading
+import time
+import queue
+from contextlib import contextmanager
+
+from .utils import log_message
+
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+def _process_memory_kb(pid):
+    """Proportional set size of one process (RSS where smaps_rollup is missing), in kB."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_KB
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_memory_mb(root_pid):
+    """
+    Memory of a process and all its descendants in MB, or None where /proc
+    cannot be read. Chrome shares most pages between its processes, so PSS is
+    summed rather than RSS to avoid counting them once per renderer.
+    """
+    children = {}
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return None
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                # The command name may contain spaces; fields resume after its closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(pid))
+
+    total, stack, seen = 0, [root_pid], set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += _process_memory_kb(pid)
+        stack.extend(children.get(pid, ()))
+    return total / 1024
+
+
+class _PooledDriver:
+    """A browser owned by the pool plus the bookkeeping needed to recycle it."""
+
+    def __init__(self, driver, port, meter=None):
+        self.driver = driver
+        self.port = port
+        self.meter = meter
+        self.uses = 0
+        self.pages = 0
+        self.memory_mb = None
+        self.created_at = time.time()
+        self._count_pages()
+
+    def _count_pages(self):
+        """Count every get/back on this driver as one page load and meter its traffic."""
+        for name in ("get", "back"):
+            original = getattr(self.driver, name, None)
+            if original is None:
+                continue
+
+            def counted(*args, _original=original, _name=name, **kwargs):
+                self.pages += 1
+                started = time.time()
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    if self.meter:
+                        # Blank pages from a reset only flush the previous page's traffic
+                        blank = _name == "get" and args and args[0] == "about:blank"
+                        seconds = time.time() - started if _name == "get" else None
+                        self.meter.record_page(self.driver, seconds, page=not blank)
+
+            setattr(self.driver, name, counted)
+
+    @property
+    def pid(self):
+        """Process id of the chromedriver that owns this browser's process tree."""
+        try:
+            return self.driver.service.process.pid
+        except AttributeError:
+            return None
+
+
+class DriverPool:
+    """
+    Keeps a bounded set of warm Chrome drivers and leases them to scraping tasks.
+
+    Every browser gets its own remote debugging port so several can run side by
+    side. Drivers are health-checked before each lease and reset when returned.
+    A browser is recycled once it crosses any limit: `max_uses` leases,
+    `max_pages` page loads, `max_age_seconds` of life, or `max_memory_mb` for
+    its whole process tree. Limits are checked when a lease is returned, and
+    long-running holders can call `refresh` between units of work.
+    """
+
+    def __init__(self, factory, size=2, max_uses=25, base_port=9222, reset_storage=True,
+                 storage_origin="https://www.google.com",
+                 max_pages=0, max_age_seconds=0, max_memory_mb=0, meter=None, port_timeout=60):
+        self.factory = factory
+        self.port_timeout = port_timeout
+        self.meter = meter
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.max_pages = max_pages
+        self.max_age_seconds = max_age_seconds
+        self.max_memory_mb = max_memory_mb
+        self.reset_storage = reset_storage
+        self.storage_origin = storage_origin
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._ports = queue.Queue()
+        for offset in range(self.size):
+            self._ports.put(base_port + offset)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"launched": 0, "recycled": 0, "discarded": 0, "leases": 0, "refreshed": 0}
+        self._recycled_by = {"uses": 0, "pages": 0, "age": 0, "memory": 0}
+        self._peak_memory_mb = 0.0
+
+    # ------------------------------------------------------------------
+    # Browser lifecycle
+    # ------------------------------------------------------------------
+
+    def _launch(self, wait=True):
+        """Launch a browser on a free debugging port; None if none is free or the launch failed."""
+        try:
+            port = self._ports.get(timeout=self.port_timeout) if wait else self._ports.get_nowait()
+        except queue.Empty:
+            if wait:
+                log_message("⚠️ No free debugging port for a new driver")
+            return None
+        try:
+            driver = self.factory(debug_port=port)
+        except Exception as e:
+            log_message(f"❌ Driver launch on port {port} failed: {e}")
+            driver = None
+        if not driver:
+            self._ports.put(port)
+            return None
+        with self._lock:
+            self._stats["launched"] += 1
+        log_message(f"🚗 Launched pooled driver on port {port}")
+        return _PooledDriver(driver, port, self.meter)
+
+    def _destroy(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+        self._ports.put(entry.port)
+
+    def _is_healthy(self, entry):
+        try:
+            return entry.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _sample_memory(self, entry):
+        pid = entry.pid
+        memory = process_tree_memory_mb(pid) if pid else None
+        if memory is not None:
+            entry.memory_mb = memory
+            with self._lock:
+                self._peak_memory_mb = max(self._peak_memory_mb, memory)
+        return memory
+
+    def _worn_out(self, entry):
+        """The limit a driver has crossed, as (reason, detail), or None."""
+        if entry.uses >= self.max_uses:
+            return "uses", f"{entry.uses} uses"
+        if self.max_pages and entry.pages >= self.max_pages:
+            return "pages", f"{entry.pages} pages"
+        age = time.time() - entry.created_at
+        if self.max_age_seconds and age >= self.max_age_seconds:
+            return "age", f"{age / 60:.0f} min"
+        if self.max_memory_mb:
+            memory = self._sample_memory(entry)
+            if memory and memory >= self.max_memory_mb:
+                return "memory", f"{memory:.0f} MB"
+        return None
+
+    def _recycle(self, entry, worn):
+        reason, detail = worn
+        log_message(f"♻️ Recycling driver on port {entry.port} after {detail} ({entry.uses} leases)")
+        with self._lock:
+            self._stats["recycled"] += 1
+            self._recycled_by[reason] += 1
+        self._destroy(entry)
+
+    def _reset(self, entry):
+        """Bring a returned driver back to a blank state for the next lease."""
+        driver = entry.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+        if self.reset_storage:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": self.storage_origin,
+                "storageTypes": "local_storage,session_storage,indexeddb,service_workers",
+            })
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def warm(self):
+        """
+        Pre-launch browsers until the pool is full. Each launch holds a slot
+        like a lease does and is published as soon as it is up, so tasks that
+        start while the pool warms are never left waiting on it.
+        """
+        for _ in range(self.size - self._idle.qsize()):
+            if self._closed or not self._slots.acquire(blocking=False):
+                break
+            try:
+                entry = self._launch(wait=False)
+                if entry and self._is_healthy(entry):
+                    self._idle.put(entry)
+                elif entry:
+                    self._destroy(entry)
+                else:
+                    break
+            finally:
+                self._slots.release()
+        log_message(f"🔥 Driver pool warmed: {self._idle.qsize()}/{self.size} browsers ready")
+
+    def acquire(self, timeout=None):
+        """Lease a healthy driver entry, launching one if no warm browser is idle."""
+        if self._closed:
+            return None
+        if not self._slots.acquire(timeout=timeout):
+            return None
+        try:
+            while True:
+                try:
+                    entry = self._idle.get_nowait()
+                except queue.Empty:
+                    entry = self._launch()
+                    if not entry:
+                        self._slots.release()
+                        return None
+                if self._is_healthy(entry):
+                    entry.uses += 1
+                    with self._lock:
+                        self._stats["leases"] += 1
+                    return entry
+                log_message(f"⚠️ Pooled driver on port {entry.port} failed health check, replacing")
+                with self._lock:
+                    self._stats["discarded"] += 1
+                self._destroy(entry)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, entry):
+        """Return a leased entry to the pool, recycling it if it is worn out or broken."""
+        try:
+            if self._closed:
+                self._destroy(entry)
+                return
+            worn = self._worn_out(entry)
+            if worn:
+                self._recycle(entry, worn)
+                return
+            try:
+                self._reset(entry)
+            except Exception as e:
+                log_message(f"⚠️ Driver reset failed on port {entry.port}: {e}")
+                with self._lock:
+                    self._stats["discarded"] += 1
+                self._destroy(entry)
+                return
+            self._idle.put(entry)
+        finally:
+            self._slots.release()
+
+    def refresh(self, entry):
+        """
+        Swap a leased entry for a fresh browser if it has crossed a limit.
+
+        Call at a safe point of a long lease, where the caller can navigate
+        back to its work from state it keeps itself. Returns the entry to keep
+        using (the same one if it is still fine), or None if no replacement
+        could be launched; the lease is then already given back.
+        """
+        worn = self._worn_out(entry)
+        if not worn:
+            return entry
+        self._recycle(entry, worn)
+        replacement = self._launch()
+        if not replacement:
+            self._slots.release()
+            return None
+        replacement.uses = 1
+        with self._lock:
+            self._stats["refreshed"] += 1
+        return replacement
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Context manager yielding a driver (or None if none could be started)."""
+        entry = self.acquire(timeout=timeout)
+        try:
+            yield entry.driver if entry else None
+        finally:
+            if entry:
+                self.release(entry)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["recycled_by"] = dict(self._recycled_by)
+            stats["peak_memory_mb"] = round(self._peak_memory_mb, 1)
+        stats.update({"size": self.size, "idle": self._idle.qsize()})
+        if self.meter:
+            stats["network"] = self.meter.stats()
+        return stats
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._destroy(entry)
+        log_message("🛑 Driver pool shut down")
@@ -0,0 +1,409 @@
+import re
+import time
+
+from .utils import log_message
+
+# Selector chains per field, tried in order. Shared by the XPath and the
+# injected-JavaScript extractors so both apply exactly the same rules.
+NAME_SELECTORS = [
+    "//h1[contains(@class, 'DUwDvf') and not(contains(@class, 'review'))]",
+    "//h1[@data-attrid='title']",
+    "//div[@data-value='Title']//span[not(contains(text(), 'Results')) and not(contains(text(), 'reviews'))]",
+    "//h1[not(contains(text(), 'Results')) and not(contains(text(), 'Map data'))]"
+]
+
+ADDRESS_SELECTORS = [
+    "//button[@data-item-id='address']//div[contains(@class, 'fontBodyMedium')]",
+    "//div[@data-value='Address']//span[contains(text(), ',')]",
+    "//button[contains(@aria-label, 'Address')]//div[contains(text(), ',')]",
+    "//div[contains(@class, 'Io6YTe') and contains(text(), ',') and not(contains(text(), 'reviews'))]"
+]
+
+PHONE_SELECTORS = [
+    "//button[@data-item-id='phone:tel:']//div[contains(@class, 'fontBodyMedium')]",
+    "//button[contains(@aria-label, 'Phone')]//div[contains(text(), '+') or contains(text(), '(')]",
+    "//a[starts-with(@href, 'tel:')]",
+    "//span[contains(text(), '+') and (contains(text(), '-') or contains(text(), ' '))]"
+]
+
+# Primary selector first; the fallback is only used when the primary is absent
+RATING_SELECTORS = [
+    "//div[contains(@class, 'F7nice')]//span[@aria-hidden='true' and string-length(text()) <= 3]",
+    "//span[@class='MW4etd']"
+]
+
+REVIEWS_SELECTORS = [
+    "//div[contains(@class, 'F7nice')]//span[contains(text(), '(') and contains(text(), ')') and contains(text(), 'review')]",
+    "//div[contains(@class, 'F7nice')]//span[starts-with(normalize-space(text()), '(') and contains(text(), ')')]"
+]
+
+WEBSITE_SELECTOR = "//a[@data-item-id='authority']//div[contains(@class, 'fontBodyMedium')]"
+WEBSITE_LINK_SELECTOR = "//a[contains(@href, 'http') and not(contains(@href, 'google.com')) and not(contains(@href, 'maps'))]"
+
+CATEGORY_SELECTOR = "//button[contains(@class, 'DkEaL')]//span"
+
+TEXT_SELECTORS = (
+    NAME_SELECTORS + ADDRESS_SELECTORS + PHONE_SELECTORS + RATING_SELECTORS
+    + REVIEWS_SELECTORS + [WEBSITE_SELECTOR, CATEGORY_SELECTOR]
+)
+HREF_SELECTORS = [WEBSITE_LINK_SELECTOR]
+
+# Evaluates every selector chain inside the page and returns one JSON object:
+# {"texts": {xpath: innerText | null}, "hrefs": {xpath: href | null}}
+EXTRACT_DETAILS_JS = """
+const textSelectors = arguments[0];
+const hrefSelectors = arguments[1];
+const first = (xpath) => {
+    try {
+        return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {
+        return null;
+    }
+};
+const texts = {};
+for (const xpath of textSelectors) {
+    const node = first(xpath);
+    texts[xpath] = node ? (node.innerText || node.textContent || '') : null;
+}
+const hrefs = {};
+for (const xpath of hrefSelectors) {
+    const node = first(xpath);
+    hrefs[xpath] = node ? (node.href || node.getAttribute('href')) : null;
+}
+return {texts: texts, hrefs: hrefs};
+"""
+
+EXTRACTION_MODES = ("xpath", "js", "compare")
+
+
+def clean_text(text):
+    """Clean and sanitize text extracted from the webpage"""
+    if text:
+        text = re.sub(r"[^\x20-\x7E]", "", text)
+        return text.strip()
+    return "N/A"
+
+
+def empty_details(url):
+    return {
+        "Google Maps Link": url,
+        "Name": "N/A",
+        "Address": "N/A",
+        "Phone": "N/A",
+        "Rating": "N/A",
+        "Reviews": "N/A",
+        "Reviews_Count": 0,
+        "Plus Code": "N/A",
+        "Website": "N/A",
+        "Category": "N/A",
+        "Hours": "N/A",
+        "Has_Multiple_Locations": False,
+        "Has_Contact_Info": False,
+        "Has_Sufficient_Reviews": False,
+        "Has_Working_Hours": False
+    }
+
+
+# ----------------------------------------------------------------------
+# Validation rules
+# ----------------------------------------------------------------------
+
+def valid_name(text):
+    name_text = clean_text(text)
+    # Validate that it's not a generic result
+    if (name_text and
+        name_text.lower() not in ['results', 'map data', 'google', 'maps'] and
+        len(name_text) > 2 and
+        not name_text.isdigit()):
+        return name_text
+    return None
+
+
+def valid_address(text):
+    address_text = clean_text(text)
+    if address_text and ',' in address_text and len(address_text) > 10:
+        return address_text
+    return None
+
+
+def valid_phone(text):
+    phone_text = clean_text(text)
+    if (phone_text and
+        (phone_text.startswith('+') or phone_text.startswith('(')) and
+        any(char.isdigit() for char in phone_text) and
+        len(phone_text) >= 8 and
+        not phone_text.lower().startswith('0  26k')):  # Filter out the problematic pattern
+        return phone_text
+    return None
+
+
+def valid_rating(text):
+    rating_text = clean_text(text)
+    try:
+        # Validate it's a number between 1-5
+        if 1.0 <= float(rating_text) <= 5.0:
+            return rating_text
+    except ValueError:
+        pass
+    return None
+
+
+def parse_reviews_count(reviews_text):
+    numbers = re.findall(r'\(([0-9,]+)\)', reviews_text)
+    if numbers:
+        try:
+            count = int(numbers[0].replace(',', ''))
+            if 0 <= count <= 1000000:  # Reasonable range
+                return count
+        except ValueError:
+            pass
+    return None
+
+
+def valid_website_text(text):
+    website_text = clean_text(text)
+    if website_text and not website_text.startswith('google.'):
+        return website_text
+    return None
+
+
+def valid_website_href(href):
+    if href and not href.startswith('https://www.google.'):
+        return href
+    return None
+
+
+def valid_category(text):
+    category_text = clean_text(text)
+    if category_text and len(category_text) < 50:
+        return category_text
+    return None
+
+
+# ----------------------------------------------------------------------
+# Resolution shared by both extraction modes
+# ----------------------------------------------------------------------
+
+def _first_present(lookup, selectors):
+    """Text of the first selector that matched anything, like a find_element fallback chain."""
+    for selector in selectors:
+        text = lookup(selector)
+        if text is not None:
+            return text
+    return None
+
+
+def _first_valid(lookup, selectors, validate):
+    for selector in selectors:
+        text = lookup(selector)
+        if text and text.strip():
+            value = validate(text)
+            if value:
+                return value
+    return None
+
+
+def resolve_details(url, lookup, href_lookup):
+    """
+    Apply the field rules to page content.
+
+    `lookup(xpath)` returns the text of the first matching element or None;
+    `href_lookup(xpath)` returns its href. Lookups are lazy so the XPath mode
+    still stops at the first valid selector.
+    """
+    details = empty_details(url)
+
+    name = _first_valid(lookup, NAME_SELECTORS, valid_name)
+    if not name:
+        # If no valid name found, this is likely not a business page
+        log_message("❌ No valid business name found, skipping...")
+        return details
+    details["Name"] = name
+    log_message(f"✓ Found name: {details['Name']}")
+
+    address = _first_valid(lookup, ADDRESS_SELECTORS, valid_address)
+    if address:
+        details["Address"] = address
+        log_message(f"✓ Found address: {details['Address']}")
+
+    phone = _first_valid(lookup, PHONE_SELECTORS, valid_phone)
+    if phone:
+        details["Phone"] = phone
+        details["Has_Contact_Info"] = True
+        log_message(f"✓ Found phone: {details['Phone']}")
+
+    rating_text = _first_present(lookup, RATING_SELECTORS)
+    if rating_text and rating_text.strip():
+        details["Rating"] = valid_rating(rating_text) or "N/A"
+
+    reviews_text = _first_present(lookup, REVIEWS_SELECTORS)
+    if reviews_text and reviews_text.strip():
+        details["Reviews"] = clean_text(reviews_text)
+        count = parse_reviews_count(details["Reviews"])
+        if count is not None:
+            details["Reviews_Count"] = count
+            details["Has_Sufficient_Reviews"] = count >= 25
+
+    website_text = lookup(WEBSITE_SELECTOR)
+    if website_text is not None:
+        if website_text.strip():
+            details["Website"] = valid_website_text(website_text) or "N/A"
+    else:
+        details["Website"] = valid_website_href(href_lookup(WEBSITE_LINK_SELECTOR)) or "N/A"
+
+    category_text = lookup(CATEGORY_SELECTOR)
+    if category_text and category_text.strip():
+        details["Category"] = valid_category(category_text) or "N/A"
+
+    return details
+
+
+def extract_details_js(driver, url):
+    """Extract every field with one injected script: a single WebDriver round trip."""
+    page = driver.execute_script(EXTRACT_DETAILS_JS, TEXT_SELECTORS, HREF_SELECTORS) or {}
+    texts = page.get("texts") or {}
+    hrefs = page.get("hrefs") or {}
+    return resolve_details(url, texts.get, hrefs.get)
+
+
+def compare_details(xpath_details, js_details):
+    """Fields on which the two extraction modes disagree, as {field: (xpath, js)}."""
+    return {
+        field: (xpath_details.get(field), js_details.get(field))
+        for field in xpath_details
+        if xpath_details.get(field) != js_details.get(field)
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+# ----------------------------------------------------------------------
+# Feed-card harvesting
+# ----------------------------------------------------------------------
+
+HARVEST_MODES = ("detail", "cards")
+
+# Fields a card can provide; the per-task field policy may require any of them
+CARD_FIELDS = ("Name", "Address", "Phone", "Rating", "Reviews", "Website", "Category")
+
+# Reads every rendered result card of div[role='feed'] in one pass
+HARVEST_CARDS_JS = """
+const cards = [];
+const anchors = document.querySelectorAll("div[role='feed'] a[href*='/maps/place/']");
+for (const anchor of anchors) {
+    const card = anchor.closest('div.Nv2PK') || anchor.parentElement;
+    if (!card) continue;
+    const text = (selector) => {
+        const node = card.querySelector(selector);
+        return node ? (node.innerText || node.textContent || '') : null;
+    };
+    const website = card.querySelector("a[data-value='Website'], a[aria-label*='website' i]");
+    const rows = Array.from(card.querySelectorAll('.W4Efsd'))
+        .filter((row) => !row.querySelector('.W4Efsd'))
+        .map((row) => row.innerText || row.textContent || '');
+    cards.push({
+        url: anchor.href,
+        name: anchor.getAttribute('aria-label') || text('.qBF1Pd'),
+        rating: text('span.MW4etd'),
+        reviews: text('span.UY7F9'),
+        phone: text('span.UsdlK'),
+        website: website ? website.href : null,
+        rows: rows,
+    });
+}
+return cards;
+"""
+
+
+def valid_card_address(text):
+    address_text = clean_text(text)
+    if address_text and len(address_text) >= 5 and any(char.isdigit() or char == ',' for char in address_text):
+        return address_text
+    return None
+
+
+def _card_segments(row):
+    return [clean_text(part) for part in row.split("·") if clean_text(part) not in ("", "N/A")]
+
+
+def card_details(card):
+    """Turn one raw harvested card into a details dict, applying the usual field rules."""
+    details = empty_details(card.get("url"))
+
+    name = valid_name(card.get("name") or "")
+    if not name:
+        return details
+    details["Name"] = name
+
+    rating = card.get("rating")
+    if rating and rating.strip():
+        details["Rating"] = valid_rating(rating) or "N/A"
+
+    reviews = card.get("reviews")
+    if reviews and reviews.strip():
+        details["Reviews"] = clean_text(reviews)
+        count = parse_reviews_count(details["Reviews"])
+        if count is not None:
+            details["Reviews_Count"] = count
+            details["Has_Sufficient_Reviews"] = count >= 25
+
+    phone = valid_phone(card.get("phone") or "")
+    if phone:
+        details["Phone"] = phone
+        details["Has_Contact_Info"] = True
+
+    website = valid_website_href(card.get("website"))
+    if website:
+        details["Website"] = website
+
+    # Info rows look like "Category · $$ · Address" and "Open · Closes 10 PM · Phone";
+    # the first row without the rating holds category and address
+    for row in card.get("rows") or []:
+        segments = _card_segments(row)
+        if not segments or segments[0].startswith(details["Rating"]):
+            continue
+        category = valid_category(segments[0])
+        if category and not any(char.isdigit() for char in category):
+            details["Category"] = category
+            address = valid_card_address(segments[-1]) if len(segments) > 1 else None
+            if address:
+                details["Address"] = address
+            break
+
+    return details
+
+
+def harvest_cards(driver):
+    """All result cards currently rendered in the feed, as details dicts."""
+    cards = driver.execute_script(HARVEST_CARDS_JS) or []
+    return [card_details(card) for card in cards if card.get("url")]
+
+
+def parse_field_policy(value):
+    """Comma-separated required fields -> tuple of known card fields (Name is always required)."""
+    fields = [field.strip() for field in (value or "").split(",") if field.strip()]
+    by_lower = {field.lower(): field for field in CARD_FIELDS}
+    policy = ["Name"]
+    for field in fields:
+        known = by_lower.get(field.lower())
+        if known and known not in policy:
+            policy.append(known)
+    return tuple(policy)
+
+
+def missing_fields(details, policy):
+    return [field for field in policy if details.get(field, "N/A") == "N/A"]
+
+
+def merge_details(card, detail):
+    """Fill fields the card could not provide from the detail page extraction."""
+    merged = dict(card)
+    for field, value in detail.items():
+        if merged.get(field) in ("N/A", 0, False, None) and value not in ("N/A", None):
+            merged[field] = value
+    merged["Google Maps Link"] = card.get("Google Maps Link") or detail.get("Google Maps Link")
+    return merged
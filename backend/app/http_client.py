@@ -0,0 +1,124 @@
+import os
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def _never_sent(error):
+    """True when the connection failed before any bytes of the request were sent."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class HttpClient:
+    """
+    Keep-alive HTTP client with one pooled session per host.
+
+    Idempotent calls are retried with exponential backoff on connection
+    errors, timeouts and 429/502/503/504. Other calls are only retried when
+    the connection could not be opened, so a request is never sent twice.
+    Every call is counted per endpoint (method, host and path).
+    """
+
+    def __init__(self, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 retries=HTTP_RETRIES, backoff=HTTP_BACKOFF_SECONDS, pool_size=HTTP_POOL_SIZE):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _session(self, url):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _record(self, endpoint, elapsed, error, retries):
+        with self._lock:
+            entry = self._stats.setdefault(
+                endpoint, {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["retries"] += retries
+            entry["total_ms"] += elapsed * 1000
+            entry["max_ms"] = max(entry["max_ms"], elapsed * 1000)
+
+    def request(self, method, url, idempotent=None, timeout=None, **kwargs):
+        """
+        Send a request through the host's pooled session; raises the last
+        error once retries are exhausted.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        parts = urlsplit(url)
+        endpoint = f"{method} {parts.netloc}{parts.path}"
+        session = self._session(url)
+        timeout = timeout or self.timeout
+
+        start = time.time()
+        attempt = 0
+        while True:
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+                retryable = idempotent and response.status_code in RETRY_STATUSES
+                if not retryable or attempt >= self.retries:
+                    self._record(endpoint, time.time() - start, response.status_code >= 400, attempt)
+                    return response
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.retries or not (idempotent or _never_sent(e)):
+                    self._record(endpoint, time.time() - start, True, attempt)
+                    raise
+            attempt += 1
+            time.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            stats = {endpoint: dict(entry) for endpoint, entry in self._stats.items()}
+        for entry in stats.values():
+            entry["avg_ms"] = round(entry["total_ms"] / entry["calls"], 1) if entry["calls"] else 0.0
+            entry["total_ms"] = round(entry["total_ms"], 1)
+            entry["max_ms"] = round(entry["max_ms"], 1)
+        return stats
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
+# Shared client for all outbound calls of the backend
+http = HttpClient()
@@ -1,28 +1,43 @@
-from fastapi import FastAPI, File, UploadFile, Form
+from fastapi import FastAPI, File, UploadFile, Form, Request
 from fastapi.responses import StreamingResponse
-import pandas as pd
+import numpy as np
+import asyncio
 import time
 import threading
-import re
 from selenium_stealth import stealth
-from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, WebDriverException
 import os
-import requests
 import json
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import traceback
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import datetime
-import random
-import requests
-from .utils import calculate_boundary_points, fetch_inscriber_tiles, apply_center_offset
+from .utils import calculate_boundary_points, csv_coordinate_columns, read_csv_centers
+from .planner import plan_targets
+from .task_store import TaskStore
+from .city_index import CityIndex
+from .tile_plans import TilePlanCache, InscriberUnavailable, parse_inscriber_tiles
+from .http_client import HTTP_CONNECT_TIMEOUT, http
+from .crud_writer import CrudWriter, RejectedBatch
+from .sharding import SharedTaskState, resolve_worker_count, run_sharded
+from .scheduler import Scheduler
+from .broker import WorkBroker
+from .extraction import parse_field_policy
+from .waits import (
+    WaitEngine, all_of, detail_title, detail_title_changed, feed_count,
+    feed_count_at_least, feed_count_greater, url_changed,
+)
+from .scraper import (
+    BASE_DIR, STATE_DIR, BROKER_PATH, BROKER_MAX_ATTEMPTS, DRIVER_POOL_SIZE, MAPS_BASE_URL,
+    CARD_REQUIRED_FIELDS, COVERAGE_ROOT_ZOOM, driver_pool, extract_restaurant_details,
+    resolve_extraction_mode, resolve_harvest_mode, _scrape_coordinate, _scrape_location_point,
+    _split_saturated_tile,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +57,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from their Content-Length, before the body is read."""
+    if request.method == "POST" and request.url.path.rstrip("/") == "/upload":
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+            return JSONResponse(status_code=413, content={"error": f"Upload exceeds {MAX_UPLOAD_MB} MB"})
+    return await call_next(request)
+
 tasks = {}
 
 def log_message(message):
@@ -51,576 +75,41 @@ def log_message(message):
     print(log_entry)
     logger.info(log_entry)
 
-def smart_sleep(min_sec=5, max_sec=8, reason=""):  # REDUCED default sleep times
-    delay = random.uniform(min_sec, max_sec)
-    log_message(f"⏳ Sleeping for {delay:.2f}s {reason}")
-    time.sleep(delay)
-
-def clean_text(text):
-    """Clean and sanitize text extracted from the webpage"""
-    if text:
-        text = re.sub(r"[^\x20-\x7E]", "", text)
-        return text.strip()
-    return "N/A"
-
-def safe_find_element(driver, by, value, timeout=10):
-    """Safely find element with retry logic and better error handling"""
-    try:
-        element = WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((by, value))
-        )
-        return element
-    except TimeoutException:
-        log_message(f"Timeout waiting for element: {value}")
-        return None
-    except Exception as e:
-        log_message(f"Error finding element {value}: {e}")
-        return None
-
-def safe_find_elements(driver, by, value, timeout=10):
-    """Safely find elements with retry logic and better error handling"""
-    try:
-        WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((by, value))
-        )
-        return driver.find_elements(by, value)
-    except TimeoutException:
-        log_message(f"Timeout waiting for elements: {value}")
-        return []
-    except Exception as e:
-        log_message(f"Error finding elements {value}: {e}")
-        return []
-
-def init_driver():
-    """Initializes and returns a Selenium WebDriver instance with improved error handling."""
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-web-security")
-    options.add_argument("--disable-features=VizDisplayCompositor")
-    options.add_argument("--no-first-run")
-    options.add_argument("--disable-default-apps")
-    options.add_argument("--remote-debugging-port=9222")
-    
-    # ADDITIONAL PERFORMANCE OPTIMIZATIONS
-    options.add_argument("--disable-images")  # Disable image loading for faster performance
-    # Keep JavaScript enabled to ensure Maps UI loads fully
-    options.add_argument("--disable-plugins")
-    options.add_argument("--disable-java")
-    options.add_argument("--disable-background-timer-throttling")
-    options.add_argument("--disable-backgrounding-occluded-windows")
-    options.add_argument("--disable-renderer-backgrounding")
-    
-    # Enhanced user agent rotation
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    ]
-    options.add_argument(f"--user-agent={random.choice(user_agents)}")
-    
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("useAutomationExtension", False)
-    options.add_argument("--disable-logging")
-    options.add_argument("--log-level=3")
-    
-    # Enhanced memory and performance optimizations
-    options.add_argument("--memory-pressure-off")
-    options.add_argument("--max_old_space_size=8192")  # INCREASED memory
-    options.add_argument("--aggressive-cache-discard")
-
-    log_message("🌐 Setting up Chrome driver...")
-
-    try:
-        # from webdriver_manager.chrome import ChromeDriverManager
-        # from selenium.webdriver.chrome.service import Service as ChromeService
-
-        # log_message("🔄 Using WebDriver Manager to get compatible chromedriver...")
-        # service = ChromeService(ChromeDriverManager().install())
-        # driver = webdriver.Chrome(service=service, options=options)
-        from selenium.webdriver.chrome.service import Service as ChromeService
-
-        log_message("🔄 Using pre-installed chromedriver in container...")
-        service = ChromeService(executable_path="/usr/bin/chromedriver")
-        driver = webdriver.Chrome(service=service, options=options)
-
-
-        # Enhanced anti-detection
-        driver.execute_script("""
-            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-            Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-            Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
-            Object.defineProperty(navigator, 'permissions', {get: () => ({query: () => Promise.resolve({state: 'granted'})})});
-        """)
-        
-        try:
-            from selenium_stealth import stealth
-            stealth(driver,
-                    languages=["en-US", "en"],
-                    vendor="Google Inc.",
-                    platform="Win32",
-                    webgl_vendor="Intel Inc.",
-                    renderer="Intel Iris OpenGL Engine",
-                    fix_hairline=True,
-                    )
-            log_message("✓ Stealth mode applied successfully")
-        except ImportError:
-            log_message("⚠️ selenium-stealth not installed, using basic anti-detection")
-        
-        log_message("✓ Chrome driver created successfully with WebDriver Manager")
-        return driver
-    except Exception as e:
-        log_message(f"ℹ️ WebDriver Manager approach failed: {e}")
-        log_message("🔄 Trying direct ChromeDriver creation...")
-
-        try:
-            driver = webdriver.Chrome(options=options)
-            # Same enhanced anti-detection code here
-            driver.execute_script("""
-                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-                Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
-            """)
-            
-            try:
-                from selenium_stealth import stealth
-                stealth(driver,
-                        languages=["en-US", "en"],
-                        vendor="Google Inc.",
-                        platform="Win32",
-                        webgl_vendor="Intel Inc.",
-                        renderer="Intel Iris OpenGL Engine",
-                        fix_hairline=True,
-                        )
-                log_message("✓ Stealth mode applied successfully")
-            except ImportError:
-                log_message("⚠️ selenium-stealth not installed, using basic anti-detection")
-            
-            log_message("✓ Chrome driver created successfully")
-            return driver
-        except Exception as e:
-            log_message(f"❌ Direct ChromeDriver creation failed: {e}")
-            return None
-
-def extract_restaurant_details(driver, url, task_id):
-    """Extract details from the restaurant page currently open in the driver"""
-    details = {
-        "Google Maps Link": url,
-        "Name": "N/A",
-        "Address": "N/A",
-        "Phone": "N/A",
-        "Rating": "N/A",
-        "Reviews": "N/A",
-        "Reviews_Count": 0,
-        "Plus Code": "N/A",
-        "Website": "N/A",
-        "Category": "N/A",
-        "Hours": "N/A",
-        "Has_Multiple_Locations": False,
-        "Has_Contact_Info": False,
-        "Has_Sufficient_Reviews": False,
-        "Has_Working_Hours": False
-    }
+# Browsers one task may ask for; the driver pool is shared by every running task
+MAX_WORKERS_PER_TASK = int(os.getenv("MAX_WORKERS_PER_TASK", str(DRIVER_POOL_SIZE)))
 
+def scrape_Maps_location(task_id, keyword, country, city, final_points_json, workers=1):
+    """Scrape Google Maps for businesses in a specific location with improved error handling"""
+    state = SharedTaskState(tasks[task_id], waits=WaitEngine(), store=task_store, task_id=task_id,
+                            on_result=lambda business_data: stream_result_to_crud(task_id, business_data))
     try:
-        # Wait for page to be fully loaded with better conditions
-        WebDriverWait(driver, 20).until(
-            EC.any_of(
-                EC.presence_of_element_located((By.XPATH, "//h1[contains(@class, 'DUwDvf')]")),
-                EC.presence_of_element_located((By.XPATH, "//div[@data-value='Title']")),
-                EC.presence_of_element_located((By.XPATH, "//h1[@data-attrid='title']"))
-            )
-        )
-
-        # Extract name with improved validation
-        name_selectors = [
-            "//h1[contains(@class, 'DUwDvf') and not(contains(@class, 'review'))]",
-            "//h1[@data-attrid='title']",
-            "//div[@data-value='Title']//span[not(contains(text(), 'Results')) and not(contains(text(), 'reviews'))]",
-            "//h1[not(contains(text(), 'Results')) and not(contains(text(), 'Map data'))]"
-        ]
-        
-        for selector in name_selectors:
-            try:
-                name_elem = driver.find_element(By.XPATH, selector)
-                if name_elem and name_elem.text.strip():
-                    name_text = clean_text(name_elem.text)
-                    # Validate that it's not a generic result
-                    if (name_text and 
-                        name_text.lower() not in ['results', 'map data', 'google', 'maps'] and
-                        len(name_text) > 2 and
-                        not name_text.isdigit()):
-                        details["Name"] = name_text
-                        log_message(f"✓ Found name: {details['Name']}")
-                        break
-            except:
-                continue
+        def handle_point(driver, index, point):
+            _scrape_location_point(driver, state, keyword, country, city,
+                                   point["latitude"], point["longitude"])
 
-        # If no valid name found, this is likely not a business page
-        if details["Name"] == "N/A":
-            log_message("❌ No valid business name found, skipping...")
-            return details
-
-        # Extract address with better validation
-        address_selectors = [
-            "//button[@data-item-id='address']//div[contains(@class, 'fontBodyMedium')]",
-            "//div[@data-value='Address']//span[contains(text(), ',')]",
-            "//button[contains(@aria-label, 'Address')]//div[contains(text(), ',')]",
-            "//div[contains(@class, 'Io6YTe') and contains(text(), ',') and not(contains(text(), 'reviews'))]"
-        ]
+        if not run_sharded(driver_pool, final_points_json, handle_point, workers, state):
+            log_message("❌ Failed to initialize driver")
+            tasks[task_id]["error"] = "Failed to initialize web driver"
+            return
         
-        for selector in address_selectors:
-            try:
-                address_elem = driver.find_element(By.XPATH, selector)
-                if address_elem and address_elem.text.strip():
-                    address_text = clean_text(address_elem.text)
-                    # Validate address format
-                    if address_text and ',' in address_text and len(address_text) > 10:
-                        details["Address"] = address_text
-                        log_message(f"✓ Found address: {details['Address']}")
-                        break
-            except:
-                continue
-
-        # Extract phone with strict validation
-        phone_selectors = [
-            "//button[@data-item-id='phone:tel:']//div[contains(@class, 'fontBodyMedium')]",
-            "//button[contains(@aria-label, 'Phone')]//div[contains(text(), '+') or contains(text(), '(')]",
-            "//a[starts-with(@href, 'tel:')]",
-            "//span[contains(text(), '+') and (contains(text(), '-') or contains(text(), ' '))]"
-        ]
+        log_message(f"🎉 Scraping completed! Found {len(state.results)} businesses")
         
-        for selector in phone_selectors:
-            try:
-                phone_elem = driver.find_element(By.XPATH, selector)
-                if phone_elem and phone_elem.text.strip():
-                    phone_text = clean_text(phone_elem.text)
-                    # Strict phone validation
-                    if (phone_text and 
-                        (phone_text.startswith('+') or phone_text.startswith('(')) and
-                        any(char.isdigit() for char in phone_text) and
-                        len(phone_text) >= 8 and
-                        not phone_text.lower().startswith('0  26k')):  # Filter out the problematic pattern
-                        details["Phone"] = phone_text
-                        details["Has_Contact_Info"] = True
-                        log_message(f"✓ Found phone: {details['Phone']}")
-                        break
-            except:
-                continue
-
-        # Extract rating with validation
-        try:
-            rating_elem = driver.find_element(By.XPATH, "//div[contains(@class, 'F7nice')]//span[@aria-hidden='true' and string-length(text()) <= 3]")
-            if rating_elem and rating_elem.text.strip():
-                rating_text = clean_text(rating_elem.text)
-                try:
-                    # Validate it's a number between 1-5
-                    rating_float = float(rating_text)
-                    if 1.0 <= rating_float <= 5.0:
-                        details["Rating"] = rating_text
-                except ValueError:
-                    pass
-        except:
-            try:
-                rating_elem = driver.find_element(By.XPATH, "//span[@class='MW4etd']")
-                if rating_elem and rating_elem.text.strip():
-                    rating_text = clean_text(rating_elem.text)
-                    try:
-                        rating_float = float(rating_text)
-                        if 1.0 <= rating_float <= 5.0:
-                            details["Rating"] = rating_text
-                    except ValueError:
-                        pass
-            except:
-                pass
-
-        # Extract reviews count with validation
-        try:
-            reviews_elem = driver.find_element(By.XPATH, "//div[contains(@class, 'F7nice')]//span[contains(text(), '(') and contains(text, ')') and contains(text(), 'review')]")
-            if not reviews_elem:
-                reviews_elem = driver.find_element(By.XPATH, "//span[contains(text(), '(') and contains(text(), ')') and (contains(text(), 'review') or text()[matches(., '\\([0-9,]+\\)')])]")
-            
-            if reviews_elem and reviews_elem.text.strip():
-                reviews_text = clean_text(reviews_elem.text)
-                details["Reviews"] = reviews_text
-                
-                # Extract number from parentheses with validation
-                import re
-                numbers = re.findall(r'\(([0-9,]+)\)', reviews_text)
-                if numbers:
-                    try:
-                        count = int(numbers[0].replace(',', ''))
-                        if 0 <= count <= 1000000:  # Reasonable range
-                            details["Reviews_Count"] = count
-                            details["Has_Sufficient_Reviews"] = count >= 25
-                    except ValueError:
-                        pass
-        except:
-            pass
-
-        # Extract website with validation
-        try:
-            website_elem = driver.find_element(By.XPATH, "//a[@data-item-id='authority']//div[contains(@class, 'fontBodyMedium')]")
-            if website_elem and website_elem.text.strip():
-                website_text = clean_text(website_elem.text)
-                if website_text and not website_text.startswith('google.'):
-                    details["Website"] = website_text
-        except:
-            try:
-                website_link = driver.find_element(By.XPATH, "//a[contains(@href, 'http') and not(contains(@href, 'google.com')) and not(contains(@href, 'maps'))]")
-                if website_link:
-                    href = website_link.get_attribute("href")
-                    if href and not href.startswith('https://www.google.'):
-                        details["Website"] = href
-            except:
-                pass
-
-        # Extract category/business type
-        try:
-            category_elem = driver.find_element(By.XPATH, "//button[contains(@class, 'DkEaL')]//span")
-            if category_elem and category_elem.text.strip():
-                category_text = clean_text(category_elem.text)
-                if category_text and len(category_text) < 50:
-                    details["Category"] = category_text
-        except:
-            pass
-
     except Exception as e:
-        log_message(f"❌ Error extracting details: {e}")
-    
-    return details
-
-def scrape_Maps_location(task_id, keyword, country, city, final_points_json):
-    """Scrape Google Maps for businesses in a specific location with improved error handling"""
-    for point in final_points_json:
-        lat = point["latitude"]
-        lon = point["longitude"]
-
-        driver = None
-        try:
-            driver = init_driver()
-            if not driver:
-                log_message("❌ Failed to initialize driver")
-                tasks[task_id]["running"] = False
-                tasks[task_id]["error"] = "Failed to initialize web driver"
-                return
-
-            search_query = f"{keyword} in {lat}, {lon}, {city}, {country}"
-            maps_url = f"https://www.google.com/maps/search/{search_query.replace(' ', '+')}"
-            
-            log_message(f"🔍 Searching for: {search_query}")
-
-            # Load the search page
-            driver.get(maps_url)
-            smart_sleep(8, 12, "for initial page load")
-
-            # Wait for results with multiple attempts
-            results_loaded = False
-            for attempt in range(5):
-                try:
-                    selectors_to_try = [
-                        "//div[@role='feed']",
-                        "//div[@aria-label='Results for']",
-                        "//div[contains(@class, 'Nv2PK')]",
-                        "//div[@data-result-index]"
-                    ]
-                    
-                    for selector in selectors_to_try:
-                        try:
-                            WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.XPATH, selector))
-                            )
-                            results_loaded = True
-                            log_message(f"✓ Found results with selector: {selector}")
-                            break
-                        except:
-                            continue
-                    
-                    if results_loaded:
-                        break
-                        
-                    log_message(f"Attempt {attempt + 1}/5 failed, retrying...")
-                    time.sleep(5)
-                    
-                except Exception as e:
-                    log_message(f"Attempt {attempt + 1} error: {e}")
-
-            if not results_loaded:
-                log_message("❌ Could not find any results")
-                tasks[task_id]["error"] = "No results found"
-                tasks[task_id]["running"] = False
-                return
-
-            # Process results with improved selectors
-            results = []
-            processed_urls = set()
-            
-            # INCREASED SCROLLING - Scroll and collect results
-            for scroll_attempt in range(50):  # INCREASED from 10 to 50
-                if not tasks.get(task_id, {}).get("running", False):
-                    break
-                    
-                # Find all clickable result items
-                result_items = []
-                
-                # Try multiple selectors to find result items
-                item_selectors = [
-                    "//div[@role='feed']//a[contains(@href, '/maps/place/')]",
-                    "//div[contains(@class, 'Nv2PK')]//a[contains(@href, '/maps/place/')]",
-                    "//a[contains(@href, '/maps/place/')]"
-                ]
-                
-                for selector in item_selectors:
-                    try:
-                        items = driver.find_elements(By.XPATH, selector)
-                        if items:
-                            result_items = items
-                            break
-                    except:
-                        continue
-                
-                if not result_items:
-                    log_message("No result items found, trying to scroll more...")
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(3)
-                    continue
-                
-                log_message(f"Found {len(result_items)} potential results")
-                
-                # INCREASED PROCESSING - Process each result
-                for item in result_items[:15]:  # INCREASED from 5 to 15 per scroll
-                    if not tasks.get(task_id, {}).get("running", False):
-                        break
-                        
-                    try:
-                        url = item.get_attribute("href")
-                        if not url or url in processed_urls:
-                            continue
-                        
-                        processed_urls.add(url)
-                        
-                        # Click and extract details
-                        driver.execute_script("arguments[0].scrollIntoView(true);", item)
-                        time.sleep(2)
-                        
-                        item.click()
-                        smart_sleep(5, 8, "for business page to load")
-                        
-                        # Extract details
-                        details = extract_restaurant_details(driver, url, task_id)
-                        
-                        if details["Name"] != "N/A":
-                            business_data = {
-                                "Name": details["Name"],
-                                "Address": details["Address"],
-                                "Phone": details["Phone"],
-                                "Website": details["Website"],
-                                "URL": url,
-                                "City": city,
-                                "Country": country,
-                                "Rating": details["Rating"],
-                                "Reviews": details["Reviews"],
-                                "Reviews_Count": details["Reviews_Count"],
-                                "Plus Code": details["Plus Code"],
-                                "Category": details["Category"],
-                                "Hours": details["Hours"],
-                                "Has_Multiple_Locations": details["Has_Multiple_Locations"],
-                                "Has_Contact_Info": details["Has_Contact_Info"],
-                                "Has_Sufficient_Reviews": details["Has_Sufficient_Reviews"],
-                                "Has_Working_Hours": details["Has_Working_Hours"],
-                            }
-                            
-                            results.append(business_data)
-                            tasks[task_id]["results"] = results
-                            tasks[task_id]["progress"] = len(results)
-                            
-                            log_message(f"✅ Processed: {details['Name']} (Total: {len(results)})")
-                        
-                        # Go back to results
-                        driver.back()
-                        smart_sleep(3, 5, "after going back")
-                        
-                    except Exception as e:
-                        log_message(f"❌ Error processing result: {e}")
-                        continue
-                
-                # Enhanced scrolling strategy
-                try:
-                    # Multiple scroll techniques
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(2)
-                    
-                    # Try scrolling the results panel specifically
-                    feed_element = driver.find_element(By.XPATH, "//div[@role='feed']")
-                    driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed_element)
-                    time.sleep(2)
-                    
-                    # Check if we've reached the end
-                    current_height = driver.execute_script("return document.body.scrollHeight")
-                    if scroll_attempt > 0:
-                        if hasattr(scrape_Maps_location, 'last_height') and current_height == scrape_Maps_location.last_height:
-                            no_new_content_count = getattr(scrape_Maps_location, 'no_new_content_count', 0) + 1
-                            scrape_Maps_location.no_new_content_count = no_new_content_count
-                            if no_new_content_count >= 5:  # Stop if no new content for 5 scrolls
-                                log_message("No new content found, stopping scroll")
-                                break
-                        else:
-                            scrape_Maps_location.no_new_content_count = 0
-                    scrape_Maps_location.last_height = current_height
-                    
-                except Exception as e:
-                    log_message(f"Error during scrolling: {e}")
-                    break
-            
-            log_message(f"🎉 Scraping completed! Found {len(results)} businesses")
-            
-        except Exception as e:
-            log_message(f"❌ Critical error: {e}")
-            log_message(f"❌ Traceback: {traceback.format_exc()}")
-            tasks[task_id]["error"] = str(e)
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-            tasks[task_id]["running"] = False
-            log_message(f"Task {task_id} completed with {len(tasks[task_id].get('results', []))} results")
+        log_message(f"❌ Critical error: {e}")
+        log_message(f"❌ Traceback: {traceback.format_exc()}")
+        tasks[task_id]["error"] = str(e)
+    finally:
+        tasks[task_id]["wait_stats"] = state.waits.log_summary(task_id)
+        tasks[task_id]["running"] = False
+        _finish_task(task_id)
+        log_message(f"Task {task_id} completed with {len(tasks[task_id].get('results', []))} results")
 
-def get_city_coordinates(country: str, city: str):
-    try:
-        country_files = {f.lower(): f for f in os.listdir(JSON_FOLDER) if f.endswith(".json")}
-        country_filename = country.lower() + ".json"
-        if country_filename not in country_files:
-            return None
-        file_path = os.path.join(JSON_FOLDER, country_files[country_filename])
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for entry in data:
-            if entry.get("ASCII Name", "").lower() == city.lower():
-                try:
-                    coords = float(entry.get("latitude")), float(entry.get("longitude"))
-                    log_message(f"📍 Found coordinates for {city}, {country}: {coords}")
-                    return coords
-                except Exception:
-                    return None
-        log_message(f"⚠️ City {city} not found in file {country_filename}")
-        return None
-    except Exception:
-        log_message(f"⚠️ Error reading city data for {country}: {traceback.format_exc()}")
-        return None
-    
 def scrape_Maps(task_id, location_data, keyword):
     """Scrape Google Maps for businesses across multiple locations with improved error handling"""
-    driver = None
+    lease = None
     try:
-        driver = init_driver()
+        lease = driver_pool.acquire()
+        driver = lease.driver if lease else None
         if not driver:
             log_message("❌ Failed to initialize driver")
             tasks[task_id]["running"] = False
@@ -630,20 +119,28 @@ def scrape_Maps(task_id, location_data, keyword):
         results = []
         total_processed = 0
         global_processed_urls = set()
+        waits = WaitEngine()
 
         for idx, (postal_code, city, country) in enumerate(location_data):
             if not tasks.get(task_id, {}).get("running", False):
                 log_message(f"Task {task_id} canceled. Exiting scraping process.")
                 break
 
+            # Between locations nothing is open in the browser, so a worn-out one can be swapped
+            lease = driver_pool.refresh(lease)
+            if not lease:
+                tasks[task_id]["error"] = "Failed to restart web driver"
+                break
+            driver = lease.driver
+
             search_query = f"{keyword} in {postal_code}, {city}, {country}"
-            maps_url = f"https://www.google.com/maps/search/{search_query.replace(' ', '+')}"
+            maps_url = f"{MAPS_BASE_URL}/search/{search_query.replace(' ', '+')}"
             
             log_message(f"🔍 Processing location {idx + 1}/{len(location_data)}: {postal_code}, {city}, {country}")
 
             try:
                 driver.get(maps_url)
-                smart_sleep(8, 12, "for search results to load")
+                waits.until(driver, feed_count_at_least(1), "results", budget=10.0)
 
                 # Wait for results with multiple attempts
                 results_loaded = False
@@ -669,7 +166,7 @@ def scrape_Maps(task_id, location_data, keyword):
                             break
                             
                         log_message(f"Attempt {attempt + 1}/3 failed, retrying...")
-                        time.sleep(3)
+                        waits.until(driver, feed_count_at_least(1), "results", budget=3.0)
                         
                     except Exception as e:
                         log_message(f"Attempt {attempt + 1} error: {e}")
@@ -692,7 +189,7 @@ def scrape_Maps(task_id, location_data, keyword):
                     if not result_items:
                         log_message("No result items found, scrolling...")
                         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(3)
+                        waits.until(driver, feed_count_at_least(1), "scroll", budget=3.0)
                         continue
                     
                     log_message(f"Found {len(result_items)} potential results for {postal_code}")
@@ -713,12 +210,13 @@ def scrape_Maps(task_id, location_data, keyword):
                             global_processed_urls.add(url)
                             
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", item)
-                            time.sleep(1)
+                            waits.pause("scroll_into_view")
                             
+                            previous_title = detail_title(driver)
                             driver.execute_script("arguments[0].click();", item)
-                            smart_sleep(5, 8, "for business page to load")
+                            waits.until(driver, detail_title_changed(previous_title), "detail")
                             
-                            details = extract_restaurant_details(driver, url, task_id)
+                            details = extract_restaurant_details(driver, url, tasks[task_id].get("extraction_mode"))
                             
                             if (details["Name"] != "N/A" and 
                                 details["Name"].lower() not in ['results', 'map data', 'google'] and
@@ -756,18 +254,15 @@ def scrape_Maps(task_id, location_data, keyword):
                             else:
                                 log_message(f"❌ Invalid business data, skipping: {details['Name']}")
                             
+                            detail_url = driver.current_url
                             driver.back()
-                            smart_sleep(2, 3, "after going back")
-                            
-                            WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.XPATH, "//div[@role='feed']//a[contains(@href, '/maps/place/')]"))
-                            )
+                            waits.until(driver, all_of(url_changed(detail_url), feed_count_at_least(1)), "back")
                             
                         except Exception as e:
                             log_message(f"❌ Error processing result from {postal_code}: {e}")
                             try:
                                 driver.back()
-                                time.sleep(2)
+                                waits.until(driver, feed_count_at_least(1), "back", budget=2.0)
                             except:
                                 pass
                             continue
@@ -779,13 +274,13 @@ def scrape_Maps(task_id, location_data, keyword):
                     
                     # Enhanced scrolling
                     try:
+                        loaded_before = feed_count(driver)
                         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(2)
                         
                         # Try scrolling the results panel
                         feed_element = driver.find_element(By.XPATH, "//div[@role='feed']")
                         driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed_element)
-                        time.sleep(2)
+                        waits.until(driver, feed_count_greater(loaded_before), "scroll", budget=4.0)
                     except:
                         break
                 
@@ -799,26 +294,81 @@ def scrape_Maps(task_id, location_data, keyword):
         
         tasks[task_id]["results"] = results
         tasks[task_id]["progress"] = len(results)
+        tasks[task_id]["wait_stats"] = waits.log_summary(task_id)
 
     except Exception as e:
         log_message(f"❌ Critical error in scraping function: {e}")
         log_message(f"❌ Traceback: {traceback.format_exc()}")
         tasks[task_id]["error"] = str(e)
     finally:
-        if driver:
-            try:
-                driver.quit()
-                log_message("✓ Driver closed successfully")
-            except Exception as e:
-                log_message(f"⚠️ Error closing driver: {e}")
+        if lease:
+            driver_pool.release(lease)
+            log_message("✓ Driver returned to pool")
         
         if task_id in tasks:
             tasks[task_id]["running"] = False
             log_message(f"Task {task_id} completed with {len(tasks[task_id].get('results', []))} results")
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 JSON_FOLDER = os.path.join(BASE_DIR, "data", "countries")
 
+# Task checkpointing; unfinished tasks resume from their checkpoint on startup
+TASK_STORE_ENABLED = os.getenv("TASK_STORE_ENABLED", "true").lower() == "true"
+TASK_STORE_PATH = os.getenv("TASK_STORE_PATH", os.path.join(STATE_DIR, "tasks.sqlite"))
+TASK_RESUME_ON_STARTUP = os.getenv("TASK_RESUME_ON_STARTUP", "true").lower() == "true"
+
+task_store = TaskStore(TASK_STORE_PATH) if TASK_STORE_ENABLED else None
+
+# Task scheduler: prepared tasks queue for SCHEDULER_SLOTS browser slots, shared fairly per email
+# and admitted only while at least SCHEDULER_MIN_FREE_MB of memory is available. Not used when
+# SCRAPE_EXECUTOR=broker: the browsers run in the workers, which share themselves across tasks
+SCHEDULER_SLOTS = int(os.getenv("SCHEDULER_SLOTS", str(DRIVER_POOL_SIZE)))
+SCHEDULER_MIN_FREE_MB = float(os.getenv("SCHEDULER_MIN_FREE_MB", "512"))
+SCHEDULER_MB_PER_BROWSER = float(os.getenv("SCHEDULER_MB_PER_BROWSER", "400"))
+SCHEDULER_DEFAULT_RUNTIME_SECONDS = float(os.getenv("SCHEDULER_DEFAULT_RUNTIME_SECONDS", "600"))
+
+scheduler = Scheduler(
+    SCHEDULER_SLOTS,
+    min_free_mb=SCHEDULER_MIN_FREE_MB,
+    mb_per_browser=SCHEDULER_MB_PER_BROWSER,
+    default_runtime=SCHEDULER_DEFAULT_RUNTIME_SECONDS,
+)
+
+# Scraping executor: "thread" scrapes inside this process; "broker" publishes one work unit per
+# tile to a SQLite broker in STATE_DIR for `python -m app.worker` processes to pick up
+SCRAPE_EXECUTOR = os.getenv("SCRAPE_EXECUTOR", "thread").lower()
+BROKER_POLL_SECONDS = float(os.getenv("BROKER_POLL_SECONDS", "1.0"))
+# Task fields workers need to scrape a unit
+BROKER_PARAM_KEYS = ("keyword", "email", "country", "city", "extraction_mode", "harvest_mode", "required_fields")
+
+broker = WorkBroker(BROKER_PATH, max_attempts=BROKER_MAX_ATTEMPTS) if SCRAPE_EXECUTOR == "broker" else None
+
+# Submission pipeline: CSV parsing, geocoding and tile planning run here, off the event loop
+SUBMISSION_WORKERS = int(os.getenv("SUBMISSION_WORKERS", "4"))
+submission_pool = ThreadPoolExecutor(max_workers=SUBMISSION_WORKERS, thread_name_prefix="submission")
+
+# CSV uploads are spooled to disk in UPLOAD_CHUNK_BYTES pieces and parsed CSV_CHUNK_ROWS rows at a time
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "200"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "100000"))
+
+# Targets closer than this share one Maps search; 0 disables deduplication
+TARGET_DEDUP_KM = float(os.getenv("TARGET_DEDUP_KM", "0.25"))
+
+# Compact city index built from JSON_FOLDER; rebuilt automatically when the files change
+CITY_INDEX_PATH = os.getenv("CITY_INDEX_PATH", os.path.join(STATE_DIR, "city_index.sqlite"))
+city_index = CityIndex(JSON_FOLDER, CITY_INDEX_PATH)
+
+# Tile plans depend only on the radius, so they are cached per quantized radius
+TILE_PLAN_CACHE_PATH = os.getenv("TILE_PLAN_CACHE_PATH", os.path.join(STATE_DIR, "tile_plans.json"))
+TILE_PLAN_CACHE_SIZE = int(os.getenv("TILE_PLAN_CACHE_SIZE", "32"))
+TILE_PLAN_RADIUS_STEP = float(os.getenv("TILE_PLAN_RADIUS_STEP", "0.1"))
+TILE_PLAN_WARM_RADII = [float(r) for r in os.getenv("TILE_PLAN_WARM_RADII", "1,2,5,10").split(",") if r.strip()]
+
+# Progress streaming
+PROGRESS_STREAM_INTERVAL = float(os.getenv("PROGRESS_STREAM_INTERVAL", "1.0"))
+PROGRESS_KEEPALIVE_SECONDS = float(os.getenv("PROGRESS_KEEPALIVE_SECONDS", "15"))
+
 # CRUD/Datacube configuration
 INSCRIBER_URL = os.getenv("INSCRIBER_URL", "http://inscriber:8002/api/geo-query-cube/")
 CRUD_BASE_URL = os.getenv("CRUD_BASE_URL", "")
@@ -827,10 +377,42 @@ CRUD_RESULTS_PATH = os.getenv("CRUD_RESULTS_PATH", "/api/crud")
 CRUD_API_KEY = os.getenv("CRUD_API_KEY", "")
 DATABASE_ID = os.getenv("DATABASE_ID", "")
 CRUD_COLLECTION_NAME = os.getenv("CRUD_COLLECTION_NAME", "map_scraper_data")
+INSCRIBER_READ_TIMEOUT = float(os.getenv("INSCRIBER_READ_TIMEOUT", "300"))
+CRUD_READ_TIMEOUT = float(os.getenv("CRUD_READ_TIMEOUT", "300"))
+# How long task preparation waits for an inscriber that is still loading its index (503)
+INSCRIBER_READY_WAIT_SECONDS = float(os.getenv("INSCRIBER_READY_WAIT_SECONDS", "120"))
+INSCRIBER_READY_POLL_SECONDS = float(os.getenv("INSCRIBER_READY_POLL_SECONDS", "5"))
+
+# Write-behind CRUD persistence: results are queued on disk and flushed in batches
+CRUD_WRITE_BEHIND = os.getenv("CRUD_WRITE_BEHIND", "true").lower() == "true"
+CRUD_OUTBOX_PATH = os.getenv("CRUD_OUTBOX_PATH", os.path.join(STATE_DIR, "crud_outbox.sqlite"))
+CRUD_BATCH_SIZE = int(os.getenv("CRUD_BATCH_SIZE", "50"))
+CRUD_FLUSH_SECONDS = float(os.getenv("CRUD_FLUSH_SECONDS", "5"))
+CRUD_MAX_BACKOFF_SECONDS = float(os.getenv("CRUD_MAX_BACKOFF_SECONDS", "300"))
+# Transient failures after which a queued document is moved to the dead-letter table
+CRUD_MAX_ATTEMPTS = int(os.getenv("CRUD_MAX_ATTEMPTS", "20"))
+# Centers and target coordinates are sent as separate documents of this many points
+CRUD_COORDS_CHUNK = int(os.getenv("CRUD_COORDS_CHUNK", "5000"))
 
 
 def _post_to_crud(path, document):
     """Post a single document to the CRUD API using Api-Key auth."""
+    return _post_documents_to_crud(path, [document])
+
+
+def _post_documents_to_crud(path, documents):
+    """Post a batch of documents in one CRUD insert; True once stored."""
+    try:
+        return _send_documents_to_crud(path, documents)
+    except RejectedBatch:
+        return False
+
+
+def _send_documents_to_crud(path, documents):
+    """
+    Post a batch of documents in one CRUD insert. True once stored, False on
+    a failure worth retrying; raises RejectedBatch when the API refuses it.
+    """
     if not CRUD_BASE_URL or not DATABASE_ID:
         log_message("CRUD config missing; skipping save")
         return False
@@ -841,14 +423,19 @@ def _post_to_crud(path, document):
     payload = {
         "database_id": DATABASE_ID,
         "collection_name": CRUD_COLLECTION_NAME,
-        "data": [document]
+        "data": documents
     }
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=300)
+        resp = http.post(url, json=payload, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, CRUD_READ_TIMEOUT))
         if 200 <= resp.status_code < 300:
             return True
         log_message(f"CRUD POST failed {resp.status_code}: {resp.text}")
+        # Timeouts and rate limits pass; any other client error will fail again
+        if 400 <= resp.status_code < 500 and resp.status_code not in (408, 429):
+            raise RejectedBatch(f"{resp.status_code}: {resp.text[:500]}")
         return False
+    except RejectedBatch:
+        raise
     except Exception as e:
         log_message(f"CRUD POST exception: {e}")
         return False
@@ -868,7 +455,7 @@ def save_coordinates_to_crud(task_id, keyword, mode, centers, bounds, tiles, tar
             "keyword": keyword,
             "email": email,
             "radiusKm": radius_km,
-            "centers": centers,
+            "centerCount": len(centers),
             "bounds": {
                 "top_left": list(bounds[0]) if bounds else None,
                 "top_right": list(bounds[1]) if bounds else None,
@@ -876,14 +463,39 @@ def save_coordinates_to_crud(task_id, keyword, mode, centers, bounds, tiles, tar
                 "bottom_right": list(bounds[3]) if bounds else None,
             },
             "tiles": tiles,
-            "target_coords": target_coords,
+            "targetCount": len(target_coords),
         },
         "email": email,
     }
-    _post_to_crud(CRUD_COORDS_PATH, document)
+    _queue_crud_document(task_id, "session", CRUD_COORDS_PATH, document)
+    _queue_coordinate_chunks(task_id, "centers", centers)
+    _queue_coordinate_chunks(task_id, "target_coords", target_coords)
+
+
+def _queue_coordinate_chunks(task_id, kind, coordinates):
+    """Send a coordinate list as documents of CRUD_COORDS_CHUNK points, keyed by chunk."""
+    chunk_size = max(1, CRUD_COORDS_CHUNK)
+    chunks = max(1, -(-len(coordinates) // chunk_size))
+    for chunk in range(chunks):
+        document = {
+            "sessionId": task_id,
+            "kind": kind,
+            "chunk": chunk,
+            "chunks": chunks,
+            "coordinates": coordinates[chunk * chunk_size:(chunk + 1) * chunk_size],
+        }
+        _queue_crud_document(task_id, f"{kind}:{chunk}", CRUD_COORDS_PATH, document)
+
 
+def _task_centers(task):
+    """Centers of a task as JSON-ready [lat, lon] pairs."""
+    centers = task.get("centers")
+    if centers is not None and len(centers):
+        return np.asarray(centers).tolist()
+    return [list(task["center"])] if task.get("center") else []
 
-def save_results_to_crud(task_id, keyword, results, task_snapshot):
+
+def save_results_to_crud(task_id, keyword, results, task_snapshot, include_items=True):
     now_iso = datetime.datetime.utcnow().isoformat() + "Z"
     urls = [r.get("URL") for r in results if r.get("URL")]
     metadata = {
@@ -891,7 +503,8 @@ def save_results_to_crud(task_id, keyword, results, task_snapshot):
         "keyword": keyword,
         "email": task_snapshot.get("email", ""),
         "radiusKm": task_snapshot.get("radius_km", None),
-        "centers": task_snapshot.get("centers") or ([list(task_snapshot.get("center"))] if task_snapshot.get("center") else []),
+        # The coordinates themselves were sent in chunks when the task started
+        "centerCount": len(_task_centers(task_snapshot)),
         "bounds": {
             "top_left": list(task_snapshot.get("bounds")[0]) if task_snapshot.get("bounds") else None,
             "top_right": list(task_snapshot.get("bounds")[1]) if task_snapshot.get("bounds") else None,
@@ -899,7 +512,7 @@ def save_results_to_crud(task_id, keyword, results, task_snapshot):
             "bottom_right": list(task_snapshot.get("bounds")[3]) if task_snapshot.get("bounds") else None,
         } if task_snapshot.get("bounds") else None,
         "tiles": task_snapshot.get("tiles"),
-        "target_coords": task_snapshot.get("target_coords"),
+        "targetCount": len(task_snapshot.get("target_coords") or []),
         "country": task_snapshot.get("country", ""),
         "city": task_snapshot.get("city", ""),
     }
@@ -909,212 +522,409 @@ def save_results_to_crud(task_id, keyword, results, task_snapshot):
         "updatedAt": now_iso,
         "status": "completed" if not task_snapshot.get("error") else "error",
         "urls": urls,
-        "results": {"items": results},
+        # Streamed tasks already sent every item through the write-behind queue
+        "results": {"items": results} if include_items else {"count": len(results)},
         "metadata": metadata,
         "email": task_snapshot.get("email", ""),
     }
-    _post_to_crud(CRUD_RESULTS_PATH, document)
+    _queue_crud_document(task_id, "summary", CRUD_RESULTS_PATH, document)
+
+
+crud_writer = CrudWriter(
+    CRUD_OUTBOX_PATH,
+    _send_documents_to_crud,
+    batch_size=CRUD_BATCH_SIZE,
+    flush_seconds=CRUD_FLUSH_SECONDS,
+    max_backoff_seconds=CRUD_MAX_BACKOFF_SECONDS,
+    max_attempts=CRUD_MAX_ATTEMPTS,
+) if CRUD_WRITE_BEHIND and CRUD_BASE_URL and DATABASE_ID else None
+
+
+def _queue_crud_document(task_id, key, path, document):
+    """Hand a document to the write-behind queue, or post it off-thread when the queue is off."""
+    if crud_writer:
+        crud_writer.enqueue(task_id, key, path, document)
+    elif CRUD_BASE_URL and DATABASE_ID:
+        threading.Thread(target=_post_to_crud, args=(path, document), daemon=True).start()
+
+
+def stream_result_to_crud(task_id, business_data):
+    """Queue one scraped business; keyed by place URL so it is stored once per task."""
+    if not crud_writer:
+        return
+    task = tasks.get(task_id, {})
+    document = dict(business_data)
+    document.update({
+        "sessionId": task_id,
+        "keyword": task.get("keyword", ""),
+        "email": task.get("email", ""),
+        "scrapedAt": datetime.datetime.utcnow().isoformat() + "Z",
+    })
+    crud_writer.enqueue(task_id, f"place:{business_data.get('URL', '')}", CRUD_RESULTS_PATH, document)
 
 def get_city_coordinates(country: str, city: str):
     try:
-        country_files = {f.lower(): f for f in os.listdir(JSON_FOLDER) if f.endswith(".json")}
-        country_filename = country.lower() + ".json"
-        if country_filename not in country_files:
+        if not city_index.has_country(country):
             return None
-        file_path = os.path.join(JSON_FOLDER, country_files[country_filename])
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for entry in data:
-            if entry.get("ASCII Name", "").lower() == city.lower():
-                try:
-                    coords = float(entry.get("latitude")), float(entry.get("longitude"))
-                    log_message(f"📍 Found coordinates for {city}, {country}: {coords}")
-                    return coords
-                except Exception:
-                    return None
-        log_message(f"⚠️ City {city} not found in file {country_filename}")
+        coords = city_index.coordinates(country, city)
+        if coords:
+            log_message(f"📍 Found coordinates for {city}, {country}: {coords}")
+            return coords
+        log_message(f"⚠️ City {city} not found for {country}")
         return None
     except Exception:
         log_message(f"⚠️ Error reading city data for {country}: {traceback.format_exc()}")
         return None
 
 def fetch_inscriber_tiles(bounds):
+    """
+    Tile offsets for a bbox from the inscriber. Waits up to
+    INSCRIBER_READY_WAIT_SECONDS while it answers 503 (index still loading)
+    and raises InscriberUnavailable if it never answers, so the task fails
+    instead of quietly scraping the bare centre.
+    """
     log_message("🔄 Requesting tiles from inscriber")
+    payload = {
+        "top_left": list(bounds[0]),
+        "top_right": list(bounds[1]),
+        "bottom_left": list(bounds[2]),
+        "bottom_right": list(bounds[3])
+    }
+    deadline = time.time() + INSCRIBER_READY_WAIT_SECONDS
+    while True:
+        try:
+            # The bbox query is read-only, so it is safe to retry
+            resp = http.post(INSCRIBER_URL, json=payload, idempotent=True, timeout=(HTTP_CONNECT_TIMEOUT, INSCRIBER_READ_TIMEOUT))
+        except Exception as e:
+            raise InscriberUnavailable(f"Inscriber request failed: {e}") from e
+        if resp.status_code == 503 and time.time() < deadline:
+            log_message("⏳ Inscriber is still loading its index; retrying")
+            time.sleep(INSCRIBER_READY_POLL_SECONDS)
+            continue
+        if resp.status_code >= 400:
+            raise InscriberUnavailable(f"Inscriber returned {resp.status_code}: {resp.text[:200]}")
+        tiles = parse_inscriber_tiles(resp.json())
+        log_message(f"🧩 Received {len(tiles)} tiles from inscriber")
+        return tiles
+
+tile_plans = TilePlanCache(
+    lambda radius_km: fetch_inscriber_tiles(calculate_boundary_points(radius_km)),
+    path=TILE_PLAN_CACHE_PATH,
+    max_entries=TILE_PLAN_CACHE_SIZE,
+    step=TILE_PLAN_RADIUS_STEP,
+)
+
+def build_target_coordinates(task, centers, relative_tiles, tolerance_km=None):
+    """Plan deduplicated search targets and record how many searches were saved."""
+    if tolerance_km is None:
+        tolerance_km = TARGET_DEDUP_KM
+    targets, stats = plan_targets(centers, relative_tiles, tolerance_km)
+    log_message(
+        f"📐 Planned {stats['targets']} targets from {len(centers)} centers x {len(relative_tiles)} tiles "
+        f"({stats['searches_saved']} overlapping searches saved at {tolerance_km} km)"
+    )
+    task.setdefault("counters", {}).update(stats)
+    return targets.tolist()
+
+def scrape_by_coordinates(task_id, keyword, target_coords, workers=1):
+    state = SharedTaskState(tasks[task_id], waits=WaitEngine(), store=task_store, task_id=task_id,
+                            on_result=lambda business_data: stream_result_to_crud(task_id, business_data))
     try:
-        payload = {
-            "top_left": list(bounds[0]),
-            "top_right": list(bounds[1]),
-            "bottom_left": list(bounds[2]),
-            "bottom_right": list(bounds[3])
-        }
-        resp = requests.post(INSCRIBER_URL, json=payload, timeout=300)
-        resp.raise_for_status()
-        data = resp.json()
-        if isinstance(data, list):
-            tiles = [(float(p[0]), float(p[1])) for p in data]
-            log_message(f"🧩 Received {len(tiles)} tiles (list) from inscriber")
-            return tiles
-        if isinstance(data, dict) and "raw_coordinates" in data:
-            flat = []
-            for block in data["raw_coordinates"]:
-                if isinstance(block, list):
-                    for item in block:
-                        lat = item.get("latitude") if isinstance(item, dict) else (item[0] if isinstance(item, (list, tuple)) and len(item) >= 2 else None)
-                        lon = item.get("longitude") if isinstance(item, dict) else (item[1] if isinstance(item, (list, tuple)) and len(item) >= 2 else None)
-                        if lat is not None and lon is not None:
-                            flat.append((float(lat), float(lon)))
-            log_message(f"🧩 Received {len(flat)} tiles (raw_coordinates) from inscriber")
-            return flat
-        return []
-    except Exception as e:
-        log_message(f"⚠️ Inscriber fetch failed: {e}")
-        return []
-
-def build_target_coordinates(centers, relative_tiles):
-    log_message(f"📐 Building target coordinates: centers={len(centers)}, tiles={len(relative_tiles)}")
-    if not relative_tiles:
-        return centers
-    targets = []
-    for c_lat, c_lon in centers:
-        for d_lat, d_lon in relative_tiles:
-            targets.append((c_lat + d_lat, c_lon + d_lon))
-    return targets
-
-def scrape_by_coordinates(task_id, keyword, target_coords):
-    driver = None
-    try:
-        driver = init_driver()
-        if not driver:
+        def handle_coordinate(driver, idx, coord):
+            # Planned targets are (lat, lon) roots; split tiles carry (lat, lon, zoom, depth)
+            lat, lon = coord[0], coord[1]
+            zoom, depth = (coord[2], coord[3]) if len(coord) > 2 else (COVERAGE_ROOT_ZOOM, 0)
+            loaded = _scrape_coordinate(driver, state, keyword, lat, lon, idx, len(target_coords), zoom)
+            return _split_saturated_tile(state, lat, lon, zoom, depth, loaded)
+
+        if not run_sharded(driver_pool, target_coords, handle_coordinate, workers, state):
             log_message("❌ Failed to initialize driver")
-            tasks[task_id]["running"] = False
             tasks[task_id]["error"] = "Failed to initialize web driver"
             return
 
-        results = []
-        processed_urls = set()
-
-        for idx, (lat, lon) in enumerate(target_coords):
-            if not tasks.get(task_id, {}).get("running", False):
-                break
-            try:
-                maps_url = f"https://www.google.com/maps/search/{requests.utils.quote(keyword)}/@{lat},{lon},14z"
-                log_message(f"🔍 Searching around {lat:.6f},{lon:.6f} ({idx+1}/{len(target_coords)})")
-                driver.get(maps_url)
-                smart_sleep(6, 10, "for results to load")
-
-                loaded = False
-                for _ in range(3):
-                    try:
-                        elements = driver.find_elements(By.XPATH, "//div[@role='feed']//a[contains(@href, '/maps/place/')]")
-                        if len(elements) > 0:
-                            loaded = True
-                            break
-                        time.sleep(2)
-                    except Exception:
-                        time.sleep(2)
-                if not loaded:
-                    continue
-
-                # Aggressively scroll the results feed to load more items
-                try:
-                    feed = driver.find_element(By.XPATH, "//div[@role='feed']")
-                    for _ in range(6):  # increase as needed
-                        driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", feed)
-                        time.sleep(1.2)
-                except Exception:
-                    pass
-
-                items = driver.find_elements(By.XPATH, "//div[@role='feed']//a[contains(@href, '/maps/place/')]")
-                for item in items[:30]:  # process more items per coordinate
-                    if not tasks.get(task_id, {}).get("running", False):
-                        break
-                    try:
-                        url = item.get_attribute("href")
-                        if not url or url in processed_urls:
-                            continue
-                        processed_urls.add(url)
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", item)
-                        time.sleep(1)
-                        driver.execute_script("arguments[0].click();", item)
-                        smart_sleep(4, 7, "for business page to load")
-                        details = extract_restaurant_details(driver, url, task_id)
-                        if details["Name"] != "N/A":
-                            business_data = {
-                                "Name": details["Name"],
-                                "Address": details["Address"],
-                                "Phone": details["Phone"],
-                                "Website": details["Website"],
-                                "URL": url,
-                                "City": "",
-                                "Country": "",
-                                "Rating": details["Rating"],
-                                "Reviews": details["Reviews"],
-                                "Reviews_Count": details["Reviews_Count"],
-                                "Plus Code": details["Plus Code"],
-                                "Category": details["Category"],
-                                "Hours": details["Hours"],
-                                "Has_Multiple_Locations": details["Has_Multiple_Locations"],
-                                "Has_Contact_Info": details["Has_Contact_Info"],
-                                "Has_Sufficient_Reviews": details["Has_Sufficient_Reviews"],
-                                "Has_Working_Hours": details["Has_Working_Hours"],
-                                "Latitude": f"{lat}",
-                                "Longitude": f"{lon}",
-                            }
-                            results.append(business_data)
-                            tasks[task_id]["results"] = results
-                            tasks[task_id]["progress"] = len(results)
-                        driver.back()
-                        smart_sleep(2, 3, "after going back")
-                    except Exception:
-                        try:
-                            driver.back()
-                            time.sleep(1)
-                        except Exception:
-                            pass
-                        continue
-            except Exception as e:
-                log_message(f"❌ Error at coordinate {lat},{lon}: {e}")
-                continue
-
-        log_message(f"🎉 Coordinate-based scraping completed! Total businesses found: {len(results)}")
+        log_message(f"🎉 Coordinate-based scraping completed! Total businesses found: {len(state.results)}")
 
     except Exception as e:
         log_message(f"❌ Critical error in coordinate scraping: {e}")
         tasks[task_id]["error"] = str(e)
     finally:
-        if driver:
-            try:
-                driver.quit()
-                log_message("✓ Driver closed successfully")
-            except Exception:
-                pass
         if task_id in tasks:
+            tasks[task_id]["wait_stats"] = state.waits.log_summary(task_id)
             tasks[task_id]["running"] = False
+            _finish_task(task_id)
             log_message(f"Task {task_id} completed with {len(tasks[task_id].get('results', []))} results")
 
+def collect_broker_task(task_id, kind):
+    """
+    Publish a task to the work broker and mirror what the workers store into
+    the task until every unit is done. Replaces the in-process scrapers when
+    SCRAPE_EXECUTOR=broker; workers keep going while the API restarts.
+    """
+    task = tasks[task_id]
+    state = SharedTaskState(task, store=task_store, task_id=task_id,
+                            on_result=lambda business_data: stream_result_to_crud(task_id, business_data))
+    items = task["target_coords"] if kind == "coordinates" else task["final_points"]
+    try:
+        broker.publish(task_id, kind, {key: task.get(key) for key in BROKER_PARAM_KEYS}, items)
+        log_message(f"📬 Published task {task_id} to the broker as {len(items)} units")
+        cursor = 0
+        while True:
+            # Units are counted before reading results, so a finished count means all results are in
+            counts = broker.unit_counts(task_id)
+            for row_id, url, business_data in broker.results_since(task_id, cursor):
+                cursor = row_id
+                if state.claim_url(url):
+                    state.add_result(business_data)
+            task["units"] = counts
+            task.setdefault("counters", {}).update(broker.counters(task_id))
+            if not task.get("running"):
+                # Interrupted tasks keep their units so workers carry on during a restart
+                if not task.get("interrupted"):
+                    broker.cancel(task_id)
+                return
+            if not counts.get("queued") and not counts.get("leased"):
+                broker.finish(task_id)
+                failed = counts.get("failed", 0)
+                log_message(f"🎉 Broker task {task_id} finished: {len(state.results)} businesses, {failed} failed units")
+                return
+            time.sleep(BROKER_POLL_SECONDS)
+    except Exception as e:
+        log_message(f"❌ Broker collection failed for task {task_id}: {e}")
+        task["error"] = str(e)
+    finally:
+        task["running"] = False
+        _finish_task(task_id)
+
+def _finish_task(task_id):
+    """Record how a task ended; tasks interrupted by shutdown stay resumable."""
+    scheduler.release(task_id)
+    task = tasks.get(task_id)
+    if not task or task.get("interrupted"):
+        return
+    if task.get("cancelled"):
+        status = "cancelled"
+    else:
+        status = "failed" if task.get("error") else "completed"
+    task["stage"] = status
+    save_results_to_crud(task_id, task.get("keyword", ""), task.get("results", []), task,
+                         include_items=crud_writer is None)
+    if not task_store:
+        return
+    try:
+        task_store.finish(task_id, status, task.get("error"))
+    except Exception as e:
+        log_message(f"⚠️ Task store write failed: {e}")
+
+def _run_pipeline(task_id, kind, stages, cleanup=None):
+    """
+    Prepare a submitted task stage by stage on the submission pool, then start
+    scraping. Each stage is a `(name, fn)` pair where `fn(task)` fills in the
+    task; its status and duration are shown in progress under `stages`.
+    `cleanup` runs once preparation ends, however it ends.
+    """
+    try:
+        _run_stages(task_id, kind, stages)
+    finally:
+        if cleanup:
+            cleanup()
+
+def _run_stages(task_id, kind, stages):
+    task = tasks[task_id]
+    for name, stage in stages:
+        if not task.get("running"):
+            log_message(f"🛑 Task {task_id} cancelled before {name}")
+            task["stage"] = "cancelled"
+            return
+        record = {"status": "running"}
+        task.setdefault("stages", {})[name] = record
+        task["stage"] = name
+        start = time.time()
+        try:
+            stage(task)
+        except Exception as e:
+            record.update(status="failed", seconds=round(time.time() - start, 2), error=str(e))
+            task["error"] = str(e)
+            task["running"] = False
+            task["stage"] = "failed"
+            log_message(f"❌ Task {task_id} failed at {name}: {e}")
+            return
+        record.update(status="done", seconds=round(time.time() - start, 2))
+
+    if not task.get("running"):
+        task["stage"] = "cancelled"
+        return
+    try:
+        _start_task(task_id, kind)
+    except Exception as e:
+        task["error"] = f"Failed to start scraping thread: {str(e)}"
+        task["running"] = False
+        task["stage"] = "failed"
+
+def _submit_task(task_id, kind, stages, cleanup=None):
+    tasks[task_id]["stage"] = "queued"
+    submission_pool.submit(_run_pipeline, task_id, kind, stages, cleanup)
+
+def _parse_centers_stage(task, path):
+    centers = read_csv_centers(path, CSV_CHUNK_ROWS)
+    if not len(centers):
+        raise ValueError("CSV contains no valid coordinates")
+    log_message(f"📄 Parsed {len(centers)} centers from upload")
+    task["centers"] = centers
+
+def _plan_coordinates_stage(task):
+    task["bounds"] = calculate_boundary_points(float(task["radius_km"]))
+    task["tiles"] = tile_plans.get(task["radius_km"])
+    # Inscribed targets keep their density; adaptive coverage only adds tiles where a feed saturates
+    task["target_coords"] = build_target_coordinates(task, task["centers"], task["tiles"])
+
+def _geocode_stage(task):
+    center = get_city_coordinates(task["country"], task["city"])
+    if not center:
+        raise ValueError("Could not determine coordinates for selected city")
+    task["center"] = list(center)
+
+def _plan_location_stage(task):
+    # An inscriber failure fails this stage; only a plan that is really empty falls back to the centre
+    tiles = task["tiles"] = tile_plans.get(task["radius_km"])
+    if not tiles:
+        log_message(f"⚠️ Inscriber returned no tiles for {task['radius_km']} km; searching the centre only")
+        tiles = task["tiles"] = [(0.0, 0.0)]
+    targets = build_target_coordinates(task, [task["center"]], tiles)
+    task["final_points"] = [{"latitude": lat, "longitude": lon} for lat, lon in targets]
+
+def _start_task(task_id, kind):
+    """Persist a prepared task and start its scraping thread."""
+    task = tasks[task_id]
+    if task_store:
+        task_store.create(task_id, kind, task)
+    save_coordinates_to_crud(
+        task_id, task["keyword"], "csv" if kind == "coordinates" else "location",
+        _task_centers(task),
+        task.get("bounds"), task.get("tiles") or [],
+        task.get("target_coords") or task.get("final_points") or [],
+        task.get("email", ""), task.get("radius_km"),
+    )
+    _schedule_task(task_id, kind)
+
+def _schedule_task(task_id, kind, priority=0):
+    """
+    Queue a prepared task for browser slots; it starts scraping once admitted.
+    Broker tasks start at once, since worker capacity is what limits them.
+    """
+    task = tasks[task_id]
+    task["stage"] = "waiting"
+
+    def start(granted):
+        if not task.get("running"):
+            scheduler.release(task_id)
+            return
+        task["workers"] = granted
+        task["stage"] = "scraping"
+        _start_task_thread(task_id, kind)
+
+    if broker:
+        start(task.get("workers", 1))
+        return
+    scheduler.submit(task_id, task.get("email", ""), task.get("workers", 1), start, priority)
+
+def _start_task_thread(task_id, kind):
+    task = tasks[task_id]
+    if broker:
+        threading.Thread(target=collect_broker_task, args=(task_id, kind), daemon=True).start()
+        return
+    if kind == "coordinates":
+        target = scrape_by_coordinates
+        args = (task_id, task["keyword"], task["target_coords"], task["workers"])
+    else:
+        target = scrape_Maps_location
+        args = (task_id, task["keyword"], task["country"], task["city"], task["final_points"], task["workers"])
+    threading.Thread(target=target, args=args).start()
+
+def _get_task(task_id):
+    """In-memory task, falling back to the task store for tasks from earlier runs."""
+    if task_id in tasks:
+        return tasks[task_id]
+    if not task_store:
+        return None
+    stored = task_store.load(task_id)
+    if not stored:
+        return None
+    _, task = stored
+    task["running"] = False
+    tasks[task_id] = task
+    return task
+
+def resume_unfinished_tasks():
+    for task_id in task_store.unfinished():
+        try:
+            kind, task = task_store.load(task_id)
+            task["started_at"] = time.time()
+            tasks[task_id] = task
+            log_message(
+                f"♻️ Resuming {kind} task {task_id} with {len(task['results'])} results and "
+                f"{len(task_store.completed_items(task_id))} completed items"
+            )
+            # Resumed tasks were admitted before the restart, so they go ahead of new ones
+            _schedule_task(task_id, kind, priority=1)
+        except Exception as e:
+            log_message(f"❌ Could not resume task {task_id}: {e}")
+
+@app.on_event("startup")
+def warm_driver_pool():
+    # In broker mode the browsers live in the worker processes
+    if not broker:
+        threading.Thread(target=driver_pool.warm, daemon=True).start()
+    threading.Thread(target=city_index.load, daemon=True).start()
+    if crud_writer:
+        crud_writer.start()
+    threading.Thread(target=tile_plans.warm, args=(TILE_PLAN_WARM_RADII,), daemon=True).start()
+    scheduler.start()
+    if task_store and TASK_RESUME_ON_STARTUP:
+        resume_unfinished_tasks()
+
+@app.on_event("shutdown")
+def close_driver_pool():
+    # Stop running tasks without finishing them so they resume on the next start
+    for task in tasks.values():
+        if task.get("running"):
+            task["interrupted"] = True
+            task["running"] = False
+    submission_pool.shutdown(wait=False, cancel_futures=True)
+    scheduler.stop()
+    driver_pool.shutdown()
+    if crud_writer:
+        crud_writer.stop()
+    http.close()
+
+@app.get("/http-stats")
+def get_http_stats():
+    """Latency and error counters of outbound HTTP calls, per endpoint."""
+    return {"endpoints": http.stats()}
+
+@app.get("/driver-pool-stats")
+def get_driver_pool_stats():
+    """Browser launches, recycles by reason, peak browser memory and network counters."""
+    return driver_pool.stats()
+
+@app.get("/scheduler-stats")
+def get_scheduler_stats():
+    """Slot usage, queue length and admission counters of the task scheduler."""
+    return scheduler.stats()
+
 @app.get("/countries")
 def get_countries():
     try:
-        countries = sorted([f[:-5] for f in os.listdir(JSON_FOLDER) if f.endswith(".json")])
-        return {"countries": countries}
+        return {"countries": city_index.countries()}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 @app.get("/cities/{country}")
 def get_cities(country: str):
     try:
-        country_files = {f.lower(): f for f in os.listdir(JSON_FOLDER) if f.endswith(".json")}
-        country_filename = country.lower() + ".json"
-        
-        if country_filename not in country_files:
+        cities = city_index.big_cities(country)
+        if cities is None:
             return JSONResponse(status_code=404, content={"error": f"Country '{country}' not found"})
 
-        file_path = os.path.join(JSON_FOLDER, country_files[country_filename])
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        cities = [city["ASCII Name"] for city in data if int(city.get("Population", 0)) > 100000]
-        
         if not cities:
             return JSONResponse(status_code=200, content={"message": "No cities with population greater than 100000"})
 
@@ -1124,33 +934,36 @@ def get_cities(country: str):
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 @app.post("/upload/")
-async def upload_csv(file: UploadFile, keyword: str = Form(...), email: str = Form(...), radius_km: float = Form(5.0)):
+async def upload_csv(file: UploadFile, keyword: str = Form(...), email: str = Form(...), radius_km: float = Form(5.0), workers: int = Form(1), extraction_mode: str = Form(""), harvest_mode: str = Form(""), required_fields: str = Form("")):
     task_id = str(time.time())
-    df = pd.read_csv(file.file)
-    centers = []
-    lat_col = next((c for c in df.columns if str(c).strip().lower()=="latitude"), None)
-    lon_col = next((c for c in df.columns if str(c).strip().lower()=="longitude"), None)
-    if not lat_col or not lon_col:
+    # Copy the upload to our own file in chunks; the UploadFile is closed once we respond
+    fd, upload_path = tempfile.mkstemp(prefix="upload-", suffix=".csv")
+    size = 0
+    with os.fdopen(fd, "wb") as out:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                break
+            out.write(chunk)
+    if size > MAX_UPLOAD_BYTES:
+        os.remove(upload_path)
+        return JSONResponse(status_code=413, content={"error": f"Upload exceeds {MAX_UPLOAD_MB} MB"})
+    if not csv_coordinate_columns(upload_path):
+        os.remove(upload_path)
         return JSONResponse(status_code=400, content={"error": "CSV must contain 'latitude' and 'longitude' columns"})
-    for _, row in df.iterrows():
-        if pd.isna(row[lat_col]) or pd.isna(row[lon_col]):
-            continue
-        try:
-            centers.append((float(row[lat_col]), float(row[lon_col])))
-        except Exception:
-            continue
 
-    bounds = calculate_boundary_points(float(radius_km))
-    tiles = fetch_inscriber_tiles(bounds)
-    target_coords = build_target_coordinates(centers, tiles)
+    workers = resolve_worker_count(workers, MAX_WORKERS_PER_TASK)
 
-    tasks[task_id] = {"running": True, "progress": 0, "results": [], "error": None, "centers": centers, "bounds": bounds, "tiles": tiles, "target_coords": target_coords, "keyword": keyword, "email": email, "radius_km": radius_km, "started_at": time.time()}
-    threading.Thread(target=scrape_by_coordinates, args=(task_id, keyword, target_coords)).start()
+    tasks[task_id] = {"running": True, "progress": 0, "results": [], "error": None, "keyword": keyword, "email": email, "radius_km": radius_km, "workers": workers, "extraction_mode": resolve_extraction_mode(extraction_mode), "harvest_mode": resolve_harvest_mode(harvest_mode), "required_fields": list(parse_field_policy(required_fields) if required_fields else CARD_REQUIRED_FIELDS), "started_at": time.time()}
+    _submit_task(task_id, "coordinates", [
+        ("parsing", lambda task: _parse_centers_stage(task, upload_path)),
+        ("planning", _plan_coordinates_stage),
+    ], cleanup=lambda: os.remove(upload_path))
 
     return {"message": "Processing started", "task_id": task_id}
 
 @app.post("/search-by-location/")
-async def search_by_location(keyword: str = Form(...), country: str = Form(...), city: str = Form(...), email: str = Form(...), radius_km: float = Form(5.0)):
+async def search_by_location(keyword: str = Form(...), country: str = Form(...), city: str = Form(...), email: str = Form(...), radius_km: float = Form(5.0), workers: int = Form(1), extraction_mode: str = Form(""), harvest_mode: str = Form(""), required_fields: str = Form("")):
     task_id = str(time.time())
     
     # Validate inputs
@@ -1165,80 +978,130 @@ async def search_by_location(keyword: str = Form(...), country: str = Form(...),
         "keyword": keyword,
         "city": city,
         "country": country,
+        "email": email,
+        "radius_km": radius_km,
+        "workers": resolve_worker_count(workers, MAX_WORKERS_PER_TASK),
+        "extraction_mode": resolve_extraction_mode(extraction_mode),
+        "harvest_mode": resolve_harvest_mode(harvest_mode),
+        "required_fields": list(parse_field_policy(required_fields) if required_fields else CARD_REQUIRED_FIELDS),
         "started_at": time.time()
     }
 
-    center = get_city_coordinates(country, city)
-    if not center:
-        tasks[task_id]["error"] = "Could not determine coordinates for selected city"
-        tasks[task_id]["running"] = False
-        return JSONResponse(status_code=400, content={"error": tasks[task_id]["error"]})
-    
-    bounds = calculate_boundary_points(float(radius_km))
-    inscribed_points = fetch_inscriber_tiles(bounds)
-
-    if isinstance(inscribed_points, dict):
-        raw_coords = inscribed_points.get("raw_coordinates", [])
-    elif isinstance(inscribed_points, list):
-        raw_coords = inscribed_points 
-    else:
-        raw_coords = []
-        print("⚠️ Unexpected inscriber response type:", type(inscribed_points))
-
-    # --- Flatten ---
-    flattened_inscribed_points = [
-        point
-        for sublist in raw_coords
-        for point in sublist
-    ]
-
-    final_points_json = apply_center_offset(center, flattened_inscribed_points)
-
+    _submit_task(task_id, "location", [
+        ("geocoding", _geocode_stage),
+        ("planning", _plan_location_stage),
+    ])
+    log_message(f"🚀 Queued scraping task {task_id} for {keyword} in {city}, {country}")
 
+    return {"message": "Processing started", "task_id": task_id}
 
-    try:
-        threading.Thread(target=scrape_Maps_location, args=(task_id, keyword, country, city, final_points_json)).start()
-        log_message(f"🚀 Started scraping task {task_id} for {keyword} in {city}, {country}")
-    except Exception as e:
-        tasks[task_id]["error"] = f"Failed to start scraping thread: {str(e)}"
-        tasks[task_id]["running"] = False
-        return JSONResponse(status_code=500, content={"error": tasks[task_id]["error"]})
+def _progress_status(task_id, task):
+    runtime = 0
+    if "started_at" in task:
+        runtime = time.time() - task["started_at"]
+    queued = scheduler.position(task_id) or {}
+    return {
+        "progress": task.get("progress", 0),
+        "running": task.get("running", False),
+        "error": task.get("error", None),
+        "runtime_seconds": int(runtime),
+        "keyword": task.get("keyword", ""),
+        "city": task.get("city", ""),
+        "country": task.get("country", ""),
+        "wait_stats": task.get("wait_stats"),
+        "counters": task.get("counters", {}),
+        "stage": task.get("stage"),
+        "stages": task.get("stages", {}),
+        "units": task.get("units"),
+        "queue_position": queued.get("queue_position"),
+        "estimated_start": queued.get("estimated_start"),
+        "estimated_wait_seconds": queued.get("estimated_wait_seconds"),
+        "crud_queue": crud_writer.pending(task_id) if crud_writer else 0,
+        "crud_dead_letters": crud_writer.dead_letters(task_id) if crud_writer else 0
+    }
 
-    return {"message": "Processing started", "task_id": task_id}
+def _results_since(task, since):
+    """Rows appended after cursor `since` and the cursor to send next time."""
+    results = task.get("results", [])
+    total = len(results)
+    since = max(0, min(since, total))
+    return results[since:total], total
 
 @app.get("/progress/{task_id}")
-async def get_progress(task_id: str):
-    if task_id in tasks:
-        task = tasks[task_id]
-        
-        # Calculate runtime
-        runtime = 0
-        if "started_at" in task:
-            runtime = time.time() - task["started_at"]
-        
-        return {
-            "progress": task.get("progress", 0),
-            "results": task.get("results", []),
-            "running": task.get("running", False),
-            "error": task.get("error", None),
-            "runtime_seconds": int(runtime),
-            "keyword": task.get("keyword", ""),
-            "city": task.get("city", ""),
-            "country": task.get("country", "")
-        }
+def get_progress(task_id: str, since: int = None):
+    """
+    Task status and results. Without `since` the full result list is returned;
+    with `since=<cursor>` only rows appended after the cursor, plus `next`.
+    Plain def: loading a stored task and counting queued CRUD documents hit
+    SQLite, so this runs on the threadpool rather than the event loop.
+    """
+    task = _get_task(task_id)
+    if task:
+        payload = _progress_status(task_id, task)
+        if since is None:
+            payload["results"] = task.get("results", [])
+        else:
+            payload["results"], payload["next"] = _results_since(task, since)
+        return payload
     return JSONResponse(status_code=404, content={"error": "Task not found"})
 
+@app.get("/progress/{task_id}/stream")
+async def stream_progress(task_id: str, since: int = 0):
+    """
+    Server-Sent Events stream of a task: `results` events carry only newly
+    appended rows, `status` events are sent when the status changes and a
+    final `done` event closes the stream. SQLite reads run in worker threads.
+    """
+    task = await asyncio.to_thread(_get_task, task_id)
+    if not task:
+        return JSONResponse(status_code=404, content={"error": "Task not found"})
+
+    async def events():
+        cursor = since
+        last_status = None
+        last_sent = time.time()
+        while True:
+            rows, total = _results_since(task, cursor)
+            if rows:
+                yield f"event: results\ndata: {json.dumps({'results': rows, 'next': total})}\n\n"
+                cursor = total
+                last_sent = time.time()
+            status = await asyncio.to_thread(_progress_status, task_id, task)
+            compared = {key: value for key, value in status.items()
+                        if key not in ("runtime_seconds", "estimated_wait_seconds")}
+            if compared != last_status:
+                last_status = compared
+                yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                last_sent = time.time()
+            if not task.get("running") and cursor >= len(task.get("results", [])):
+                yield f"event: done\ndata: {json.dumps({'next': cursor})}\n\n"
+                return
+            if time.time() - last_sent > PROGRESS_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.time()
+            await asyncio.sleep(PROGRESS_STREAM_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/cancel/{task_id}")
 def cancel_task(task_id: str):
-    if task_id in tasks:
+    if _get_task(task_id):
+        tasks[task_id]["cancelled"] = True
         tasks[task_id]["running"] = False
+        if scheduler.cancel(task_id):
+            tasks[task_id]["stage"] = "cancelled"
+        if broker:
+            broker.cancel(task_id)
+        if task_store:
+            task_store.finish(task_id, "cancelled")
         time.sleep(1)
         return {"message": f"Task {task_id} has been canceled"}
     return JSONResponse(status_code=404, content={"error": "Task not found"})
 
 @app.get("/download/{task_id}")
 def download_results(task_id: str):
-    if task_id not in tasks or not tasks[task_id]["results"]:
+    if not _get_task(task_id) or not tasks[task_id]["results"]:
         return {"error": "No results found"}
 
     def iter_csv():
@@ -1271,7 +1134,7 @@ def download_results(task_id: str):
 
 @app.get("/download-search/{task_id}")
 def download_search_results(task_id: str):
-    if task_id not in tasks or not tasks[task_id]["results"]:
+    if not _get_task(task_id) or not tasks[task_id]["results"]:
         return {"error": "No results found"}
 
     def iter_csv():
@@ -0,0 +1,113 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import unquote, urlparse
+
+from .utils import log_message
+
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)")
+KG_ID_RE = re.compile(r"!16s([^!?&]+)")
+
+
+def place_id_from_url(url):
+    """
+    Canonical place key for a /maps/place/ URL.
+
+    Prefers the feature id (!1s0x...:0x...), then the knowledge-graph id
+    (!16s/g/...), then the place path without query string.
+    """
+    if not url:
+        return None
+    match = FEATURE_ID_RE.search(url)
+    if match:
+        return match.group(1).lower()
+    match = KG_ID_RE.search(url)
+    if match:
+        return unquote(match.group(1))
+    path = urlparse(url).path
+    if "/maps/place/" not in path:
+        return None
+    return unquote(path.split("/data=")[0].rstrip("/"))
+
+
+class PlaceCache:
+    """
+    On-disk SQLite cache of extracted place details keyed by canonical place id.
+
+    Entries expire after `ttl_seconds`; once more than `max_entries` are stored
+    the least recently used ones are evicted.
+    """
+
+    def __init__(self, path, ttl_seconds=7 * 24 * 3600, max_entries=100000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS places ("
+            " place_id TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS places_accessed_at ON places (accessed_at)")
+        self._conn.commit()
+
+    def get(self, url):
+        """Cached details for a place URL, or None on a miss or expired entry."""
+        place_id = place_id_from_url(url)
+        if not place_id:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, stored_at FROM places WHERE place_id = ?", (place_id,)
+            ).fetchone()
+            if not row:
+                return None
+            data, stored_at = row
+            if now - stored_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM places WHERE place_id = ?", (place_id,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE places SET accessed_at = ? WHERE place_id = ?", (now, place_id))
+            self._conn.commit()
+        return json.loads(data)
+
+    def put(self, url, details):
+        place_id = place_id_from_url(url)
+        if not place_id:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places (place_id, data, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (place_id, json.dumps(details), now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM places WHERE place_id IN ("
+                    " SELECT place_id FROM places ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM places WHERE stored_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+        if cursor.rowcount:
+            log_message(f"🧹 Purged {cursor.rowcount} expired places from cache")
+        return cursor.rowcount
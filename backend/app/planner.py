@@ -0,0 +1,58 @@
+import numpy as np
+
+# 1 KM = 0.00899321605918700 degrees of latitude
+KM_TO_DEG = 0.00899321605918700
+
+
+def snap_cells(points, tolerance_km):
+    """
+    Lattice cell of every (lat, lon) point for a tolerance in km.
+
+    Latitude rows are `tolerance_km` tall; longitude cells are widened by
+    1 / cos(latitude) of their row so a cell spans about the same distance
+    east-west at any latitude. Each cell is packed into one int64 key.
+    """
+    step = tolerance_km * KM_TO_DEG
+    rows = np.floor(points[:, 0] / step)
+    lon_step = step / np.maximum(np.cos(np.radians(rows * step)), 0.01)
+    cols = np.floor(points[:, 1] / lon_step)
+    return rows.astype(np.int64) * (1 << 32) + (cols.astype(np.int64) + (1 << 31))
+
+
+def plan_targets(centers, tiles, tolerance_km=0.0):
+    """
+    Search targets for every center shifted by every tile offset.
+
+    The centers x tiles product is built by broadcasting. With a positive
+    `tolerance_km`, targets falling in the same lattice cell are searched
+    only once: the first target of each cell is kept, in center order.
+
+    Returns (targets, stats) where targets is a float64 array of shape
+    (n, 2) and stats holds the planned, kept and saved search counts.
+    """
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+    offsets = np.asarray(tiles, dtype=np.float64).reshape(-1, 2)
+    if not len(offsets):
+        offsets = np.zeros((1, 2))
+
+    targets = (centers[:, None, :] + offsets[None, :, :]).reshape(-1, 2)
+    planned = len(targets)
+    if tolerance_km > 0 and planned:
+        _, first = np.unique(snap_cells(targets, tolerance_km), return_index=True)
+        targets = targets[np.sort(first)]
+
+    return targets, {
+        "targets_planned": planned,
+        "targets": len(targets),
+        "searches_saved": planned - len(targets),
+    }
+
+
+def split_tile(lat, lon, half_km):
+    """Centres of the four quadrants of a square tile `2 * half_km` wide."""
+    quarter_lat = half_km / 2 * KM_TO_DEG
+    quarter_lon = quarter_lat / max(np.cos(np.radians(lat)), 0.01)
+    return [
+        (float(lat + dy * quarter_lat), float(lon + dx * quarter_lon))
+        for dy in (1, -1) for dx in (-1, 1)
+    ]
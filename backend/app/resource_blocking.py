@@ -0,0 +1,174 @@
+import json
+import threading
+
+from .utils import log_message
+
+# URL patterns (CDP wildcard syntax) of resources a scrape never reads
+BLOCK_GROUPS = {
+    # Map imagery and vector tiles drawn behind the results panel
+    "tiles": [
+        "*/maps/vt?*",
+        "*/maps/vt/*",
+        "*/kh/v=*",
+        "*khms*.google.com/*",
+    ],
+    # Place photos, street view thumbnails and avatars
+    "photos": [
+        "*.googleusercontent.com/*",
+        "*streetviewpixels-pa.googleapis.com/*",
+        "*/maps/api/js/StaticMapService*",
+        "*.ggpht.com/*",
+    ],
+    "fonts": [
+        "*fonts.gstatic.com/*",
+        "*fonts.googleapis.com/*",
+        "*.woff2",
+        "*.woff",
+        "*.ttf",
+    ],
+    "telemetry": [
+        "*/gen_204*",
+        "*google.com/log?*",
+        "*/maps/preview/log204*",
+        "*google-analytics.com/*",
+        "*googletagmanager.com/*",
+        "*doubleclick.net/*",
+        "*play.google.com/log*",
+    ],
+    "media": [
+        "*.mp4",
+        "*.webm",
+        "*.gif",
+    ],
+}
+
+# Named profiles; any "+"-joined list of group names is a profile too
+BLOCK_PROFILES = {
+    "off": [],
+    "minimal": ["tiles", "photos", "fonts", "telemetry", "media"],
+}
+
+
+def resolve_block_profile(spec):
+    """
+    Normalized profile name and URL patterns for a profile spec such as
+    "minimal", "off" or "tiles+photos+fonts". Unknown groups are ignored.
+    """
+    spec = (spec or "off").strip().lower()
+    groups = BLOCK_PROFILES.get(spec)
+    if groups is None:
+        groups = [group for group in spec.split("+") if group in BLOCK_GROUPS]
+        spec = "+".join(groups) or "off"
+    patterns = [pattern for group in groups for pattern in BLOCK_GROUPS[group]]
+    return spec, patterns
+
+
+def apply_block_profile(driver, patterns):
+    """Block `patterns` for every request of the driver's tab; False if CDP refused."""
+    if not patterns:
+        return True
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        return True
+    except Exception as e:
+        log_message(f"⚠️ Could not apply resource blocking: {e}")
+        return False
+
+
+class NetworkMeter:
+    """
+    Request and byte counters per page load, read from Chrome's performance
+    log (enable it with the `goog:loggingPrefs` capability).
+
+    `record_page(driver, seconds)` is called after every navigation and
+    drains the log entries accumulated since the last call, so counters are
+    attributed to the page that caused them. Totals are kept per resource
+    type, next to the number of requests the block profile stopped.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self._lock = threading.Lock()
+        self._types = {}
+        self._disabled = False
+        self._stats = {
+            "pages": 0,
+            "navigations": 0,
+            "load_seconds": 0.0,
+            "requests": 0,
+            "blocked": 0,
+            "failed": 0,
+            "bytes": 0,
+        }
+        self._bytes_by_type = {}
+        self._requests_by_type = {}
+
+    def _tally(self, browser, entries):
+        """Fold performance log entries of one browser into the counters; lock held."""
+        if len(self._types) > 10000:
+            # Requests whose browser went away never finish; don't let them pile up
+            self._types.clear()
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method", "")
+            params = message.get("params", {})
+            key = (browser, params.get("requestId"))
+            if method == "Network.requestWillBeSent":
+                if params.get("request", {}).get("url", "").startswith("data:"):
+                    continue
+                resource = params.get("type", "Other")
+                self._types[key] = resource
+                self._stats["requests"] += 1
+                self._requests_by_type[resource] = self._requests_by_type.get(resource, 0) + 1
+            elif method == "Network.loadingFinished":
+                resource = self._types.pop(key, "Other")
+                size = int(params.get("encodedDataLength", 0))
+                self._stats["bytes"] += size
+                self._bytes_by_type[resource] = self._bytes_by_type.get(resource, 0) + size
+            elif method == "Network.loadingFailed":
+                self._types.pop(key, None)
+                if params.get("blockedReason"):
+                    self._stats["blocked"] += 1
+                elif not params.get("canceled"):
+                    self._stats["failed"] += 1
+
+    def record_page(self, driver, seconds=None, page=True):
+        """
+        Account the traffic since the last call to one page load taking
+        `seconds`; with `page=False` the traffic is counted but no page is.
+        """
+        if self._disabled:
+            return
+        try:
+            entries = driver.get_log("performance")
+        except Exception as e:
+            log_message(f"⚠️ Network metering disabled, performance log unavailable: {e}")
+            self._disabled = True
+            return
+        with self._lock:
+            if page:
+                self._stats["pages"] += 1
+            if page and seconds is not None:
+                self._stats["navigations"] += 1
+                self._stats["load_seconds"] += seconds
+            self._tally(id(driver), entries)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes_by_type"] = dict(self._bytes_by_type)
+            stats["requests_by_type"] = dict(self._requests_by_type)
+        pages = stats["pages"] or 1
+        stats.update({
+            "profile": self.profile,
+            "enabled": not self._disabled,
+            "load_seconds": round(stats["load_seconds"], 2),
+            "avg_load_seconds": round(stats["load_seconds"] / (stats["navigations"] or 1), 3),
+            "avg_bytes_per_page": int(stats["bytes"] / pages),
+            "avg_requests_per_page": round(stats["requests"] / pages, 1),
+        })
+        return stats
@@ -0,0 +1,211 @@
+import heapq
+import itertools
+import threading
+import time
+
+from .utils import log_message
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo in MB, or None where it cannot be read."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class _Job:
+    def __init__(self, task_id, email, slots, priority, start, seq):
+        self.task_id = task_id
+        self.email = email
+        self.slots = slots
+        self.priority = priority
+        self.start = start
+        self.seq = seq
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.granted = 0
+
+
+class Scheduler:
+    """
+    Admits queued scraping tasks onto a fixed number of browser slots.
+
+    A task asks for as many slots as it has workers and is granted what is
+    free when it reaches the head of the queue, so no slot sits idle while
+    work is waiting. The queue is ordered by priority, then by how many slots
+    the submitter's email already holds, then by submission order, so one
+    user's backlog cannot starve everyone else. Nothing is admitted while
+    available memory is below `min_free_mb`, and grants are capped to what the
+    remaining memory can hold at `mb_per_browser`.
+    """
+
+    def __init__(self, capacity, min_free_mb=512, mb_per_browser=400, default_runtime=600.0,
+                 poll_seconds=2.0, memory=available_memory_mb):
+        self.capacity = max(1, int(capacity))
+        self.min_free_mb = min_free_mb
+        self.mb_per_browser = mb_per_browser
+        self.poll_seconds = poll_seconds
+        self.memory = memory
+        self._avg_runtime = default_runtime
+        self._queued = {}
+        self._running = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._memory_blocked = False
+        self._stats = {"admitted": 0, "finished": 0, "memory_waits": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------------
+
+    def submit(self, task_id, email, slots, start, priority=0):
+        """Queue a task; `start(granted_slots)` is called once it is admitted."""
+        with self._cond:
+            job = _Job(task_id, (email or "").strip().lower(), max(1, int(slots)), priority, start, next(self._seq))
+            self._queued[task_id] = job
+            self._cond.notify_all()
+
+    def cancel(self, task_id):
+        """Drop a task that has not started yet; True if it was queued."""
+        with self._cond:
+            return self._queued.pop(task_id, None) is not None
+
+    def release(self, task_id):
+        """Free the slots of a finished task."""
+        with self._cond:
+            job = self._running.pop(task_id, None)
+            if not job:
+                return
+            runtime = time.time() - job.started_at
+            self._avg_runtime = 0.8 * self._avg_runtime + 0.2 * runtime
+            self._stats["finished"] += 1
+            self._cond.notify_all()
+
+    def _used(self):
+        return sum(job.granted for job in self._running.values())
+
+    def _ordered(self):
+        held = {}
+        for job in self._running.values():
+            held[job.email] = held.get(job.email, 0) + job.granted
+        return sorted(
+            self._queued.values(),
+            key=lambda job: (-job.priority, held.get(job.email, 0), job.seq),
+        )
+
+    def _admit(self):
+        """Start queued jobs while slots and memory allow; called with the lock held."""
+        started = []
+        while self._queued:
+            free = self.capacity - self._used()
+            if free < 1:
+                break
+            available = self.memory() if self.memory else None
+            if available is not None:
+                headroom = available - self.min_free_mb
+                if headroom < 0:
+                    if not self._memory_blocked:
+                        self._stats["memory_waits"] += 1
+                        log_message(f"⏸️ Scheduler holding queue: {available:.0f} MB available")
+                    self._memory_blocked = True
+                    break
+                free = min(free, max(1, int(headroom // self.mb_per_browser)))
+            self._memory_blocked = False
+
+            job = self._ordered()[0]
+            del self._queued[job.task_id]
+            job.granted = min(job.slots, free)
+            job.started_at = time.time()
+            self._running[job.task_id] = job
+            self._stats["admitted"] += 1
+            started.append(job)
+        return started
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stop:
+                    return
+                started = self._admit()
+                if not started:
+                    self._cond.wait(self.poll_seconds)
+            for job in started:
+                log_message(
+                    f"▶️ Scheduler started task {job.task_id} on {job.granted}/{job.slots} slot(s) "
+                    f"after {time.time() - job.submitted_at:.1f}s in queue"
+                )
+                try:
+                    job.start(job.granted)
+                except Exception as e:
+                    log_message(f"❌ Scheduler could not start task {job.task_id}: {e}")
+                    self.release(job.task_id)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def _estimated_starts(self):
+        """
+        Replay the queue against the running tasks, assuming every task takes
+        the recent average runtime, to estimate when each queued task starts.
+        """
+        now = time.time()
+        frees = [(max(job.started_at + self._avg_runtime, now), job.granted) for job in self._running.values()]
+        heapq.heapify(frees)
+        free = self.capacity - self._used()
+        clock = now
+        starts = {}
+        for job in self._ordered():
+            while free < 1 and frees:
+                at, slots = heapq.heappop(frees)
+                clock = max(clock, at)
+                free += slots
+            granted = min(job.slots, max(free, 1))
+            free -= granted
+            starts[job.task_id] = clock
+            heapq.heappush(frees, (clock + self._avg_runtime, granted))
+        return starts
+
+    def position(self, task_id):
+        """Queue position (1-based) and estimated start time, or None once started."""
+        with self._cond:
+            if task_id not in self._queued:
+                return None
+            order = [job.task_id for job in self._ordered()]
+            starts = self._estimated_starts()
+        return {
+            "queue_position": order.index(task_id) + 1,
+            "estimated_start": round(starts[task_id], 1),
+            "estimated_wait_seconds": int(max(0, starts[task_id] - time.time())),
+        }
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "capacity": self.capacity,
+                "slots_in_use": self._used(),
+                "running": len(self._running),
+                "queued": len(self._queued),
+                "avg_runtime_seconds": round(self._avg_runtime, 1),
+                "memory_blocked": self._memory_blocked,
+            })
+        stats["available_memory_mb"] = self.memory() if self.memory else None
+        return stats
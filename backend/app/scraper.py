@@ -0,0 +1,657 @@
+"""
+Scraping engine shared by the API (thread executor) and `python -m app.worker`.
+
+Holds the browser setup, the driver pool, field extraction and the per-tile
+search routines, plus the place cache they read through. Importing it builds
+no API state (tasks, task store, scheduler, CRUD outbox), so worker processes
+only open what scraping needs.
+"""
+import os
+import time
+import random
+import requests
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from .utils import log_message
+from .planner import split_tile
+from .driver_pool import DriverPool
+from .resource_blocking import resolve_block_profile, apply_block_profile, NetworkMeter
+from .place_cache import PlaceCache
+from .extraction import (
+    EXTRACTION_MODES, HARVEST_MODES, compare_details, empty_details, extract_details_js,
+    harvest_cards, merge_details, missing_fields, parse_field_policy, resolve_details, timed,
+)
+from .waits import (
+    all_of, detail_title, detail_title_changed, feed_count,
+    feed_count_at_least, feed_count_greater, url_changed,
+)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Writable directory for caches and task state; mount a volume here to keep it across restarts
+STATE_DIR = os.getenv("STATE_DIR", os.path.join(BASE_DIR, "state"))
+
+# Place cache configuration
+PLACE_CACHE_ENABLED = os.getenv("PLACE_CACHE_ENABLED", "true").lower() == "true"
+PLACE_CACHE_PATH = os.getenv("PLACE_CACHE_PATH", os.path.join(STATE_DIR, "place_cache.sqlite"))
+PLACE_CACHE_TTL_HOURS = float(os.getenv("PLACE_CACHE_TTL_HOURS", "168"))
+PLACE_CACHE_MAX_ENTRIES = int(os.getenv("PLACE_CACHE_MAX_ENTRIES", "100000"))
+
+place_cache = PlaceCache(
+    PLACE_CACHE_PATH,
+    ttl_seconds=PLACE_CACHE_TTL_HOURS * 3600,
+    max_entries=PLACE_CACHE_MAX_ENTRIES,
+) if PLACE_CACHE_ENABLED else None
+
+# Work broker file and retry limit, read by the API and by app.worker alike
+BROKER_PATH = os.getenv("BROKER_PATH", os.path.join(STATE_DIR, "broker.sqlite"))
+BROKER_MAX_ATTEMPTS = int(os.getenv("BROKER_MAX_ATTEMPTS", "3"))
+
+def smart_sleep(min_sec=5, max_sec=8, reason=""):  # REDUCED default sleep times
+    delay = random.uniform(min_sec, max_sec)
+    log_message(f"⏳ Sleeping for {delay:.2f}s {reason}")
+    time.sleep(delay)
+
+def safe_find_element(driver, by, value, timeout=10):
+    """Safely find element with retry logic and better error handling"""
+    try:
+        element = WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((by, value))
+        )
+        return element
+    except TimeoutException:
+        log_message(f"Timeout waiting for element: {value}")
+        return None
+    except Exception as e:
+        log_message(f"Error finding element {value}: {e}")
+        return None
+
+def safe_find_elements(driver, by, value, timeout=10):
+    """Safely find elements with retry logic and better error handling"""
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((by, value))
+        )
+        return driver.find_elements(by, value)
+    except TimeoutException:
+        log_message(f"Timeout waiting for elements: {value}")
+        return []
+    except Exception as e:
+        log_message(f"Error finding elements {value}: {e}")
+        return []
+
+def init_driver(debug_port=9222):
+    """Initializes and returns a Selenium WebDriver instance with improved error handling."""
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-web-security")
+    options.add_argument("--disable-features=VizDisplayCompositor")
+    options.add_argument("--no-first-run")
+    options.add_argument("--disable-default-apps")
+    options.add_argument(f"--remote-debugging-port={debug_port}")
+    
+    # ADDITIONAL PERFORMANCE OPTIMIZATIONS
+    # Keep JavaScript enabled to ensure Maps UI loads fully
+    options.add_argument("--disable-plugins")
+    options.add_argument("--disable-java")
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+    
+    # Enhanced user agent rotation
+    user_agents = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    ]
+    options.add_argument(f"--user-agent={random.choice(user_agents)}")
+    
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    options.add_argument("--disable-logging")
+    options.add_argument("--log-level=3")
+    
+    # Enhanced memory and performance optimizations; memory growth is bounded by
+    # the driver pool recycling browsers, so Chrome may react to memory pressure
+    options.add_argument("--aggressive-cache-discard")
+    if network_meter:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    log_message("🌐 Setting up Chrome driver...")
+
+    try:
+        # from webdriver_manager.chrome import ChromeDriverManager
+        # from selenium.webdriver.chrome.service import Service as ChromeService
+
+        # log_message("🔄 Using WebDriver Manager to get compatible chromedriver...")
+        # service = ChromeService(ChromeDriverManager().install())
+        # driver = webdriver.Chrome(service=service, options=options)
+        from selenium.webdriver.chrome.service import Service as ChromeService
+
+        log_message("🔄 Using pre-installed chromedriver in container...")
+        service = ChromeService(executable_path="/usr/bin/chromedriver")
+        driver = webdriver.Chrome(service=service, options=options)
+
+
+        # Enhanced anti-detection
+        driver.execute_script("""
+            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+            Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+            Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
+            Object.defineProperty(navigator, 'permissions', {get: () => ({query: () => Promise.resolve({state: 'granted'})})});
+        """)
+        
+        try:
+            from selenium_stealth import stealth
+            stealth(driver,
+                    languages=["en-US", "en"],
+                    vendor="Google Inc.",
+                    platform="Win32",
+                    webgl_vendor="Intel Inc.",
+                    renderer="Intel Iris OpenGL Engine",
+                    fix_hairline=True,
+                    )
+            log_message("✓ Stealth mode applied successfully")
+        except ImportError:
+            log_message("⚠️ selenium-stealth not installed, using basic anti-detection")
+        
+        apply_block_profile(driver, DRIVER_BLOCK_PATTERNS)
+        log_message("✓ Chrome driver created successfully with WebDriver Manager")
+        return driver
+    except Exception as e:
+        log_message(f"ℹ️ WebDriver Manager approach failed: {e}")
+        log_message("🔄 Trying direct ChromeDriver creation...")
+
+        try:
+            driver = webdriver.Chrome(options=options)
+            # Same enhanced anti-detection code here
+            driver.execute_script("""
+                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+                Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
+            """)
+            
+            try:
+                from selenium_stealth import stealth
+                stealth(driver,
+                        languages=["en-US", "en"],
+                        vendor="Google Inc.",
+                        platform="Win32",
+                        webgl_vendor="Intel Inc.",
+                        renderer="Intel Iris OpenGL Engine",
+                        fix_hairline=True,
+                        )
+                log_message("✓ Stealth mode applied successfully")
+            except ImportError:
+                log_message("⚠️ selenium-stealth not installed, using basic anti-detection")
+            
+            apply_block_profile(driver, DRIVER_BLOCK_PATTERNS)
+            log_message("✓ Chrome driver created successfully")
+            return driver
+        except Exception as e:
+            log_message(f"❌ Direct ChromeDriver creation failed: {e}")
+            return None
+
+# Driver pool configuration
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "25"))
+DRIVER_BASE_PORT = int(os.getenv("DRIVER_BASE_PORT", "9222"))
+DRIVER_RESET_STORAGE = os.getenv("DRIVER_RESET_STORAGE", "true").lower() == "true"
+# Recycle a browser once its process tree, page loads or age cross these limits (0 disables)
+DRIVER_MAX_MEMORY_MB = int(os.getenv("DRIVER_MAX_MEMORY_MB", "1500"))
+DRIVER_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "400"))
+DRIVER_MAX_AGE_MINUTES = float(os.getenv("DRIVER_MAX_AGE_MINUTES", "60"))
+
+# Resources blocked on every page load: "off", "minimal" (all groups) or groups joined
+# with "+" such as "tiles+photos+fonts"; see resource_blocking.BLOCK_GROUPS
+DRIVER_BLOCK_PROFILE, DRIVER_BLOCK_PATTERNS = resolve_block_profile(os.getenv("DRIVER_BLOCK_PROFILE", "minimal"))
+# Count requests and bytes per page load from Chrome's performance log
+DRIVER_NETWORK_METER = os.getenv("DRIVER_NETWORK_METER", "false").lower() == "true"
+network_meter = NetworkMeter(DRIVER_BLOCK_PROFILE) if DRIVER_NETWORK_METER else None
+
+# Field extraction mode: "js" (one injected script), "xpath" (one call per selector) or "compare"
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "js").lower()
+if EXTRACTION_MODE not in EXTRACTION_MODES:
+    EXTRACTION_MODE = "js"
+
+# Result harvesting: "detail" clicks every result, "cards" reads the feed cards and only
+# opens detail pages for fields in the task's required-field policy that cards lack
+HARVEST_MODE = os.getenv("HARVEST_MODE", "detail").lower()
+if HARVEST_MODE not in HARVEST_MODES:
+    HARVEST_MODE = "detail"
+CARD_REQUIRED_FIELDS = parse_field_policy(os.getenv("CARD_REQUIRED_FIELDS", "Name"))
+CARD_MAX_SCROLLS = int(os.getenv("CARD_MAX_SCROLLS", "20"))
+
+# Google Maps root; point it at a bench.replay server to scrape recorded pages offline
+MAPS_BASE_URL = os.getenv("MAPS_BASE_URL", "https://www.google.com/maps").rstrip("/")
+
+
+def coordinate_search_path(keyword, lat, lon, zoom):
+    """Path below MAPS_BASE_URL of a keyword search centred on a coordinate."""
+    return f"/search/{requests.utils.quote(keyword)}/@{lat},{lon},{zoom}z"
+
+
+def location_search_path(keyword, country, city, lat, lon):
+    """Path below MAPS_BASE_URL of a keyword search around a point of a city."""
+    search_query = f"{keyword} in {lat}, {lon}, {city}, {country}"
+    return f"/search/{search_query.replace(' ', '+')}"
+
+
+driver_pool = DriverPool(
+    init_driver,
+    size=DRIVER_POOL_SIZE,
+    max_uses=DRIVER_MAX_USES,
+    base_port=DRIVER_BASE_PORT,
+    reset_storage=DRIVER_RESET_STORAGE,
+    storage_origin="{0.scheme}://{0.netloc}".format(urlsplit(MAPS_BASE_URL)),
+    max_pages=DRIVER_MAX_PAGES,
+    max_age_seconds=DRIVER_MAX_AGE_MINUTES * 60,
+    max_memory_mb=DRIVER_MAX_MEMORY_MB,
+    meter=network_meter,
+)
+
+def resolve_extraction_mode(mode):
+    mode = (mode or "").strip().lower()
+    return mode if mode in EXTRACTION_MODES else EXTRACTION_MODE
+
+def _xpath_text(driver, selector):
+    """Text of the first element matching an XPath, or None if nothing matches."""
+    try:
+        return driver.find_element(By.XPATH, selector).text
+    except Exception:
+        return None
+
+def _xpath_href(driver, selector):
+    try:
+        return driver.find_element(By.XPATH, selector).get_attribute("href")
+    except Exception:
+        return None
+
+def extract_details_xpath(driver, url):
+    """Extract fields with one find_element round trip per selector."""
+    return resolve_details(
+        url,
+        lambda selector: _xpath_text(driver, selector),
+        lambda selector: _xpath_href(driver, selector),
+    )
+
+def extract_restaurant_details(driver, url, mode=None):
+    """Extract details from the restaurant page currently open in the driver"""
+    mode = resolve_extraction_mode(mode)
+
+    try:
+        # Wait for page to be fully loaded with better conditions
+        WebDriverWait(driver, 20).until(
+            EC.any_of(
+                EC.presence_of_element_located((By.XPATH, "//h1[contains(@class, 'DUwDvf')]")),
+                EC.presence_of_element_located((By.XPATH, "//div[@data-value='Title']")),
+                EC.presence_of_element_located((By.XPATH, "//h1[@data-attrid='title']"))
+            )
+        )
+
+        if mode == "xpath":
+            return extract_details_xpath(driver, url)
+        if mode == "compare":
+            xpath_details, xpath_ms = timed(extract_details_xpath, driver, url)
+            js_details, js_ms = timed(extract_details_js, driver, url)
+            differences = compare_details(xpath_details, js_details)
+            log_message(f"⚖️ Extraction xpath={xpath_ms:.0f}ms js={js_ms:.0f}ms differences={differences or 'none'}")
+            return js_details
+        return extract_details_js(driver, url)
+
+    except Exception as e:
+        log_message(f"❌ Error extracting details: {e}")
+    
+    return empty_details(url)
+
+def resolve_harvest_mode(mode):
+    mode = (mode or "").strip().lower()
+    return mode if mode in HARVEST_MODES else HARVEST_MODE
+
+def _business_record(details, url, city="", country="", **extra):
+    """Row stored in task results for one scraped business."""
+    record = {
+        "Name": details["Name"],
+        "Address": details["Address"],
+        "Phone": details["Phone"],
+        "Website": details["Website"],
+        "URL": url,
+        "City": city,
+        "Country": country,
+        "Rating": details["Rating"],
+        "Reviews": details["Reviews"],
+        "Reviews_Count": details["Reviews_Count"],
+        "Plus Code": details["Plus Code"],
+        "Category": details["Category"],
+        "Hours": details["Hours"],
+        "Has_Multiple_Locations": details["Has_Multiple_Locations"],
+        "Has_Contact_Info": details["Has_Contact_Info"],
+        "Has_Sufficient_Reviews": details["Has_Sufficient_Reviews"],
+        "Has_Working_Hours": details["Has_Working_Hours"],
+    }
+    record.update(extra)
+    return record
+
+def _scroll_feed_to_end(driver, waits, max_scrolls):
+    """Scroll the results feed until it stops growing or max_scrolls is reached."""
+    try:
+        feed = driver.find_element(By.XPATH, "//div[@role='feed']")
+        for _ in range(max_scrolls):
+            loaded_before = feed_count(driver)
+            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", feed)
+            if not waits.until(driver, feed_count_greater(loaded_before), "scroll"):
+                break
+    except Exception:
+        pass
+
+def _lookup_place(state, url):
+    """Cached details for a place, counting hits and misses on the task."""
+    if not place_cache:
+        return None
+    try:
+        details = place_cache.get(url)
+    except Exception as e:
+        log_message(f"⚠️ Place cache read failed: {e}")
+        details = None
+    state.count("cache_hits" if details else "cache_misses")
+    return details
+
+def _remember_place(url, details):
+    if not place_cache or details["Name"] == "N/A":
+        return
+    try:
+        place_cache.put(url, details)
+    except Exception as e:
+        log_message(f"⚠️ Place cache write failed: {e}")
+
+def _harvest_feed(driver, state, city="", country="", **extra):
+    """
+    Cards-only harvest: read every rendered result card in one pass and open a
+    detail page only when the task's field policy still has fields missing.
+    """
+    policy = state.task.get("required_fields") or CARD_REQUIRED_FIELDS
+    cards = harvest_cards(driver)
+    state.count("cards_seen", len(cards))
+    log_message(f"🗂️ Harvested {len(cards)} result cards")
+
+    for card in cards:
+        if not state.running():
+            break
+        url = card["Google Maps Link"]
+        if not state.claim_url(url):
+            continue
+        details = card
+        if missing_fields(card, policy):
+            cached = _lookup_place(state, url)
+            if cached:
+                details = merge_details(card, cached)
+            else:
+                try:
+                    driver.get(url)
+                    state.waits.until(driver, detail_title_changed(""), "detail")
+                    extracted = extract_restaurant_details(driver, url, state.task.get("extraction_mode"))
+                    _remember_place(url, extracted)
+                    details = merge_details(card, extracted)
+                    state.count("detail_visits")
+                except Exception as e:
+                    log_message(f"❌ Detail visit failed for {url}: {e}")
+        else:
+            state.count("detail_visits_saved")
+        if details["Name"] != "N/A":
+            total = state.add_result(_business_record(details, url, city, country, **extra))
+            log_message(f"✅ Processed: {details['Name']} (Total: {total})")
+
+def _scrape_location_point(driver, state, keyword, country, city, lat, lon):
+    """Search one inscribed point of a city and scrape every new business it lists."""
+    waits = state.waits
+    search_query = f"{keyword} in {lat}, {lon}, {city}, {country}"
+    maps_url = MAPS_BASE_URL + location_search_path(keyword, country, city, lat, lon)
+    
+    log_message(f"🔍 Searching for: {search_query}")
+
+    # Load the search page
+    driver.get(maps_url)
+    waits.until(driver, feed_count_at_least(1), "results", budget=10.0)
+
+    # Wait for results with multiple attempts
+    results_loaded = False
+    for attempt in range(5):
+        try:
+            selectors_to_try = [
+                "//div[@role='feed']",
+                "//div[@aria-label='Results for']",
+                "//div[contains(@class, 'Nv2PK')]",
+                "//div[@data-result-index]"
+            ]
+            
+            for selector in selectors_to_try:
+                try:
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.XPATH, selector))
+                    )
+                    results_loaded = True
+                    log_message(f"✓ Found results with selector: {selector}")
+                    break
+                except:
+                    continue
+            
+            if results_loaded:
+                break
+                
+            log_message(f"Attempt {attempt + 1}/5 failed, retrying...")
+            waits.until(driver, feed_count_at_least(1), "results", budget=5.0)
+            
+        except Exception as e:
+            log_message(f"Attempt {attempt + 1} error: {e}")
+
+    if not results_loaded:
+        log_message(f"❌ Could not find any results around {lat}, {lon}")
+        return
+
+    if state.task.get("harvest_mode") == "cards":
+        _scroll_feed_to_end(driver, waits, CARD_MAX_SCROLLS)
+        _harvest_feed(driver, state, city, country)
+        return
+
+    last_height = None
+    no_new_content_count = 0
+    
+    # INCREASED SCROLLING - Scroll and collect results
+    for scroll_attempt in range(50):  # INCREASED from 10 to 50
+        if not state.running():
+            break
+            
+        # Find all clickable result items
+        result_items = []
+        
+        # Try multiple selectors to find result items
+        item_selectors = [
+            "//div[@role='feed']//a[contains(@href, '/maps/place/')]",
+            "//div[contains(@class, 'Nv2PK')]//a[contains(@href, '/maps/place/')]",
+            "//a[contains(@href, '/maps/place/')]"
+        ]
+        
+        for selector in item_selectors:
+            try:
+                items = driver.find_elements(By.XPATH, selector)
+                if items:
+                    result_items = items
+                    break
+            except:
+                continue
+        
+        if not result_items:
+            log_message("No result items found, trying to scroll more...")
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            waits.until(driver, feed_count_at_least(1), "scroll", budget=3.0)
+            continue
+        
+        log_message(f"Found {len(result_items)} potential results")
+        
+        # INCREASED PROCESSING - Process each result
+        for item in result_items[:15]:  # INCREASED from 5 to 15 per scroll
+            if not state.running():
+                break
+                
+            try:
+                url = item.get_attribute("href")
+                if not state.claim_url(url):
+                    continue
+
+                cached = _lookup_place(state, url)
+                if cached:
+                    total = state.add_result(_business_record(cached, url, city, country))
+                    log_message(f"💾 Cached: {cached['Name']} (Total: {total})")
+                    continue
+
+                # Click and extract details
+                driver.execute_script("arguments[0].scrollIntoView(true);", item)
+                waits.pause("scroll_into_view", budget=2.0)
+                
+                previous_title = detail_title(driver)
+                item.click()
+                waits.until(driver, detail_title_changed(previous_title), "detail")
+                
+                # Extract details
+                details = extract_restaurant_details(driver, url, state.task.get("extraction_mode"))
+                _remember_place(url, details)
+                
+                if details["Name"] != "N/A":
+                    business_data = _business_record(details, url, city, country)
+                    
+                    total = state.add_result(business_data)
+        
+                    log_message(f"✅ Processed: {details['Name']} (Total: {total})")
+                
+                # Go back to results
+                detail_url = driver.current_url
+                driver.back()
+                waits.until(driver, all_of(url_changed(detail_url), feed_count_at_least(1)), "back", budget=4.0)
+                
+            except Exception as e:
+                log_message(f"❌ Error processing result: {e}")
+                continue
+        
+        # Enhanced scrolling strategy
+        try:
+            # Multiple scroll techniques
+            loaded_before = feed_count(driver)
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            
+            # Try scrolling the results panel specifically
+            feed_element = driver.find_element(By.XPATH, "//div[@role='feed']")
+            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed_element)
+            waits.until(driver, feed_count_greater(loaded_before), "scroll", budget=4.0)
+            
+            # Check if we've reached the end
+            current_height = driver.execute_script("return document.body.scrollHeight")
+            if scroll_attempt > 0:
+                if current_height == last_height:
+                    no_new_content_count += 1
+                    if no_new_content_count >= 5:  # Stop if no new content for 5 scrolls
+                        log_message("No new content found, stopping scroll")
+                        break
+                else:
+                    no_new_content_count = 0
+            last_height = current_height
+            
+        except Exception as e:
+            log_message(f"Error during scrolling: {e}")
+            break
+
+# Adaptive coverage for coordinate tasks: every planned target is the centre of a root tile
+# COVERAGE_ROOT_KM wide searched at COVERAGE_ROOT_ZOOM, and a tile whose feed loads
+# COVERAGE_SATURATION cards (Maps caps a feed at about 120) is split into its four quadrants
+# one zoom level closer
+COVERAGE_ADAPTIVE = os.getenv("COVERAGE_ADAPTIVE", "true").lower() == "true"
+COVERAGE_ROOT_KM = float(os.getenv("COVERAGE_ROOT_KM", "2.0"))
+COVERAGE_ROOT_ZOOM = int(os.getenv("COVERAGE_ROOT_ZOOM", "14"))
+COVERAGE_MAX_ZOOM = int(os.getenv("COVERAGE_MAX_ZOOM", "17"))
+COVERAGE_MAX_DEPTH = int(os.getenv("COVERAGE_MAX_DEPTH", "3"))
+COVERAGE_SATURATION = int(os.getenv("COVERAGE_SATURATION", "100"))
+COVERAGE_MAX_SCROLLS = int(os.getenv("COVERAGE_MAX_SCROLLS", "12"))
+
+def _scrape_coordinate(driver, state, keyword, lat, lon, idx, total, zoom=14):
+    """
+    Search one target coordinate and scrape every new business in its feed.
+    Returns how many cards the feed loaded, which tells whether it saturated.
+    """
+    waits = state.waits
+    loaded = 0
+    try:
+        maps_url = MAPS_BASE_URL + coordinate_search_path(keyword, lat, lon, zoom)
+        log_message(f"🔍 Searching around {lat:.6f},{lon:.6f} at {zoom}z ({idx+1}/{total})")
+        driver.get(maps_url)
+        state.count("searches")
+        if not waits.until(driver, feed_count_at_least(1), "results", budget=11.0):
+            return loaded
+
+        # Aggressively scroll the results feed to load more items
+        if state.task.get("harvest_mode") == "cards":
+            _scroll_feed_to_end(driver, waits, CARD_MAX_SCROLLS)
+            loaded = feed_count(driver)
+            _harvest_feed(driver, state, Latitude=f"{lat}", Longitude=f"{lon}")
+            return loaded
+        # Adaptive coverage needs to see how far the feed goes to detect saturation
+        _scroll_feed_to_end(driver, waits, COVERAGE_MAX_SCROLLS if COVERAGE_ADAPTIVE else 6)
+        loaded = feed_count(driver)
+
+        items = driver.find_elements(By.XPATH, "//div[@role='feed']//a[contains(@href, '/maps/place/')]")
+        # Cards scrolled in to detect saturation are scraped too, not just the first page of them
+        for item in items[:max(30, COVERAGE_SATURATION) if COVERAGE_ADAPTIVE else 30]:
+            if not state.running():
+                break
+            try:
+                url = item.get_attribute("href")
+                if not state.claim_url(url):
+                    continue
+                cached = _lookup_place(state, url)
+                if cached:
+                    state.add_result(_business_record(cached, url, Latitude=f"{lat}", Longitude=f"{lon}"))
+                    continue
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", item)
+                waits.pause("scroll_into_view")
+                previous_title = detail_title(driver)
+                driver.execute_script("arguments[0].click();", item)
+                waits.until(driver, detail_title_changed(previous_title), "detail", budget=5.5)
+                details = extract_restaurant_details(driver, url, state.task.get("extraction_mode"))
+                _remember_place(url, details)
+                if details["Name"] != "N/A":
+                    business_data = _business_record(details, url, Latitude=f"{lat}", Longitude=f"{lon}")
+                    state.add_result(business_data)
+                detail_url = driver.current_url
+                driver.back()
+                waits.until(driver, all_of(url_changed(detail_url), feed_count_at_least(1)), "back")
+            except Exception:
+                try:
+                    driver.back()
+                    waits.until(driver, feed_count_at_least(1), "back", budget=1.0)
+                except Exception:
+                    pass
+                continue
+    except Exception as e:
+        log_message(f"❌ Error at coordinate {lat},{lon}: {e}")
+    return loaded
+
+def _split_saturated_tile(state, lat, lon, zoom, depth, loaded):
+    """Quadrants of the tile centred on (lat, lon), one zoom level closer, when its feed saturated; else None."""
+    if not COVERAGE_ADAPTIVE or loaded < COVERAGE_SATURATION:
+        return None
+    state.count("tiles_saturated")
+    if depth >= COVERAGE_MAX_DEPTH or zoom >= COVERAGE_MAX_ZOOM:
+        return None
+    state.count("tiles_split")
+    half_km = COVERAGE_ROOT_KM / 2 / 2 ** depth
+    log_message(f"🔀 Feed saturated at {lat:.6f},{lon:.6f} ({loaded} cards); splitting at {zoom + 1}z")
+    return [(child_lat, child_lon, zoom + 1, depth + 1) for child_lat, child_lon in split_tile(lat, lon, half_km)]
@@ -0,0 +1,181 @@
+import threading
+import queue
+
+from .utils import log_message
+
+
+class SharedTaskState:
+    """
+    Results list and processed-URL set shared by every worker of one task.
+
+    The task dict keeps pointing at the same results list, so progress polling
+    sees rows as soon as any worker appends them. With a `store` every result
+    and completed item is checkpointed, and a resumed task starts from the
+    stored URLs, completed indices and spawned child items. `on_result` is
+    called with every new result, outside the lock.
+    """
+
+    def __init__(self, task, waits=None, store=None, task_id=None, on_result=None):
+        self.task = task
+        self.waits = waits
+        self.store = store
+        self.task_id = task_id
+        self.on_result = on_result
+        self.results = task.setdefault("results", [])
+        self.processed_urls = {row.get("URL") for row in self.results if row.get("URL")}
+        self.completed = set()
+        self.spawned = []
+        if store:
+            self.processed_urls |= store.processed_urls(task_id)
+            self.completed = store.completed_items(task_id)
+            self.spawned = store.spawned_items(task_id)
+        self._lock = threading.Lock()
+
+    def claim_url(self, url):
+        """Atomically mark a place URL as taken; False if another worker already has it."""
+        with self._lock:
+            if not url or url in self.processed_urls:
+                return False
+            self.processed_urls.add(url)
+            return True
+
+    def add_result(self, business_data):
+        """Append a scraped business and update task progress; returns the new total."""
+        with self._lock:
+            self.results.append(business_data)
+            self.task["progress"] = total = len(self.results)
+        if self.store:
+            self.store.add_result(self.task_id, business_data.get("URL"), business_data)
+        if self.on_result:
+            self.on_result(business_data)
+        return total
+
+    def complete_item(self, index):
+        """Checkpoint a finished item so a resumed task skips it."""
+        with self._lock:
+            self.completed.add(index)
+        if self.store:
+            self.store.complete_item(self.task_id, index)
+
+    def spawn_items(self, index, children):
+        """Checkpoint an item that split into `(index, item)` children, together with the children."""
+        with self._lock:
+            self.completed.add(index)
+        if self.store:
+            self.store.spawn_items(self.task_id, index, children)
+
+    def count(self, counter, amount=1):
+        """Bump a named per-task counter shown in progress."""
+        with self._lock:
+            counters = self.task.setdefault("counters", {})
+            counters[counter] = counters.get(counter, 0) + amount
+
+    def running(self):
+        return self.task.get("running", False)
+
+
+def resolve_worker_count(requested, cap):
+    """Clamp a per-task worker request to [1, cap]."""
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        requested = 1
+    return max(1, min(requested, cap))
+
+
+def child_index(root_count, parent_index, k):
+    """
+    Stable index of the k-th child (0-3) of an item. Roots keep 0..root_count-1
+    and every child index maps back to one parent, so checkpoints of spawned
+    items stay valid across restarts.
+    """
+    return root_count + 4 * parent_index + k
+
+
+def run_sharded(pool, items, handler, workers, state, max_attempts=2):
+    """
+    Process `items` with up to `workers` browsers leased from `pool`.
+
+    Workers pull from one shared queue, so a slow tile never stalls the
+    others. `handler(driver, index, item)` is called once per item; items
+    already in `state.completed` are skipped and every item that finishes
+    while the task is still running is checkpointed. A handler may return up
+    to four child items, which are queued under `child_index`; the children
+    are checkpointed with their parent, so a resumed task skips the parent
+    and queues the children it spawned that are not complete yet. An item whose handler raises is retried up to
+    `max_attempts` times in all and then counted as "items_failed". Returns
+    False if items were left unprocessed because workers could not obtain a
+    browser while the task was still running.
+    """
+    work = queue.Queue()
+    pending = [0]
+    pending_lock = threading.Lock()
+    attempts = {}
+
+    def put(index, item):
+        with pending_lock:
+            pending[0] += 1
+        work.put((index, item))
+
+    for index, item in list(enumerate(items)) + state.spawned:
+        if index not in state.completed:
+            put(index, item)
+    if len(items) and work.empty():
+        return True
+
+    workers = max(1, min(workers, work.qsize() or 1))
+
+    def worker(worker_id):
+        while state.running():
+            try:
+                index, item = work.get(timeout=0.5)
+            except queue.Empty:
+                # Another worker may still spawn children of the item it holds
+                with pending_lock:
+                    if not pending[0]:
+                        return
+                continue
+            try:
+                with pool.lease() as driver:
+                    if not driver:
+                        log_message(f"❌ Worker {worker_id} could not obtain a driver")
+                        put(index, item)
+                        return
+                    try:
+                        children = handler(driver, index, item)
+                    except Exception as e:
+                        with pending_lock:
+                            attempts[index] = tried = attempts.get(index, 0) + 1
+                        if tried < max_attempts:
+                            log_message(f"⚠️ Worker {worker_id} failed on item {index}, retrying: {e}")
+                            put(index, item)
+                        else:
+                            log_message(f"❌ Worker {worker_id} gave up on item {index} after {tried} attempts: {e}")
+                            state.count("items_failed")
+                        continue
+                    if children:
+                        spawned = [(child_index(len(items), index, k), child) for k, child in enumerate(children)]
+                        if state.running():
+                            state.spawn_items(index, spawned)
+                        for child_id, child in spawned:
+                            if child_id not in state.completed:
+                                put(child_id, child)
+                    elif state.running():
+                        state.complete_item(index)
+            finally:
+                with pending_lock:
+                    pending[0] -= 1
+
+    threads = [
+        threading.Thread(target=worker, args=(worker_id,), daemon=True)
+        for worker_id in range(workers)
+    ]
+    log_message(f"🧵 Running {work.qsize()} of {len(items) + len(state.spawned)} items on {workers} worker(s)")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if pending[0] and state.running():
+        log_message(f"❌ {pending[0]} items left unprocessed: no worker could obtain a driver")
+        return False
+    return True
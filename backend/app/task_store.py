@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# Task dict keys that are runtime-only and never written to the params column
+RUNTIME_KEYS = {"results", "running", "progress", "error", "counters", "wait_stats", "interrupted", "cancelled", "status", "stage", "units"}
+
+
+def _json_default(value):
+    # numpy arrays and scalars, e.g. the float64 centers of a CSV upload
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class TaskStore:
+    """
+    SQLite (WAL) checkpoint store for scraping tasks.
+
+    Keeps each task's submission parameters, every result as it is appended,
+    the indices of completed coordinates and the child tiles spawned by split
+    ones, so a task interrupted by a restart can resume where it stopped
+    without scraping a finished tile again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS results ("
+            " task_id TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (task_id, url));"
+            "CREATE TABLE IF NOT EXISTS completed_items ("
+            " task_id TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " PRIMARY KEY (task_id, idx));"
+            "CREATE TABLE IF NOT EXISTS spawned_items ("
+            " task_id TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " item TEXT NOT NULL,"
+            " PRIMARY KEY (task_id, idx));"
+        )
+        self._conn.commit()
+
+    def _write(self, sql, args):
+        with self._lock:
+            self._conn.execute(sql, args)
+            self._conn.commit()
+
+    def create(self, task_id, kind, task):
+        """Record a new task; `task` is the in-memory task dict."""
+        params = {key: value for key, value in task.items() if key not in RUNTIME_KEYS}
+        now = time.time()
+        self._write(
+            "INSERT OR REPLACE INTO tasks (task_id, kind, params, status, error, created_at, updated_at)"
+            " VALUES (?, ?, ?, 'running', NULL, ?, ?)",
+            (task_id, kind, json.dumps(params, default=_json_default), now, now),
+        )
+
+    def add_result(self, task_id, url, business_data):
+        """Persist one result; a URL already stored for the task is ignored."""
+        self._write(
+            "INSERT OR IGNORE INTO results (task_id, url, data) VALUES (?, ?, ?)",
+            (task_id, url or "", json.dumps(business_data)),
+        )
+
+    def complete_item(self, task_id, index):
+        self._write(
+            "INSERT OR IGNORE INTO completed_items (task_id, idx) VALUES (?, ?)",
+            (task_id, int(index)),
+        )
+
+    def spawn_items(self, task_id, parent, children):
+        """
+        Store the `(index, item)` children of item `parent` and mark the parent
+        complete in one transaction, so a resume queues the children instead.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO spawned_items (task_id, idx, item) VALUES (?, ?, ?)",
+                ((task_id, int(index), json.dumps(item, default=_json_default)) for index, item in children),
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO completed_items (task_id, idx) VALUES (?, ?)",
+                (task_id, int(parent)),
+            )
+            self._conn.commit()
+
+    def finish(self, task_id, status, error=None):
+        self._write(
+            "UPDATE tasks SET status = ?, error = ?, updated_at = ? WHERE task_id = ?",
+            (status, error, time.time(), task_id),
+        )
+
+    def results(self, task_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM results WHERE task_id = ? ORDER BY rowid", (task_id,)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def processed_urls(self, task_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM results WHERE task_id = ?", (task_id,)).fetchall()
+        return {url for (url,) in rows if url}
+
+    def completed_items(self, task_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT idx FROM completed_items WHERE task_id = ?", (task_id,)).fetchall()
+        return {idx for (idx,) in rows}
+
+    def spawned_items(self, task_id):
+        """`(index, item)` children spawned so far, in index order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, item FROM spawned_items WHERE task_id = ? ORDER BY idx", (task_id,)
+            ).fetchall()
+        return [(idx, json.loads(item)) for idx, item in rows]
+
+    def load(self, task_id):
+        """
+        Rebuild the in-memory task dict for a stored task, or None if unknown.
+        Returns (kind, task).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, params, status, error FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        if not row:
+            return None
+        kind, params, status, error = row
+        task = json.loads(params)
+        task["results"] = self.results(task_id)
+        task["progress"] = len(task["results"])
+        task["running"] = status == "running"
+        task["error"] = error
+        task["status"] = status
+        return kind, task
+
+    def unfinished(self):
+        """Ids of tasks that were still running when the process stopped."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id FROM tasks WHERE status = 'running' ORDER BY created_at"
+            ).fetchall()
+        return [task_id for (task_id,) in rows]
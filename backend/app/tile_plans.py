@@ -0,0 +1,150 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+from .utils import log_message
+
+# Keys the inscriber and Datacube wrap point lists in
+WRAPPER_KEYS = ("result", "documents", "raw_coordinates", "coordinates", "points", "tiles")
+
+
+class InscriberUnavailable(Exception):
+    """The inscriber could not produce a tile plan (unreachable, erroring or still loading)."""
+
+
+def _as_point(item):
+    if isinstance(item, dict) and "latitude" in item and "longitude" in item:
+        return float(item["latitude"]), float(item["longitude"])
+    if isinstance(item, (list, tuple)) and len(item) == 2 and all(isinstance(v, (int, float, str)) for v in item):
+        return float(item[0]), float(item[1])
+    return None
+
+
+def parse_inscriber_tiles(data):
+    """
+    Flatten any inscriber response into a list of (lat, lon) offsets.
+
+    Accepts bare point lists, nested blocks of points, and dicts wrapping
+    them under `result`, `documents`, `raw_coordinates` and similar keys.
+    """
+    tiles = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            point = _as_point(node)
+            if point:
+                tiles.append(point)
+                continue
+            if node.get("error"):
+                log_message(f"⚠️ Inscriber returned an error: {node['error']}")
+            stack.extend(node[key] for key in reversed(WRAPPER_KEYS) if key in node)
+        elif isinstance(node, (list, tuple)):
+            try:
+                point = _as_point(node)
+            except (TypeError, ValueError):
+                point = None
+            if point:
+                tiles.append(point)
+            else:
+                stack.extend(reversed(node))
+    return tiles
+
+
+def quantize_radius(radius_km, step):
+    """Round a radius to the cache grid so 5 and 5.01 km share one plan."""
+    radius_km = float(radius_km)
+    if step <= 0:
+        return radius_km
+    return round(round(radius_km / step) * step, 6)
+
+
+class TilePlanCache:
+    """
+    LRU cache of inscriber tile offsets keyed by quantized radius.
+
+    The tile set only depends on the radius (the bounds are always centred on
+    0,0), so a plan fetched once is reused by every later task. Plans are
+    optionally persisted to a JSON file so restarts do not refetch them.
+    Empty plans are never cached, and errors raised by `fetch` propagate to
+    the caller uncached.
+    """
+
+    def __init__(self, fetch, path=None, max_entries=32, step=0.1):
+        self.fetch = fetch
+        self.path = path
+        self.max_entries = max_entries
+        self.step = step
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            for key, tiles in stored.items():
+                self._plans[float(key)] = [tuple(tile) for tile in tiles]
+            log_message(f"🧩 Loaded {len(self._plans)} tile plans from {self.path}")
+        except Exception as e:
+            log_message(f"⚠️ Could not read tile plans from {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = {str(key): tiles for key, tiles in self._plans.items()}
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            log_message(f"⚠️ Could not write tile plans to {self.path}: {e}")
+
+    def _cached(self, key):
+        with self._lock:
+            tiles = self._plans.get(key)
+            if tiles is not None:
+                self._plans.move_to_end(key)
+            return tiles
+
+    def get(self, radius_km):
+        """Tile offsets for a radius, fetching from the inscriber on a miss."""
+        key = quantize_radius(radius_km, self.step)
+        tiles = self._cached(key)
+        if tiles is not None:
+            return tiles
+
+        # One fetch per radius even if several submissions miss at once
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            tiles = self._cached(key)
+            if tiles is not None:
+                return tiles
+            tiles = self.fetch(key)
+            if not tiles:
+                return []
+            with self._lock:
+                self._plans[key] = tiles
+                self._plans.move_to_end(key)
+                while len(self._plans) > self.max_entries:
+                    self._plans.popitem(last=False)
+            log_message(f"🧩 Cached tile plan for {key} km ({len(tiles)} tiles)")
+        self._save()
+        return tiles
+
+    def warm(self, radii):
+        for radius_km in radii:
+            try:
+                self.get(radius_km)
+            except Exception as e:
+                log_message(f"⚠️ Tile plan warm-up failed for {radius_km} km: {e}")
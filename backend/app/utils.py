@@ -2,11 +2,10 @@ import csv
 import io
 import logging
 import datetime
-import requests
-from typing import List, Dict, Any
-from decouple import config
+from typing import List, Dict, Any, Optional, Tuple
 
-inscriber_url = config("INSCRIBER_URL")
+import numpy as np
+import pandas as pd
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -65,6 +64,57 @@ def format_results_for_csv(results: List[Dict[str, Any]]) -> List[Dict[str, str]
     
     return formatted_results
 
+def csv_coordinate_columns(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Find the latitude and longitude columns of a CSV by reading its header only.
+
+    Args:
+        path: Path of the CSV file
+
+    Returns:
+        (latitude column, longitude column), or None if either is missing
+    """
+    try:
+        columns = pd.read_csv(path, nrows=0).columns
+    except Exception:
+        return None
+    lat_col = next((c for c in columns if str(c).strip().lower() == "latitude"), None)
+    lon_col = next((c for c in columns if str(c).strip().lower() == "longitude"), None)
+    if lat_col is None or lon_col is None:
+        return None
+    return lat_col, lon_col
+
+def read_csv_centers(path: str, chunk_rows: int = 100000) -> np.ndarray:
+    """
+    Read latitude/longitude centers from a CSV in chunks.
+
+    Only the two coordinate columns are parsed. Each chunk is coerced to
+    numbers at once and rows with a missing or non-numeric coordinate are
+    dropped, so memory stays bounded by the chunk size plus the result.
+
+    Args:
+        path: Path of the CSV file
+        chunk_rows: Number of rows parsed per chunk
+
+    Returns:
+        float64 array of shape (n, 2) holding (latitude, longitude) rows
+    """
+    columns = csv_coordinate_columns(path)
+    if not columns:
+        raise ValueError("CSV must contain 'latitude' and 'longitude' columns")
+    lat_col, lon_col = columns
+
+    parts = []
+    for chunk in pd.read_csv(path, usecols=[lat_col, lon_col], chunksize=chunk_rows):
+        lats = pd.to_numeric(chunk[lat_col], errors="coerce").to_numpy(dtype=np.float64)
+        lons = pd.to_numeric(chunk[lon_col], errors="coerce").to_numpy(dtype=np.float64)
+        keep = np.isfinite(lats) & np.isfinite(lons)
+        parts.append(np.column_stack((lats[keep], lons[keep])))
+
+    if not parts:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.concatenate(parts)
+
 def calculate_boundary_points(d):
 
     # d: distance specified by the user in KM
@@ -86,49 +136,3 @@ def calculate_boundary_points(d):
     right_mid = tuple((lat, lon + d*t))
 
     return top_left, top_right, bottom_left, bottom_right
-
-def fetch_inscriber_tiles(bounds):
-    log_message("🔄 Requesting tiles from inscriber")
-    try:
-        payload = {
-            "top_left": bounds[0],
-            "top_right": bounds[1],
-            "bottom_left": bounds[2],
-            "bottom_right": bounds[3]
-        }
-
-        resp = requests.post(inscriber_url, json=payload, timeout=(10, 300))
-        resp.raise_for_status()
-
-        data = resp.json()
-
-        # Log how many points were returned
-        if isinstance(data, list):
-            log_message(f"🧩 Received {len(data)} tiles from inscriber")
-        else:
-            log_message("🧩 Received non-list response from inscriber")
-
-        return data  #return json
-
-    except Exception as e:
-        log_message(f"⚠️ Inscriber fetch failed: {e}")
-        return []
-    
-
-def apply_center_offset(center, inscribed_points):
-    center_lat, center_lon = center
-    final_points = []
-
-    for item in inscribed_points:
-        lat_offset = float(item["latitude"])
-        lon_offset = float(item["longitude"])
-
-        final_lat = center_lat + lat_offset
-        final_lon = center_lon + lon_offset
-
-        final_points.append({
-            "latitude": final_lat,
-            "longitude": final_lon
-        })
-
-    return final_points
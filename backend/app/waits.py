@@ -0,0 +1,159 @@
+import os
+import time
+import random
+import threading
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from .utils import log_message
+
+# Per-stage timeouts (seconds); override with WAIT_TIMEOUT_<STAGE>, e.g. WAIT_TIMEOUT_DETAIL=20
+STAGE_TIMEOUTS = {
+    "results": 20.0,
+    "scroll": 3.0,
+    "detail": 15.0,
+    "back": 10.0,
+}
+
+# Average of the fixed sleeps each stage used to cost, used to report time saved
+SLEEP_BUDGETS = {
+    "results": 8.0,
+    "scroll": 1.2,
+    "detail": 6.5,
+    "back": 2.5,
+    "scroll_into_view": 1.0,
+}
+
+WAIT_POLL_SECONDS = float(os.getenv("WAIT_POLL_SECONDS", "0.1"))
+WAIT_JITTER_MIN = float(os.getenv("WAIT_JITTER_MIN", "0"))
+WAIT_JITTER_MAX = float(os.getenv("WAIT_JITTER_MAX", "0"))
+
+FEED_ITEMS_JS = "return document.querySelectorAll(\"div[role='feed'] a[href*='/maps/place/']\").length"
+DETAIL_TITLE_JS = "const h = document.querySelector('h1.DUwDvf'); return h ? h.innerText.trim() : ''"
+
+
+def _stage_timeout(stage):
+    return float(os.getenv(f"WAIT_TIMEOUT_{stage.upper()}", STAGE_TIMEOUTS.get(stage, 10.0)))
+
+
+# ----------------------------------------------------------------------
+# Conditions: callables taking the driver and returning a truthy value
+# ----------------------------------------------------------------------
+
+def feed_count(driver):
+    try:
+        return int(driver.execute_script(FEED_ITEMS_JS) or 0)
+    except WebDriverException:
+        return 0
+
+
+def detail_title(driver):
+    try:
+        return driver.execute_script(DETAIL_TITLE_JS) or ""
+    except WebDriverException:
+        return ""
+
+
+def feed_count_at_least(n):
+    return lambda driver: feed_count(driver) >= n
+
+
+def feed_count_greater(previous):
+    return lambda driver: feed_count(driver) > previous
+
+
+def detail_title_changed(previous):
+    def condition(driver):
+        title = detail_title(driver)
+        return bool(title) and title != previous
+    return condition
+
+
+def url_changed(previous):
+    return lambda driver: driver.current_url != previous
+
+
+def any_of(*conditions):
+    return lambda driver: any(condition(driver) for condition in conditions)
+
+
+def all_of(*conditions):
+    return lambda driver: all(condition(driver) for condition in conditions)
+
+
+class WaitEngine:
+    """
+    Condition-driven replacement for fixed sleeps.
+
+    Each wait returns as soon as its DOM condition holds (or the stage times
+    out) and is charged against the sleep budget it replaced, so a task can
+    report how much wall-clock time the waits saved.
+    """
+
+    def __init__(self, jitter_min=WAIT_JITTER_MIN, jitter_max=WAIT_JITTER_MAX):
+        self.jitter_min = jitter_min
+        self.jitter_max = max(jitter_min, jitter_max)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _floor(self):
+        if self.jitter_max <= 0:
+            return 0.0
+        return random.uniform(self.jitter_min, self.jitter_max)
+
+    def _record(self, stage, elapsed, budget, timed_out):
+        with self._lock:
+            entry = self._stats.setdefault(stage, {"waits": 0, "seconds": 0.0, "budget": 0.0, "timeouts": 0})
+            entry["waits"] += 1
+            entry["seconds"] += elapsed
+            entry["budget"] += budget
+            entry["timeouts"] += int(timed_out)
+
+    def until(self, driver, condition, stage, timeout=None, budget=None):
+        """Wait until `condition(driver)` holds; returns False on timeout."""
+        timeout = _stage_timeout(stage) if timeout is None else timeout
+        budget = SLEEP_BUDGETS.get(stage, 0.0) if budget is None else budget
+        floor = self._floor()
+        start = time.time()
+        timed_out = False
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=WAIT_POLL_SECONDS).until(condition)
+        except TimeoutException:
+            timed_out = True
+        remaining = floor - (time.time() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        self._record(stage, time.time() - start, budget, timed_out)
+        return not timed_out
+
+    def pause(self, stage, budget=None):
+        """Politeness-only delay for spots that used to sleep without a condition."""
+        budget = SLEEP_BUDGETS.get(stage, 0.0) if budget is None else budget
+        delay = self._floor()
+        if delay:
+            time.sleep(delay)
+        self._record(stage, delay, budget, False)
+
+    def summary(self):
+        with self._lock:
+            stages = {stage: dict(entry) for stage, entry in self._stats.items()}
+        waited = sum(entry["seconds"] for entry in stages.values())
+        budget = sum(entry["budget"] for entry in stages.values())
+        for entry in stages.values():
+            entry["seconds"] = round(entry["seconds"], 2)
+            entry["budget"] = round(entry["budget"], 2)
+        return {
+            "stages": stages,
+            "waited_seconds": round(waited, 2),
+            "sleep_budget_seconds": round(budget, 2),
+            "saved_seconds": round(budget - waited, 2),
+        }
+
+    def log_summary(self, task_id):
+        summary = self.summary()
+        log_message(
+            f"⏱️ Task {task_id} waited {summary['waited_seconds']}s against a sleep budget of "
+            f"{summary['sleep_budget_seconds']}s (saved {summary['saved_seconds']}s)"
+        )
+        return summary
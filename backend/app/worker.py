@@ -0,0 +1,150 @@
+"""
+Out-of-process scraping worker.
+
+    python -m app.worker
+
+Leases one tile at a time from the work broker in STATE_DIR and scrapes it
+with the same engine the API uses in thread mode (app.scraper); none of the
+API's state is loaded here. Run one worker process per
+container; more containers sharing the state volume add throughput.
+"""
+import os
+import time
+import signal
+import socket
+import threading
+
+from . import scraper
+from .broker import WorkBroker
+from .waits import WaitEngine
+from .sharding import child_index
+from .utils import log_message
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", str(scraper.DRIVER_POOL_SIZE)))
+WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "300"))
+WORKER_IDLE_SECONDS = float(os.getenv("WORKER_IDLE_SECONDS", "2"))
+# How long a worker trusts its last look at a job's status before asking the broker again
+WORKER_STATUS_TTL = float(os.getenv("WORKER_STATUS_TTL", "5"))
+
+
+class UnitState:
+    """
+    SharedTaskState stand-in for one leased unit: URL claims and results go
+    through the broker so every worker of a task sees them, and counters are
+    added to the task when the unit completes. `task` is the job's params,
+    where the engine reads the extraction and harvest settings.
+    """
+
+    def __init__(self, broker, task_id, params, waits):
+        self.broker = broker
+        self.task_id = task_id
+        self.task = params
+        self.waits = waits
+        self.counters = {}
+        self.added = 0
+        self._status = None
+        self._checked_at = 0.0
+
+    def claim_url(self, url):
+        return self.broker.claim_url(self.task_id, url)
+
+    def add_result(self, business_data):
+        self.broker.add_result(self.task_id, business_data.get("URL"), business_data)
+        self.added += 1
+        return self.added
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def running(self):
+        if time.time() - self._checked_at > WORKER_STATUS_TTL:
+            self._status = self.broker.job_status(self.task_id)
+            self._checked_at = time.time()
+        return self._status == "running"
+
+
+class Worker:
+    def __init__(self, broker, concurrency):
+        self.broker = broker
+        self.concurrency = max(1, concurrency)
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self._held = set()
+        self._held_lock = threading.Lock()
+
+    def _renew_leases(self):
+        while not self.stopping.wait(WORKER_LEASE_SECONDS / 3):
+            with self._held_lock:
+                held = list(self._held)
+            for task_id, idx, worker_id in held:
+                try:
+                    self.broker.renew(task_id, idx, worker_id, WORKER_LEASE_SECONDS)
+                except Exception as e:
+                    log_message(f"⚠️ Lease renewal failed for {task_id}/{idx}: {e}")
+
+    def _run_unit(self, driver, state, unit):
+        """Scrape one unit; returns the child units of a saturated tile."""
+        idx, item, params = unit["idx"], unit["item"], unit["params"]
+        if unit["kind"] == "coordinates":
+            lat, lon = item[0], item[1]
+            zoom, depth = (item[2], item[3]) if len(item) > 2 else (scraper.COVERAGE_ROOT_ZOOM, 0)
+            loaded = scraper._scrape_coordinate(driver, state, params["keyword"], lat, lon,
+                                                idx, unit["root_count"], zoom)
+            children = scraper._split_saturated_tile(state, lat, lon, zoom, depth, loaded) or []
+            return [(child_index(unit["root_count"], idx, k), child) for k, child in enumerate(children)]
+        scraper._scrape_location_point(driver, state, params["keyword"], params["country"],
+                                       params["city"], item["latitude"], item["longitude"])
+        return []
+
+    def _work(self, slot):
+        worker_id = f"{self.name}/{slot}"
+        waits = WaitEngine()
+        while not self.stopping.is_set():
+            try:
+                unit = self.broker.lease(worker_id, WORKER_LEASE_SECONDS)
+            except Exception as e:
+                log_message(f"⚠️ Broker lease failed: {e}")
+                unit = None
+            if not unit:
+                self.stopping.wait(WORKER_IDLE_SECONDS)
+                continue
+
+            task_id, idx = unit["task_id"], unit["idx"]
+            held = (task_id, idx, worker_id)
+            with self._held_lock:
+                self._held.add(held)
+            state = UnitState(self.broker, task_id, unit["params"], waits)
+            try:
+                with scraper.driver_pool.lease() as driver:
+                    if not driver:
+                        raise RuntimeError("could not obtain a driver")
+                    children = self._run_unit(driver, state, unit)
+                if self.broker.complete(task_id, idx, worker_id, state.counters, children):
+                    log_message(f"✅ Unit {task_id}/{idx} done: {state.added} results, {len(children)} child tiles")
+                else:
+                    log_message(f"⚠️ Unit {task_id}/{idx} finished after its lease was lost; left to the new holder")
+            except Exception as e:
+                log_message(f"❌ Unit {task_id}/{idx} failed: {e}")
+                self.broker.fail(task_id, idx, worker_id, e)
+            finally:
+                with self._held_lock:
+                    self._held.discard(held)
+
+    def run(self):
+        log_message(f"👷 Worker {self.name} polling {self.broker.path} with {self.concurrency} slot(s)")
+        threading.Thread(target=self._renew_leases, daemon=True).start()
+        threads = [threading.Thread(target=self._work, args=(slot,)) for slot in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        scraper.driver_pool.shutdown()
+        log_message(f"👷 Worker {self.name} stopped")
+
+
+if __name__ == "__main__":
+    worker = Worker(WorkBroker(scraper.BROKER_PATH, max_attempts=scraper.BROKER_MAX_ATTEMPTS), WORKER_CONCURRENCY)
+    # Finish the tiles in hand on SIGTERM; anything still leased is retried after its lease expires
+    signal.signal(signal.SIGTERM, lambda *_: worker.stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: worker.stopping.set())
+    worker.run()
@@ -0,0 +1,35 @@
+"""
+Offline record/replay benchmark for the scraping engines.
+
+    python -m bench.record SNAPSHOTS --keyword coffee --point 52.3676,4.9041
+    python -m bench.replay SNAPSHOTS --port 8765 --latency-ms 300
+    python -m bench.run SNAPSHOTS --workers 2 --latency-ms 300
+
+`record` captures live search and place pages plus the fields extracted from
+them (the golden values), `replay` serves the captured pages from a local HTTP
+server and `run` points the real engines at it through MAPS_BASE_URL.
+"""
+import os
+import tempfile
+
+LIVE_MAPS_BASE_URL = "https://www.google.com/maps"
+
+
+def configure_environment(maps_base_url=None, **overrides):
+    """
+    Isolate app.main from live services and persistent state; call before
+    importing it. Overrides are set as environment variables.
+    """
+    settings = {
+        "STATE_DIR": tempfile.mkdtemp(prefix="bench-state-"),
+        "TASK_STORE_ENABLED": "false",
+        "PLACE_CACHE_ENABLED": "false",
+        "CRUD_BASE_URL": "",
+        "CRUD_WRITE_BEHIND": "false",
+        "SCRAPE_EXECUTOR": "thread",
+    }
+    if maps_base_url:
+        settings["MAPS_BASE_URL"] = maps_base_url
+    settings.update({key: str(value) for key, value in overrides.items()})
+    os.environ.update(settings)
+    return settings
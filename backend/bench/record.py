@@ -0,0 +1,93 @@
+"""
+Record live Maps searches and place pages for offline replay.
+
+    python -m bench.record SNAPSHOTS --keyword coffee \\
+        --point 52.3676,4.9041 --point 52.3600,4.8852 \\
+        --city Amsterdam --country Netherlands
+
+Every point is recorded as a coordinate search and, with --city and
+--country, as a location search too. Each search page is scrolled to the end
+of its feed before it is saved; every place it lists (or the first
+--max-places) is opened, saved and extracted into the golden values. Places
+left out are served as "not recorded" pages during replay.
+"""
+import argparse
+
+from . import LIVE_MAPS_BASE_URL, configure_environment
+from .store import SnapshotStore, page_key
+
+
+def _parse_point(value):
+    lat, lon = value.split(",")
+    return float(lat), float(lon)
+
+
+def _record_search(main, driver, waits, store, engine, path, max_places, **fields):
+    driver.get(LIVE_MAPS_BASE_URL + path)
+    if not waits.until(driver, main.feed_count_at_least(1), "results", budget=15.0):
+        main.log_message(f"⚠️ No results for {path}; recorded as empty")
+    main._scroll_feed_to_end(driver, waits, main.COVERAGE_MAX_SCROLLS)
+    store.save_page(path, driver.page_source)
+
+    hrefs = [
+        item.get_attribute("href")
+        for item in driver.find_elements(main.By.XPATH, "//div[@role='feed']//a[contains(@href, '/maps/place/')]")
+    ]
+    places = []
+    recorded = 0
+    for href in hrefs[:max_places or None]:
+        if not href or not href.startswith(LIVE_MAPS_BASE_URL):
+            continue
+        place_path = href[len(LIVE_MAPS_BASE_URL):]
+        places.append(page_key(place_path))
+        if store.has_page(place_path):
+            continue
+        driver.get(href)
+        details = main.extract_restaurant_details(driver, href)
+        store.save_page(place_path, driver.page_source)
+        store.add_golden(place_path, details)
+        recorded += 1
+    # Places the engines can reach from this search; recall is measured against them
+    store.add_search(engine, path, places=places, **fields)
+    main.log_message(f"📼 Recorded {path} with {recorded} new place pages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record Maps pages for bench.replay")
+    parser.add_argument("snapshots")
+    parser.add_argument("--keyword", required=True)
+    parser.add_argument("--point", action="append", type=_parse_point, required=True,
+                        help="lat,lon of a search; repeat for more")
+    parser.add_argument("--zoom", type=int, default=14)
+    parser.add_argument("--city", default="")
+    parser.add_argument("--country", default="")
+    parser.add_argument("--max-places", type=int, default=0,
+                        help="place pages recorded per search; 0 records every listed place")
+    args = parser.parse_args()
+
+    configure_environment(LIVE_MAPS_BASE_URL, DRIVER_BLOCK_PROFILE="off", DRIVER_POOL_SIZE=1)
+    from app import scraper as app_main
+    from app.waits import WaitEngine
+
+    store = SnapshotStore(args.snapshots)
+    driver = app_main.init_driver()
+    if not driver:
+        raise SystemExit("Could not start Chrome")
+    waits = WaitEngine()
+    try:
+        for lat, lon in args.point:
+            path = app_main.coordinate_search_path(args.keyword, lat, lon, args.zoom)
+            _record_search(app_main, driver, waits, store, "coordinates", path, args.max_places,
+                           lat=lat, lon=lon, zoom=args.zoom)
+            if args.city and args.country:
+                path = app_main.location_search_path(args.keyword, args.country, args.city, lat, lon)
+                _record_search(app_main, driver, waits, store, "location", path, args.max_places,
+                               lat=lat, lon=lon)
+    finally:
+        store.save(keyword=args.keyword, city=args.city, country=args.country)
+        driver.quit()
+    print(f"Recorded {len(store.searches)} searches and {len(store.golden)} places into {args.snapshots}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Serve recorded Maps pages from a snapshot directory.
+
+    python -m bench.replay SNAPSHOTS --port 8765 --latency-ms 300 --jitter-ms 200
+
+The Maps root is http://HOST:PORT/maps; point MAPS_BASE_URL at it. Links to
+live Maps inside recorded pages are rewritten to the replay server.
+"""
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import LIVE_MAPS_BASE_URL
+from .store import SnapshotStore
+
+MAPS_PREFIX = "/maps"
+NOT_FOUND_PAGE = b"<html><head><title>Not recorded</title></head><body></body></html>"
+
+
+class ReplayServer:
+    """Threaded HTTP server answering recorded paths after a simulated latency."""
+
+    def __init__(self, store, host="127.0.0.1", port=0, latency_ms=0, jitter_ms=0):
+        self.store = store
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bytes": 0}
+        self._missed = []
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{MAPS_PREFIX}"
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _serve(self, request):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+        path = request.path
+        html = None
+        if path.startswith(MAPS_PREFIX):
+            html = self.store.page(path[len(MAPS_PREFIX):])
+        with self._lock:
+            if html is None:
+                self._stats["misses"] += 1
+                if len(self._missed) < 50:
+                    self._missed.append(path)
+            else:
+                self._stats["hits"] += 1
+        if html is None:
+            request.send_response(404)
+            body = NOT_FOUND_PAGE
+        else:
+            request.send_response(200)
+            body = html.replace(LIVE_MAPS_BASE_URL, self.base_url).encode("utf-8")
+            with self._lock:
+                self._stats["bytes"] += len(body)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["missed_paths"] = list(self._missed)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded Maps pages")
+    parser.add_argument("snapshots")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = ReplayServer(SnapshotStore(args.snapshots), args.host, args.port, args.latency_ms, args.jitter_ms)
+    print(f"Replaying {len(server.store.manifest['pages'])} pages at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
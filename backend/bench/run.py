@@ -0,0 +1,189 @@
+"""
+Benchmark the scraping engines against recorded pages.
+
+    python -m bench.run SNAPSHOTS --workers 2 --latency-ms 300 --output report.json
+
+Starts a replay server, points the real engines at it through MAPS_BASE_URL
+and runs every engine that has recorded searches. Reports businesses per
+minute, seconds per wait stage plus field extraction, and extraction
+accuracy against the golden values. Needs Chrome but no network, so it runs
+in offline CI; --min-accuracy turns it into a gate.
+"""
+import sys
+import json
+import time
+import argparse
+
+from . import configure_environment
+from .replay import ReplayServer
+from .store import SnapshotStore, page_key
+
+ENGINES = ("coordinates", "location")
+COMPARED_FIELDS = (
+    "Name", "Address", "Phone", "Website", "Rating", "Reviews_Count",
+    "Category", "Plus Code", "Hours",
+)
+
+
+def score_results(results, golden, expected_places, base_url):
+    """Recall over the places the searches listed and per-field accuracy against golden values."""
+    found = set()
+    compared = matched = 0
+    mismatches = {}
+    for row in results:
+        url = row.get("URL") or ""
+        if not url.startswith(base_url):
+            continue
+        key = page_key(url[len(base_url):])
+        expected = golden.get(key)
+        if not expected:
+            continue
+        found.add(key)
+        for field in COMPARED_FIELDS:
+            if field not in expected or field not in row:
+                continue
+            compared += 1
+            if str(row[field]).strip() == str(expected[field]).strip():
+                matched += 1
+            else:
+                mismatches[field] = mismatches.get(field, 0) + 1
+    return {
+        "expected_places": len(expected_places),
+        "places_found": len(found & expected_places),
+        "recall": round(len(found & expected_places) / len(expected_places), 3) if expected_places else None,
+        "field_accuracy": round(matched / compared, 3) if compared else None,
+        "mismatches_by_field": mismatches,
+    }
+
+
+def run_engine(main, scraper, store, engine, workers, base_url):
+    searches = [search for search in store.searches if search["engine"] == engine]
+    if not searches:
+        return None
+    manifest = store.manifest
+    task_id = f"bench-{engine}"
+    task = main.tasks[task_id] = {
+        "running": True,
+        "keyword": manifest.get("keyword", ""),
+        "results": [],
+        "stage": "scraping",
+        "workers": workers,
+        "extraction_mode": main.resolve_extraction_mode(None),
+        "harvest_mode": main.resolve_harvest_mode(None),
+    }
+
+    extract_seconds = [0.0]
+    extract = scraper.extract_restaurant_details
+
+    def timed_extract(driver, url, mode=None):
+        started = time.perf_counter()
+        try:
+            return extract(driver, url, mode)
+        finally:
+            extract_seconds[0] += time.perf_counter() - started
+
+    # The engine looks the function up in app.scraper, so that is where it is wrapped
+    scraper.extract_restaurant_details = timed_extract
+    started = time.perf_counter()
+    try:
+        if engine == "coordinates":
+            coords = [(search["lat"], search["lon"], search["zoom"], 0) for search in searches]
+            main.scrape_by_coordinates(task_id, task["keyword"], coords, workers)
+        else:
+            points = [{"latitude": search["lat"], "longitude": search["lon"]} for search in searches]
+            main.scrape_Maps_location(task_id, task["keyword"], manifest.get("country", ""),
+                                      manifest.get("city", ""), points, workers)
+    finally:
+        scraper.extract_restaurant_details = extract
+    elapsed = time.perf_counter() - started
+
+    results = task.get("results", [])
+    stages = {stage: entry["seconds"] for stage, entry in task.get("wait_stats", {}).get("stages", {}).items()}
+    stages["extract"] = round(extract_seconds[0], 2)
+    expected = {place for search in searches for place in search.get("places", [])}
+    return {
+        "searches": len(searches),
+        "businesses": len(results),
+        "seconds": round(elapsed, 2),
+        "businesses_per_minute": round(len(results) / elapsed * 60, 1) if elapsed else 0.0,
+        "stage_seconds": stages,
+        "counters": task.get("counters", {}),
+        "error": task.get("error"),
+        "accuracy": score_results(results, store.golden, expected, base_url),
+    }
+
+
+def print_report(report):
+    print(f"\nBenchmark: {report['snapshots']} ({report['settings']})")
+    for engine, result in report["engines"].items():
+        accuracy = result["accuracy"]
+        print(f"\n[{engine}] {result['businesses']} businesses from {result['searches']} searches "
+              f"in {result['seconds']}s = {result['businesses_per_minute']}/min")
+        for stage, seconds in sorted(result["stage_seconds"].items(), key=lambda item: -item[1]):
+            print(f"  {stage:<18} {seconds:>8.2f}s")
+        print(f"  recall {accuracy['recall']}  field accuracy {accuracy['field_accuracy']}  "
+              f"mismatches {accuracy['mismatches_by_field'] or 'none'}")
+        if result["error"]:
+            print(f"  error: {result['error']}")
+    replay = report["replay"]
+    print(f"\nReplay: {replay['hits']} hits, {replay['misses']} misses")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping engines offline")
+    parser.add_argument("snapshots")
+    parser.add_argument("--engine", choices=ENGINES + ("all",), default="all")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--extraction-mode", default="js")
+    parser.add_argument("--harvest-mode", default="detail")
+    parser.add_argument("--block-profile", default="off")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--min-accuracy", type=float, default=0.0,
+                        help="exit non-zero if any engine's field accuracy is lower")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.snapshots)
+    server = ReplayServer(store, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    settings = {
+        "DRIVER_POOL_SIZE": args.workers,
+        "MAX_WORKERS_PER_TASK": args.workers,
+        "EXTRACTION_MODE": args.extraction_mode,
+        "HARVEST_MODE": args.harvest_mode,
+        "DRIVER_BLOCK_PROFILE": args.block_profile,
+        "DRIVER_NETWORK_METER": "true",
+        # Recorded searches are a closed set; split tiles would hit unrecorded pages
+        "COVERAGE_ADAPTIVE": "false",
+    }
+    configure_environment(server.base_url, **settings)
+    from app import main as app_main, scraper
+
+    report = {
+        "snapshots": args.snapshots,
+        "settings": dict(settings, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms),
+        "engines": {},
+    }
+    try:
+        for engine in ENGINES if args.engine == "all" else (args.engine,):
+            result = run_engine(app_main, scraper, store, engine, args.workers, server.base_url)
+            if result:
+                report["engines"][engine] = result
+        report["driver_pool"] = app_main.driver_pool.stats()
+    finally:
+        app_main.driver_pool.shutdown()
+        report["replay"] = server.stats()
+        server.stop()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    accuracies = [result["accuracy"]["field_accuracy"] or 0.0 for result in report["engines"].values()]
+    if not accuracies or min(accuracies) < args.min_accuracy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+from urllib.parse import unquote
+
+SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+
+
+def page_key(path):
+    """Lookup key of a path below the Maps root; browsers may encode it differently."""
+    return unquote(path or "/")
+
+
+def clean_snapshot(html):
+    """
+    Rendered DOM without scripts: the replayed page is static, so clicking a
+    result is a real navigation to its recorded place page and nothing tries
+    to reach Google.
+    """
+    return SCRIPT_RE.sub("", html)
+
+
+class SnapshotStore:
+    """
+    Directory of recorded pages.
+
+    `manifest.json` lists the recorded searches (engine, coordinates, path),
+    the page file of every path and the golden details of every place page.
+    Pages are stored gzipped under `pages/`. Golden values are the fields
+    extracted at record time and may be corrected by hand.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        os.makedirs(os.path.join(directory, "pages"), exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"searches": [], "pages": {}, "golden": {}}
+
+    @property
+    def searches(self):
+        return self.manifest["searches"]
+
+    @property
+    def golden(self):
+        return self.manifest["golden"]
+
+    def save_page(self, path, html):
+        key = page_key(path)
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".html.gz"
+        with gzip.open(os.path.join(self.directory, "pages", name), "wt", encoding="utf-8") as f:
+            f.write(clean_snapshot(html))
+        self.manifest["pages"][key] = name
+
+    def page(self, path):
+        """Recorded HTML of a path, or None if it was never recorded."""
+        name = self.manifest["pages"].get(page_key(path))
+        if not name:
+            return None
+        with gzip.open(os.path.join(self.directory, "pages", name), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def has_page(self, path):
+        return page_key(path) in self.manifest["pages"]
+
+    def add_search(self, engine, path, **fields):
+        self.manifest["searches"].append(dict(fields, engine=engine, path=path))
+
+    def add_golden(self, path, details):
+        self.manifest["golden"][page_key(path)] = details
+
+    def save(self, **meta):
+        self.manifest.update(meta)
+        self.manifest["recorded_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
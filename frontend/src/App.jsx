@@ -4,6 +4,9 @@ import { FaUpload, FaFileDownload, FaTimes, FaSync, FaSearch, FaMapMarkerAlt, Fa
 import API_BASE_URL from "./config";
 import "./App.css";
 
+// EventSource does not go through axios, so join its paths onto the base without a double slash
+const API_ROOT = API_BASE_URL.replace(/\/+$/, "");
+
 const App = () => {
   const [file, setFile] = useState(null);
   const [keyword, setKeyword] = useState("");
@@ -14,6 +17,8 @@ const App = () => {
   const [results, setResults] = useState([]);
   const [isRunning, setIsRunning] = useState(false);
   const [searchComplete, setSearchComplete] = useState(false);
+  const [stage, setStage] = useState(null);
+  const [queueInfo, setQueueInfo] = useState(null);
 
   const [countries, setCountries] = useState([]);
   const [selectedCountry, setSelectedCountry] = useState("");
@@ -24,7 +29,9 @@ const App = () => {
   const [loadingCities, setLoadingCities] = useState(false);
   const [error, setError] = useState(null);
 
-  const intervalRef = useRef(null);
+  const pollTimerRef = useRef(null);
+  const eventSourceRef = useRef(null);
+  const cursorRef = useRef(0);
   const fileInputRef = useRef(null);
 
   const [countrySearch, setCountrySearch] = useState("");
@@ -33,6 +40,8 @@ const App = () => {
   // Add these new state variables
   const [searchType, setSearchType] = useState("file"); // "file" or "location"
   const [radiusKm, setRadiusKm] = useState(5);
+  const [workers, setWorkers] = useState(1);
+  const [cardsOnly, setCardsOnly] = useState(false);
 
   const [forceStop, setForceStop] = useState(false);
 
@@ -112,6 +121,8 @@ const App = () => {
       formData.append("keyword", keyword);
       formData.append("email", email);
       formData.append("radius_km", String(radiusKm));
+      formData.append("workers", String(workers));
+      formData.append("harvest_mode", cardsOnly ? "cards" : "detail");
 
       setIsRunning(true);
 
@@ -134,6 +145,8 @@ const App = () => {
       formData.append("country", selectedCountry);
       formData.append("city", selectedCity);
       formData.append("radius_km", String(radiusKm));
+      formData.append("workers", String(workers));
+      formData.append("harvest_mode", cardsOnly ? "cards" : "detail");
 
       setIsRunning(true);
 
@@ -148,6 +161,17 @@ const App = () => {
     }
   };
 
+  const stopProgress = () => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+    if (pollTimerRef.current) {
+      clearTimeout(pollTimerRef.current);
+      pollTimerRef.current = null;
+    }
+  };
+
   // Add this useEffect
   useEffect(() => {
     function handleClickOutside(event) {
@@ -171,39 +195,90 @@ const App = () => {
 
   useEffect(() => {
     if (taskId && isRunning && !forceStop) {
-      intervalRef.current = setInterval(async () => {
+      cursorRef.current = 0;
+      setResults([]);
+      setStage(null);
 
-        if (forceStop) {
-          clearInterval(intervalRef.current);
-          intervalRef.current = null;
-          return;
+      const finish = () => {
+        setIsRunning(false);
+        setSearchComplete(true);
+        stopProgress();
+      };
+
+      const showStatus = (status) => {
+        setStage(status.stage);
+        setQueueInfo(
+          status.queue_position
+            ? { position: status.queue_position, start: status.estimated_start }
+            : null
+        );
+        // Submission stages (parsing, geocoding, planning) fail before any scraping starts
+        if (status.stage === "failed" && status.error) {
+          alert(status.error);
         }
+      };
 
-        try {
-          const response = await axios.get(`/progress/${taskId}`);
-          if (response.data.results) {
-            setResults(response.data.results);
-          }
-          if (!response.data.running) {
-            setIsRunning(false);
-            setSearchComplete(true);
-            clearInterval(intervalRef.current);
-            intervalRef.current = null;
-          }
-        } catch (error) {
-          console.error("Error fetching progress", error);
-          clearInterval(intervalRef.current);
-          intervalRef.current = null;
+      const appendResults = (rows, next) => {
+        if (rows && rows.length) {
+          setResults((previous) => previous.concat(rows));
         }
-      }, 2000);
+        if (typeof next === "number") {
+          cursorRef.current = next;
+        }
+      };
+
+      // Fall back to cursor-based polling when streaming is unavailable.
+      // The next poll is scheduled only after a response, so one request is in flight at a time.
+      const startPolling = () => {
+        const poll = async () => {
+          const since = cursorRef.current;
+          try {
+            const response = await axios.get(`/progress/${taskId}`, {
+              params: { since },
+            });
+            // Drop responses that arrive after polling stopped or for a cursor that has moved on
+            if (!pollTimerRef.current || since !== cursorRef.current) {
+              return;
+            }
+            appendResults(response.data.results, response.data.next);
+            showStatus(response.data);
+            if (!response.data.running) {
+              finish();
+              return;
+            }
+            pollTimerRef.current = setTimeout(poll, 2000);
+          } catch (error) {
+            console.error("Error fetching progress", error);
+            stopProgress();
+          }
+        };
+        pollTimerRef.current = setTimeout(poll, 2000);
+      };
+
+      if (window.EventSource) {
+        const source = new EventSource(
+          `${API_ROOT}/progress/${taskId}/stream?since=${cursorRef.current}`
+        );
+        eventSourceRef.current = source;
+        source.addEventListener("results", (event) => {
+          const data = JSON.parse(event.data);
+          appendResults(data.results, data.next);
+        });
+        source.addEventListener("status", (event) => {
+          showStatus(JSON.parse(event.data));
+        });
+        source.addEventListener("done", finish);
+        source.onerror = () => {
+          source.close();
+          eventSourceRef.current = null;
+          startPolling();
+        };
+      } else {
+        startPolling();
+      }
     }
 
-    return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
-        intervalRef.current = null;
-      }
-    };
+    return stopProgress;
   }, [taskId, isRunning, forceStop]);
 
   const handleCancel = async () => {
@@ -215,11 +290,8 @@ const App = () => {
       try {
         await axios.post(`/cancel/${taskId}`);
 
-        // Stop progress polling
-        if (intervalRef.current) {
-          clearInterval(intervalRef.current);
-          intervalRef.current = null;
-        }
+        // Stop progress streaming
+        stopProgress();
 
         // Reset state
         setTaskId(null);
@@ -414,6 +486,33 @@ const App = () => {
                 </label>
               </div>
 
+              <div className="input-container">
+                <label className="slider-label" style={{ width: '100%' }}>
+                  Parallel browsers: {workers}
+                  <input
+                    type="range"
+                    min="1"
+                    max="8"
+                    step="1"
+                    value={workers}
+                    onChange={(e) => setWorkers(Number(e.target.value))}
+                    className="slider-input"
+                    style={{ width: '100%' }}
+                  />
+                </label>
+              </div>
+
+              <div className="input-container">
+                <label className="slider-label" style={{ width: '100%' }}>
+                  <input
+                    type="checkbox"
+                    checked={cardsOnly}
+                    onChange={(e) => setCardsOnly(e.target.checked)}
+                  />{" "}
+                  Quick list (read result cards, skip detail pages)
+                </label>
+              </div>
+
               {/* Location Selection - Only shown when location search type is selected */}
               {searchType === "location" && (
                 <>
@@ -527,7 +626,13 @@ const App = () => {
               {isRunning && (
                 <div className="running-indicator">
                   <div className="spinner"></div>
-                  <p className="running-text">Scraping in progress…</p>
+                  <p className="running-text">
+                    {stage === "waiting" && queueInfo
+                      ? `Waiting for a free browser: #${queueInfo.position} in queue, starts around ${new Date(queueInfo.start * 1000).toLocaleTimeString()}…`
+                      : stage && stage !== "scraping"
+                        ? `Preparing search (${stage})…`
+                        : "Scraping in progress…"}
+                  </p>
 
                   <button
                     onClick={handleCancel}
@@ -1,9 +1,15 @@
+import os
 import re
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from openpyxl import load_workbook
 from pymongo import MongoClient, GEOSPHERE
 import bisect
-import requests
+from get_coords.http_client import HttpClient
 import json
+import numpy as np
 from decouple import config
 
 datacube_url = config("BASE_DATACUBE_URL")
@@ -13,11 +19,93 @@ crud_url=datacube_url+"/api/crud/"
 create_url=datacube_url+"/api/create_database/"
 add_colls_url = datacube_url+"/api/add_collection/"
 api_key=config("API_KEY")
+INDEX_COLLECTION_NAME = config("INDEX_COLLECTION_NAME", default="latitude_index")
+
+# Ingestion tuning
+INGEST_WORKERS = config("INGEST_WORKERS", default=8, cast=int)
+INGEST_BATCH_SIZE = config("INGEST_BATCH_SIZE", default=500, cast=int)
+COLLECTION_BATCH_SIZE = config("COLLECTION_BATCH_SIZE", default=100, cast=int)
+REQUEST_TIMEOUT = config("REQUEST_TIMEOUT", default=120, cast=float)
+
+# Pooled keep-alive client shared by every Datacube call of this script
+http = HttpClient(read_timeout=REQUEST_TIMEOUT, pool_size=INGEST_WORKERS)
+
+COORD_RE = re.compile(r'\(([^,]+),\s*([^)]+)\)')
 
 headers = {
         "Authorization": f"Api-Key {api_key}",
         "Content-Type": "application/json"
     }
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def decode_workbook(file_path):
+    """
+    Parses every "(lat, lon)" cell of the lattice workbook in one pass.
+    Returns latitude, longitude and worksheet row arrays in workbook order.
+    """
+    lats, lons, rows = [], [], []
+
+    wb = load_workbook(filename=file_path, read_only=True)
+    sheet = wb.active
+    for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True)):
+        for value in row[1:]:
+            if not value or not isinstance(value, str):
+                continue
+
+            match = COORD_RE.match(value.strip())
+            if not match:
+                continue
+
+            # First value is latitude, second is longitude
+            lat_str, lon_str = match.groups()
+            try:
+                lat_val = float(lat_str.strip())
+                lon_val = float(lon_str.strip())
+            except ValueError:
+                continue
+            lats.append(lat_val)
+            lons.append(lon_val)
+            rows.append(row_idx)
+    wb.close()
+
+    return (
+        np.array(lats, dtype=np.float64),
+        np.array(lons, dtype=np.float64),
+        np.array(rows, dtype=np.int32),
+    )
+
+
+def load_coordinates(file_path, cache_path=None):
+    """
+    Decoded lattice arrays, read from a .npz cache next to the workbook when
+    the cache was built from a workbook with the same SHA-256.
+    """
+    cache_path = cache_path or f"{file_path}.coords.npz"
+    digest = file_sha256(file_path)
+
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as cached:
+                if str(cached["sha256"]) == digest:
+                    return cached["lat"], cached["lon"], cached["row"]
+        except Exception as e:
+            print(f"Ignoring unreadable coordinate cache {cache_path}: {e}")
+
+    start = time.time()
+    lats, lons, rows = decode_workbook(file_path)
+    tmp_path = cache_path + ".tmp.npz"
+    np.savez(tmp_path, lat=lats, lon=lons, row=rows, sha256=np.array(digest))
+    os.replace(tmp_path, cache_path)
+    print(f"Decoded {len(lats)} coordinates from {file_path} in {time.time() - start:.1f}s, cached at {cache_path}")
+    return lats, lons, rows
+
+
 def store_coordinates(file_path, mongo_uri='mongodb://localhost:27017/'):
     """
     Reads coordinates from Excel, stores in MongoDB with correct (lat, lon) order,
@@ -35,57 +123,38 @@ def store_coordinates(file_path, mongo_uri='mongodb://localhost:27017/'):
     # Track processed latitudes
     processed_lats = set()
     
-    wb = load_workbook(filename=file_path, read_only=True)
-    sheet = wb.active
+    lats, lons, _ = load_coordinates(file_path)
     
-    for row_idx, row in enumerate(sheet.iter_rows(min_row=2)):
-        for col_idx, cell in enumerate(row[1:], start=1):
-            value = cell.value
-            if not value or not isinstance(value, str):
-                continue
-                
-            match = re.match(r'\(([^,]+),\s*([^)]+)\)', value.strip())
-            if not match:
-                continue
-                
-            # Extract and swap values: first is latitude, second is longitude
-            lat_str, lon_str = match.groups()
-            try:
-                lat_val = float(lat_str.strip())
-                lon_val = float(lon_str.strip())
-            except ValueError:
-                continue
-                
-            # Create collection name from latitude
-            collection_name = f"lat_{lat_val:.6f}"
-            
-            # Insert into raw database
-            raw_coll = db_raw[collection_name]
-            raw_coll.insert_one({
+    for lat_val, lon_val in zip(lats.tolist(), lons.tolist()):
+        # Create collection name from latitude
+        collection_name = f"lat_{lat_val:.6f}"
+        
+        # Insert into raw database
+        raw_coll = db_raw[collection_name]
+        raw_coll.insert_one({
+            'latitude': lat_val,
+            'longitude': lon_val
+        })
+        
+        # Insert into GeoJSON database
+        geo_coll = db_geo[collection_name]
+        geo_coll.insert_one({
+            'location': {
+                'type': 'Point',
+                'coordinates': [lon_val, lat_val]  # GeoJSON: [lon, lat]
+            }
+        })
+        
+        # Create geospatial index for new collections
+        if lat_val not in processed_lats:
+            geo_coll.create_index([('location', GEOSPHERE)])
+            # Add to unified index
+            lat_index_coll.insert_one({
                 'latitude': lat_val,
-                'longitude': lon_val
-            })
-            
-            # Insert into GeoJSON database
-            geo_coll = db_geo[collection_name]
-            geo_coll.insert_one({
-                'location': {
-                    'type': 'Point',
-                    'coordinates': [lon_val, lat_val]  # GeoJSON: [lon, lat]
-                }
+                'collection': collection_name
             })
-            
-            # Create geospatial index for new collections
-            if lat_val not in processed_lats:
-                geo_coll.create_index([('location', GEOSPHERE)])
-                # Add to unified index
-                lat_index_coll.insert_one({
-                    'latitude': lat_val,
-                    'collection': collection_name
-                })
-                processed_lats.add(lat_val)
+            processed_lats.add(lat_val)
     
-    wb.close()
     client.close()
 
 def query_by_four_corners(top_left, top_right, bottom_left, bottom_right, 
@@ -189,7 +258,7 @@ def create_database_datacube(file_path):
                 }
     # payload = json.dumps(payload)
     print(f"payload dumped ={payload} and type = {type(payload)}")    
-    response =  requests.post(create_url,json=payload,headers=headers)
+    response =  http.post(create_url,json=payload,headers=headers)
     print(f"status code = {response.status_code}")
     print(f"status content = {response.text}")
     # Track processed latitudes
@@ -197,8 +266,6 @@ def create_database_datacube(file_path):
     processed_lats = set()
     count=0
     
-    wb = load_workbook(filename=file_path, read_only=True)
-    sheet = wb.active
     
     # for row_idx, row in enumerate(sheet.iter_rows(min_row=2)):
     #     for col_idx, cell in enumerate(row[1:], start=1):
@@ -231,20 +298,12 @@ def create_database_datacube(file_path):
     #     print(f"status code = {response.status_code}")
     #     print(f"status content = {response.text}")
     #     payload['collections']=[]
-    wb.close()
-def add_collections(file_path, database_id):
-    payload={
-                    
-    "database_id": database_id,
-    # "db_name":"inscribinglocationsraw",
-    "collections": []
-                }
-    # payload = json.dumps(payload)
-    # print(f"payload dumped ={payload} and type = {type(payload)}")    
-    # response =  requests.post(create_url,json=payload)
-    # print(f"status code = {response.status_code}")
-    # print(f"status content = {response.text}")
-    # Track processed latitudes
+def add_collections(file_path, database_id, batch_size=None):
+    """
+    Creates every latitude collection of the lattice that does not exist yet,
+    posting the missing collections in batches over the pooled client.
+    """
+    batch_size = batch_size or COLLECTION_BATCH_SIZE
     processed_lats_lst =  [
   "lat_0-899322",
   "lat_0-890328",
@@ -306,134 +365,173 @@ def add_collections(file_path, database_id):
   "lat_0-386708"
 ]
     processed_lats = set(processed_lats_lst)
-    count=0
-    
-    wb = load_workbook(filename=file_path, read_only=True)
-    sheet = wb.active
-    for row_idx, row in enumerate(sheet.iter_rows(min_row=2)):
-        for col_idx, cell in enumerate(row[1:], start=1):
-            value = cell.value
-            if not value or not isinstance(value, str):
-                continue
-                
-            match = re.match(r'\(([^,]+),\s*([^)]+)\)', value.strip())
-            if not match:
-                continue
-                
-            # Extract and swap values: first is latitude, second is longitude
-            lat_str, lon_str = match.groups()
-            try:
-                lat_val = float(lat_str.strip())
-                lon_val = float(lon_str.strip())
-            except ValueError:
-                continue
-            # Create collection name from latitude
-            collection_name = f"lat_{lat_val:.6f}"
-            collection_name=collection_name.replace('.', '-')
-            if collection_name in processed_lats:
-                continue
-            # field_names = ["latitude","longitude"]
-            field_names=[{"name":"latitude","type":"number"}, {"name":"longitude","type":"number"}]
-            temp_collection = {
-                            "name": collection_name,
-                            "fields": field_names
-                        }
-            payload['collections'].append(temp_collection)
-            processed_lats.add(collection_name)
-        print(f"Lenght of collections now =====> {len(payload['collections'])} <=======")
-        # print(f"collections = {payload['collections']} about to be inserted")
-        if len(payload["collections"]):
-            print(f"Lenght of collections = {len(payload['collections'])} about to be inserted") 
-            response =  requests.post(add_colls_url,json=payload, headers=headers)
-            count +=1
-            print(f"status code of count {count} = {response.status_code}")
-            print(f"status content of count {count}= {response.text}")
-            payload['collections']=[]
-            print(f"Lenght of collections = {len(payload['collections'])} after insert")
-    wb.close()
 
-def insert_data_datacube(file_path, database_id):
-    """
-    Reads coordinates from Excel, stores in MongoDB with correct (lat, lon) order,
-    and creates optimized index collections.
-    """    
-    
-    # Create unified index collection
-    # index_db = client['coordinate_index_db']
-    # lat_index_coll = index_db['latitude_index']
-    # lat_index_coll.create_index("latitude")
-    lat_index_payload = {
-    "database_id": database_id,
-    "collection_name": "latitude_index",
-    "data": []
-    }
-    
-    
-    # Track processed latitudes
-   
-    processed_lats = set()
-    
-    wb = load_workbook(filename=file_path, read_only=True)
-    sheet = wb.active
-    count=0
-    
-    for row_idx, row in enumerate(sheet.iter_rows(min_row=2)):
-        for col_idx, cell in enumerate(row[1:], start=1):
-            value = cell.value
-            if not value or not isinstance(value, str):
-                continue
-                
-            match = re.match(r'\(([^,]+),\s*([^)]+)\)', value.strip())
-            if not match:
-                continue
-                
-            # Extract and swap values: first is latitude, second is longitude
-            lat_str, lon_str = match.groups()
-            try:
-                lat_val = float(lat_str.strip())
-                lon_val = float(lon_str.strip())
-            except ValueError:
-                continue
-                
-            # Create collection name from latitude
-            collection_name = f"lat_{lat_val:.6f}"
-            collection_name=collection_name.replace('.', '-')
-            
-            # Insert into raw database
-            raw_payload = {
+    points_by_collection, _ = read_lattice(file_path)
+    missing = [name for name in points_by_collection if name not in processed_lats]
+    field_names=[{"name":"latitude","type":"number"}, {"name":"longitude","type":"number"}]
+
+    for count, start in enumerate(range(0, len(missing), batch_size), start=1):
+        payload = {
             "database_id": database_id,
-            "collection_name": collection_name,
-            "data": [
-                {
-                'latitude': lat_val,
-                'longitude': lon_val
-            }
+            "collections": [
+                {"name": name, "fields": field_names}
+                for name in missing[start:start + batch_size]
             ]
+        }
+        response = http.post(add_colls_url, json=payload, headers=headers)
+        print(f"collections batch {count}: {len(payload['collections'])} collections, status code = {response.status_code}")
+        if not response.ok:
+            print(f"collections batch {count} status content = {response.text}")
+
+def read_lattice(file_path):
+    """
+    Groups the decoded lattice by target collection (in workbook order) and
+    builds the latitude index entries, one per distinct latitude.
+    """
+    points_by_collection = {}
+    lat_index = {}
+
+    lats, lons, _ = load_coordinates(file_path)
+    for lat_val, lon_val in zip(lats.tolist(), lons.tolist()):
+        # Collection name from latitude
+        collection_name = f"lat_{lat_val:.6f}".replace('.', '-')
+        points_by_collection.setdefault(collection_name, []).append({
+            'latitude': lat_val,
+            'longitude': lon_val
+        })
+        if lat_val not in lat_index:
+            lat_index[lat_val] = {
+                'latitude': lat_val,
+                'collection': collection_name
             }
-            response = requests.post(crud_url,json=raw_payload, headers=headers)
-            count +=1
-            print(f"raw payload count ={count}  status code = {response.status_code}")
-            print(f"raw payload count ={count} status content = {response.text}")
-
-            
-            
-            # Create geospatial index for new collections
-            if lat_val not in processed_lats:
-                # geo_coll.create_index([('location', GEOSPHERE)])
-                # # Add to unified index
-                # lat_index_coll.insert_one({
-                #     'latitude': lat_val,
-                #     'collection': collection_name
-                # })
-                lat_index_payload["data"].append({
-                    'latitude': lat_val,
-                    'collection': collection_name
-                })
-                processed_lats.add(lat_val)
-    res=requests.post(crud_url, json=lat_index_payload, headers=headers)
-    print(f"lat index res status code = {res.status_code}")
-    print(f"lat index status content = {res.text}")
-    wb.close()
+    return points_by_collection, list(lat_index.values())
+
+
+class IngestionManifest:
+    """
+    Records which batches have been stored so an interrupted ingestion can be
+    rerun and skip them. Written atomically after every batch.
+
+    The manifest belongs to one workbook (by SHA-256) and database. A
+    manifest left by a different workbook or database is discarded, and a
+    rerun of the same workbook keeps the batch size it was started with, so
+    batch boundaries never shift under the recorded ones.
+    """
+
+    def __init__(self, path, sha256, database_id, batch_size):
+        self.path = path
+        self._lock = threading.Lock()
+        self.sha256 = sha256
+        self.database_id = database_id
+        self.batch_size = batch_size
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("sha256") == sha256 and stored.get("database_id") == database_id:
+                self.done = set(stored.get("done", []))
+                recorded_size = stored.get("batch_size")
+                if self.done and recorded_size and recorded_size != batch_size:
+                    print(f"Resuming with batch size {recorded_size} recorded in {path} instead of {batch_size}")
+                    self.batch_size = recorded_size
+            else:
+                print(f"Workbook or database changed since {path} was written; starting a fresh ingestion")
+
+    def mark(self, batch_id):
+        with self._lock:
+            self.done.add(batch_id)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "sha256": self.sha256,
+                    "database_id": self.database_id,
+                    "batch_size": self.batch_size,
+                    "done": sorted(self.done),
+                }, f)
+            os.replace(tmp_path, self.path)
+
+
+def _batches(collection_name, documents, batch_size):
+    for start in range(0, len(documents), batch_size):
+        end = min(start + batch_size, len(documents))
+        yield f"{collection_name}:{start}-{end}", collection_name, documents[start:end]
+
+
+def insert_data_datacube(file_path, database_id, workers=None, batch_size=None, manifest_path=None):
+    """
+    Reads the lattice workbook once and inserts every point into its latitude
+    collection, plus the latitude index.
+
+    Points are posted in batches per collection on a bounded thread pool that
+    shares the pooled client. Finished batches are recorded in a manifest, so
+    rerunning after a crash only sends what is missing.
+    """
+    workers = workers or INGEST_WORKERS
+    manifest = IngestionManifest(
+        manifest_path or f"{file_path}.manifest.json",
+        file_sha256(file_path),
+        database_id,
+        batch_size or INGEST_BATCH_SIZE,
+    )
+    batch_size = manifest.batch_size
+
+    points_by_collection, lat_index = read_lattice(file_path)
+    batches = [
+        batch
+        for collection_name, documents in points_by_collection.items()
+        for batch in _batches(collection_name, documents, batch_size)
+    ]
+    batches.extend(_batches(INDEX_COLLECTION_NAME, lat_index, batch_size))
+    pending = [batch for batch in batches if batch[0] not in manifest.done]
+
+    total_points = sum(len(batch[2]) for batch in pending)
+    print(f"{len(pending)} of {len(batches)} batches pending ({total_points} documents), {workers} workers")
+
+    stats = {"documents": 0, "failed": 0}
+    stats_lock = threading.Lock()
+    start = time.time()
+
+    def post_batch(batch):
+        batch_id, collection_name, documents = batch
+        payload = {
+            "database_id": database_id,
+            "collection_name": collection_name,
+            "data": documents
+        }
+        response = http.post(crud_url, json=payload, headers=headers)
+        if not response.ok:
+            raise Exception(f"status {response.status_code}: {response.text[:200]}")
+        manifest.mark(batch_id)
+        return len(documents)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(post_batch, batch): batch for batch in pending}
+        for future in as_completed(futures):
+            batch_id = futures[future][0]
+            try:
+                stored = future.result()
+            except Exception as e:
+                with stats_lock:
+                    stats["failed"] += 1
+                print(f"batch {batch_id} failed: {e}")
+                continue
+            with stats_lock:
+                stats["documents"] += stored
+                done = stats["documents"]
+            elapsed = max(time.time() - start, 1e-6)
+            if done == total_points or done % (batch_size * 10) < stored:
+                print(f"{done}/{total_points} documents stored, {done / elapsed:.0f} points/sec")
+
+    elapsed = max(time.time() - start, 1e-6)
+    print(
+        f"Ingestion finished: {stats['documents']} documents in {elapsed:.1f}s "
+        f"({stats['documents'] / elapsed:.0f} points/sec), {stats['failed']} failed batches"
+    )
+    for endpoint, entry in http.stats().items():
+        print(f"{endpoint}: {entry['calls']} calls, {entry['errors']} errors, {entry['retries']} retries, avg {entry['avg_ms']} ms")
+    if stats["failed"]:
+        print("Rerun to retry the failed batches; stored batches are skipped")
+    return stats
 
 def query_by_four_corners_datacube(top_left, top_right, bottom_left, bottom_right, 
                          database_id):
@@ -463,7 +561,7 @@ def query_by_four_corners_datacube(top_left, top_right, bottom_left, bottom_righ
     # Get sorted latitude index
     # lat_index = index_db['latitude_index']
     # print(f"lat_index = {lat_index}")
-    lat_index = requests.get(url)
+    lat_index = http.get(url)
     sorted_lats = sorted([doc['latitude'] for doc in lat_index['data']])
     print(f"sorted lats = {sorted_lats}")
     # Find latitude range using binary search
@@ -485,7 +583,7 @@ def query_by_four_corners_datacube(top_left, top_right, bottom_left, bottom_righ
         raw_parameters = f"?database_id={database_id}&collection_name={coll_name}&filters={fil}&page=1&page_size=200"
         
         raw_url= crud_url+raw_parameters
-        raw_coll= requests.get(raw_url)
+        raw_coll= http.get(raw_url)
         raw_docs = list(raw_coll['data'].find({
             'longitude': {'$gte': lon_min, '$lte': lon_max}
         }))
@@ -523,9 +621,10 @@ database_detail =  {"success":True,"database":{"id":config("DATABASE_ID"),"name"
 culprit_filename="scaled_coordinates_200_200_0_0.xlsx"
 culprit_database_id= config("DATABASE_ID")
 
-# create_database_datacube(culprit_filename)
-# add_collections(culprit_filename,culprit_database_id)
-insert_data_datacube(culprit_filename,culprit_database_id)
+if __name__ == "__main__":
+    # create_database_datacube(culprit_filename)
+    # add_collections(culprit_filename,culprit_database_id)
+    insert_data_datacube(culprit_filename,culprit_database_id)
 # print(f"Length == {type(colls)}")
 # print(f"Length == {colls.keys()}")
 # print(f"Length == {len(colls.json()['collections'])}")
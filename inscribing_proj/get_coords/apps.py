@@ -1,6 +1,16 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
 class GetCoordsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'get_coords'
+
+    def ready(self):
+        # Skip the runserver autoreloader's parent process
+        if "runserver" in sys.argv and os.environ.get("RUN_MAIN") != "true":
+            return
+        from .spatial_index import start_refresher
+        start_refresher()
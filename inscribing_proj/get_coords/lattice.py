@@ -0,0 +1,79 @@
+import numpy as np
+
+
+# 1 KM = 0.00899321605918700 degrees
+SCALE_DEG_PER_KM = 0.00899321605918700
+
+# Lattice the stored Datacube coordinates were generated with
+DEFAULT_RADIUS = 1.0
+DEFAULT_CANVAS = 200
+
+
+# ============================================================
+# Axis values (closed form of the notebook's seq1 / seq2)
+# ============================================================
+
+def _positive_steps(extent, step):
+    """
+    step, 2*step, ... accumulated by repeated addition while <= extent / 2,
+    capped at 10 * extent - 1 values like the notebook loop.
+    """
+    iterations = int(10 * extent)
+    limit = extent / 2
+    n = min(iterations - 1, int(np.ceil(limit / step)) + 3)
+    while True:
+        # add.accumulate adds sequentially, matching `count += step`
+        counts = np.add.accumulate(np.full(max(n, 0), float(step)))
+        over = np.flatnonzero(counts > limit)
+        if len(over) or n >= iterations - 1:
+            return counts[:over[0]] if len(over) else counts
+        n = min(iterations - 1, n * 2)
+
+
+def axis_values(extent, step):
+    """Column (x) values in notebook order: ascending, centred on 0."""
+    positive = _positive_steps(extent, step)
+    return np.concatenate((-positive[::-1], [0.0], positive))
+
+
+# ============================================================
+# Lattice query
+# ============================================================
+
+def lattice_points(lat_min, lat_max, lon_min, lon_max, radius=DEFAULT_RADIUS,
+                   length=DEFAULT_CANVAS, width=DEFAULT_CANVAS, scale=SCALE_DEG_PER_KM):
+    """
+    Inscribed-circle centres inside a bounding box, as (lats, lons) offsets.
+
+    Reproduces inscribing_for_scrapper.ipynb: x values come from the canvas
+    length, y values from the width, a cell (row i, column j) holds a circle
+    when i and j have the same parity (plus the centre), and a point (x, y)
+    maps to (lat, lon) = (scale * y, scale * x). Only the rows and columns
+    that fall inside the box are materialised.
+    """
+    xs = axis_values(length, radius)
+    # Rows run from +y down to -y in the notebook, so row index i = last - position
+    ys = axis_values(width, radius)
+    last_row = len(ys) - 1
+    lats_axis = scale * ys
+    lons_axis = scale * xs
+
+    col_start = np.searchsorted(lons_axis, lon_min, side="left")
+    col_stop = np.searchsorted(lons_axis, lon_max, side="right")
+    pos_start = np.searchsorted(lats_axis, lat_min, side="left")
+    pos_stop = np.searchsorted(lats_axis, lat_max, side="right")
+    if col_start >= col_stop or pos_start >= pos_stop:
+        return np.empty(0), np.empty(0)
+
+    cols = np.arange(col_start, col_stop)
+    positions = np.arange(pos_start, pos_stop)
+    rows = last_row - positions
+
+    keep = (rows[:, None] % 2) == (cols[None, :] % 2)
+    centre_col = len(xs) // 2
+    centre_pos = len(ys) // 2
+    if pos_start <= centre_pos < pos_stop and col_start <= centre_col < col_stop:
+        keep[centre_pos - pos_start, centre_col - col_start] = True
+
+    pos_idx, col_idx = np.nonzero(keep)
+    return lats_axis[positions[pos_idx]], lons_axis[cols[col_idx]]
@@ -2,9 +2,10 @@ import os
 import json
 import time
 import traceback
-import requests
 from decouple import config
 
+from .http_client import http
+
 
 # ============================================================
 # Load environment variables safely
@@ -39,7 +40,7 @@ except Exception:
 # Datacube Generic Query
 # ============================================================
 
-def get_data_datacube(collection_name=None, filters=None, page_size=200):
+def get_data_datacube(collection_name=None, filters=None, page_size=200, page=1):
 
     if collection_name is None:
         collection_name = INDEX_COLLECTION_NAME
@@ -51,12 +52,12 @@ def get_data_datacube(collection_name=None, filters=None, page_size=200):
         "database_id": DATABASE_ID,
         "collection_name": collection_name,
         "filters": json.dumps(filters),
-        "page": 1,
+        "page": page,
         "page_size": page_size,
     }
 
     try:
-        response = requests.get(CRUD_URL, params=params, headers=HEADERS)
+        response = http.get(CRUD_URL, params=params, headers=HEADERS)
         response.raise_for_status()
         return response.json()
 
@@ -66,6 +67,44 @@ def get_data_datacube(collection_name=None, filters=None, page_size=200):
 
 
 
+def _page_documents(response):
+    """Documents of one CRUD page; the API has answered with both `data` and `result`."""
+    if isinstance(response, list):
+        return response
+    if not isinstance(response, dict):
+        return []
+    for key in ("data", "result", "documents"):
+        value = response.get(key)
+        if isinstance(value, list):
+            return value
+        if isinstance(value, dict):
+            nested = _page_documents(value)
+            if nested:
+                return nested
+    return []
+
+
+def iter_documents(collection_name, filters=None, page_size=200):
+    """
+    Yield every document of a collection, page by page, until a page comes
+    back empty. A short page does not end the read: the Datacube may cap
+    page_size below what was asked for.
+    """
+    page = 1
+    previous = None
+    while True:
+        documents = _page_documents(
+            get_data_datacube(collection_name=collection_name, filters=filters, page_size=page_size, page=page)
+        )
+        # A server that ignores `page` answers the same page forever
+        if not documents or documents == previous:
+            return
+        yield from documents
+        previous = documents
+        page += 1
+
+
+
 # ============================================================
 # Normalize Point
 # ============================================================
@@ -133,7 +172,7 @@ def query_by_four_corners_datacube(top_left, top_right, bottom_left, bottom_righ
     INSCRIBER_URL = os.getenv("INSCRIBER_URL")
 
     try:
-        response = requests.post(INSCRIBER_URL, json=payload)
+        response = http.post(INSCRIBER_URL, json=payload, idempotent=True)
         response.raise_for_status()
 
         data = response.json()
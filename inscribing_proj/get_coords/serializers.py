@@ -23,4 +23,17 @@ class BoundingBoxSerializer(serializers.Serializer):
     )
 
     # def validate(self, data):
-        # return data
\ No newline at end of file
+        # return data
+
+
+class LatticeQuerySerializer(BoundingBoxSerializer):
+    radius = serializers.FloatField(required=False, default=1.0, min_value=0.001)
+    canvas_length = serializers.FloatField(required=False, default=200, min_value=0.001, max_value=100000)
+    canvas_width = serializers.FloatField(required=False, default=200, min_value=0.001, max_value=100000)
+    scale = serializers.FloatField(required=False, default=0.00899321605918700)
+
+    def validate(self, data):
+        for extent in ("canvas_length", "canvas_width"):
+            if data[extent] / (2 * data["radius"]) > 1000000:
+                raise serializers.ValidationError({"radius": "Too small for the canvas size"})
+        return data
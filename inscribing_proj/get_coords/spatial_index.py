@@ -0,0 +1,178 @@
+import os
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from decouple import config
+from django.conf import settings
+
+
+INDEX_REFRESH_SECONDS = config("INDEX_REFRESH_SECONDS", default=3600, cast=float)
+INDEX_READY_TIMEOUT = config("INDEX_READY_TIMEOUT", default=30, cast=float)
+INDEX_LOAD_WORKERS = config("INDEX_LOAD_WORKERS", default=8, cast=int)
+INDEX_SNAPSHOT_PATH = config(
+    "INDEX_SNAPSHOT_PATH",
+    default=os.path.join(settings.BASE_DIR, "state", "spatial_index.npz"),
+)
+
+
+# ============================================================
+# Sorted-array index
+# ============================================================
+
+class SpatialIndex:
+    """
+    Immutable in-memory index of every lattice point.
+
+    Points are sorted by (latitude, longitude); a bounding box query picks the
+    latitude rows with two `searchsorted` calls and filters longitudes inside
+    that slice only.
+    """
+
+    def __init__(self, lats, lons, loaded_at=None):
+        order = np.lexsort((lons, lats))
+        self.lats = np.ascontiguousarray(lats[order], dtype=np.float64)
+        self.lons = np.ascontiguousarray(lons[order], dtype=np.float64)
+        self.loaded_at = loaded_at or time.time()
+
+    def __len__(self):
+        return len(self.lats)
+
+    def query(self, lat_min, lat_max, lon_min, lon_max):
+        start = np.searchsorted(self.lats, lat_min, side="left")
+        stop = np.searchsorted(self.lats, lat_max, side="right")
+        lons = self.lons[start:stop]
+        mask = (lons >= lon_min) & (lons <= lon_max)
+        return self.lats[start:stop][mask], lons[mask]
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, lats=self.lats, lons=self.lons, loaded_at=self.loaded_at)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["lats"], data["lons"], float(data["loaded_at"]))
+
+
+def bounding_box(top_left, top_right, bottom_left, bottom_right):
+    points = [top_left, top_right, bottom_left, bottom_right]
+    lats = [float(p[0]) for p in points]
+    lons = [float(p[1]) for p in points]
+    return min(lats), max(lats), min(lons), max(lons)
+
+
+# ============================================================
+# Loading from the Datacube
+# ============================================================
+
+def _collection_points(collection_name):
+    from .queries import iter_documents
+
+    points = []
+    for doc in iter_documents(collection_name):
+        try:
+            points.append((float(doc["latitude"]), float(doc["longitude"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return points
+
+
+def load_from_datacube():
+    """Fetch every latitude collection listed in the index collection."""
+    from .queries import INDEX_COLLECTION_NAME, get_latitude_collections, iter_documents
+
+    start = time.time()
+    collections = sorted({
+        doc["collection"] for doc in iter_documents(INDEX_COLLECTION_NAME)
+        if isinstance(doc, dict) and doc.get("collection")
+    })
+    if not collections:
+        collections = get_latitude_collections()
+
+    with ThreadPoolExecutor(max_workers=INDEX_LOAD_WORKERS) as executor:
+        batches = list(executor.map(_collection_points, collections))
+
+    points = [point for batch in batches for point in batch]
+    if not points:
+        raise Exception("Datacube returned no coordinates")
+    coords = np.array(points, dtype=np.float64)
+    index = SpatialIndex(coords[:, 0], coords[:, 1])
+    print(
+        f"\n=== Spatial index loaded: {len(index)} points from {len(collections)} collections "
+        f"in {time.time() - start:.2f} seconds ==="
+    )
+    return index
+
+
+# ============================================================
+# Shared instance with background refresh
+# ============================================================
+
+_index = None
+_ready = threading.Event()
+_start_lock = threading.Lock()
+_refresher = None
+
+
+def _set_index(index):
+    global _index
+    _index = index
+    _ready.set()
+
+
+def _refresh_forever():
+    if os.path.exists(INDEX_SNAPSHOT_PATH):
+        try:
+            _set_index(SpatialIndex.load(INDEX_SNAPSHOT_PATH))
+            print(f"Spatial index restored from snapshot: {len(_index)} points")
+        except Exception:
+            traceback.print_exc()
+
+    while True:
+        try:
+            index = load_from_datacube()
+            _set_index(index)
+            index.save(INDEX_SNAPSHOT_PATH)
+        except Exception:
+            print("\n=== Spatial index refresh FAILED ===")
+            traceback.print_exc()
+        time.sleep(INDEX_REFRESH_SECONDS)
+
+
+def start_refresher():
+    """Start the background loader once per process."""
+    global _refresher
+    with _start_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_forever, name="spatial-index", daemon=True)
+            _refresher.start()
+
+
+def get_index(timeout=INDEX_READY_TIMEOUT):
+    """The current index, waiting up to `timeout` seconds for the first load; None if not ready."""
+    start_refresher()
+    if not _ready.wait(timeout):
+        return None
+    return _index
+
+
+def query_bounding_box(top_left, top_right, bottom_left, bottom_right):
+    index = get_index()
+    if index is None:
+        return None
+    lat_min, lat_max, lon_min, lon_max = bounding_box(top_left, top_right, bottom_left, bottom_right)
+    lats, lons = index.query(lat_min, lat_max, lon_min, lon_max)
+    return {
+        "count": int(len(lats)),
+        "raw_coordinates": [
+            {"latitude": lat, "longitude": lon} for lat, lon in zip(lats.tolist(), lons.tolist())
+        ],
+        "index_loaded_at": index.loaded_at,
+    }
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import GeoQueryView,GeoQueryViewDatacube
+from .views import GeoQueryView,GeoQueryViewDatacube,LatticeQueryView,HttpStatsView
 
 urlpatterns = [
     path('geo-query/', GeoQueryView.as_view(), name='geo-query'),
-    path('geo-query-cube/', GeoQueryViewDatacube.as_view(), name='geo-query-cube')
+    path('geo-query-cube/', GeoQueryViewDatacube.as_view(), name='geo-query-cube'),
+    path('lattice/', LatticeQueryView.as_view(), name='lattice'),
+    path('http-stats/', HttpStatsView.as_view(), name='http-stats'),
 
 ]
\ No newline at end of file
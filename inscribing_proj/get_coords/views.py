@@ -1,19 +1,24 @@
 import traceback
 import json
 
+import numpy as np
+
 print("\n=== LOADING VIEWS.PY ===")
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import BoundingBoxSerializer
+from .serializers import BoundingBoxSerializer, LatticeQuerySerializer
+from .lattice import lattice_points
+from .spatial_index import bounding_box
+from .http_client import http
 
-# Load Datacube query function
+# Load in-memory spatial index
 try:
-    from .queries import query_by_four_corners_datacube
-    print("Imported queries successfully")
+    from .spatial_index import query_bounding_box
+    print("Imported spatial index successfully")
 except Exception as e:
-    print("\n=== ERROR IMPORTING QUERIES ===")
+    print("\n=== ERROR IMPORTING SPATIAL INDEX ===")
     traceback.print_exc()
     print("================================\n")
     raise
@@ -32,7 +37,8 @@ class GeoQueryView(APIView):
 
 class GeoQueryViewDatacube(APIView):
     """
-    Datacube-optimized geospatial lookup API.
+    Geospatial lookup API answered from the in-memory spatial index, which is
+    loaded from the Datacube and refreshed in the background.
     """
     def post(self, request):
         print("\n=== /api/geo-query-cube/ called ===")
@@ -52,28 +58,76 @@ class GeoQueryViewDatacube(APIView):
         print("Validated data:", data)
 
         try:
-            print("\n=== Calling Datacube Query ===")
-            results = query_by_four_corners_datacube(
+            results = query_bounding_box(
                 top_left=data["top_left"],
                 top_right=data["top_right"],
                 bottom_left=data["bottom_left"],
                 bottom_right=data["bottom_right"],
             )
 
-            print("Datacube result:", results)
-            print("=== Datacube Query Finished Successfully ===\n")
+            if results is None:
+                return Response(
+                    {"error": "Spatial index is still loading"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+
+            print(f"Spatial index returned {results['count']} points")
 
             return Response({"result": results}, status=200)
 
         except Exception as e:
-            print("\n=== ERROR IN Datacube Query ===")
+            print("\n=== ERROR IN Spatial Index Query ===")
             traceback.print_exc()
             print("=========================================\n")
 
             return Response(
                 {
-                    "error": "Datacube query failed",
+                    "error": "Spatial index query failed",
                     "details": str(e)
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class LatticeQueryView(APIView):
+    """
+    Computes the inscribed-circle lattice inside a bounding box directly,
+    for any radius and canvas size, without the Datacube.
+    """
+    def post(self, request):
+        serializer = LatticeQuerySerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Invalid lattice query", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        lat_min, lat_max, lon_min, lon_max = bounding_box(
+            data["top_left"], data["top_right"], data["bottom_left"], data["bottom_right"]
+        )
+        lats, lons = lattice_points(
+            lat_min, lat_max, lon_min, lon_max,
+            radius=data["radius"],
+            length=data["canvas_length"],
+            width=data["canvas_width"],
+            scale=data["scale"],
+        )
+        order = np.lexsort((lons, lats))
+
+        return Response({"result": {
+            "count": int(len(lats)),
+            "raw_coordinates": [
+                {"latitude": lat, "longitude": lon}
+                for lat, lon in zip(lats[order].tolist(), lons[order].tolist())
+            ],
+        }}, status=200)
+
+
+class HttpStatsView(APIView):
+    """
+    Latency and error counters of the inscriber's outbound HTTP calls.
+    """
+    def get(self, request):
+        return Response({"endpoints": http.stats()}, status=200)